@@ -1,7 +1,7 @@
 
 from fastapi import APIRouter
 
-from app.api.api_v1.endpoints import login, users, groups, registrations, instructors
+from app.api.api_v1.endpoints import login, users, groups, registrations, instructors, series, calendar, exports, cache, jobs, profiles, slow_queries
 
 api_router = APIRouter()
 api_router.include_router(login.router, tags=["login"])
@@ -9,3 +9,10 @@ api_router.include_router(users.router, prefix="/users", tags=["users"])
 api_router.include_router(groups.router, prefix="/groups", tags=["groups"])
 api_router.include_router(registrations.router, prefix="/registrations", tags=["registrations"])
 api_router.include_router(instructors.router, prefix="/instructors", tags=["instructors"])
+api_router.include_router(series.router, prefix="/series", tags=["series"])
+api_router.include_router(calendar.router, prefix="/calendar", tags=["calendar"])
+api_router.include_router(exports.router, prefix="/exports", tags=["exports"])
+api_router.include_router(cache.router, prefix="/cache", tags=["cache"])
+api_router.include_router(jobs.router, prefix="/jobs", tags=["jobs"])
+api_router.include_router(profiles.router, prefix="/profiles", tags=["profiles"])
+api_router.include_router(slow_queries.router, prefix="/slow-queries", tags=["slow-queries"])
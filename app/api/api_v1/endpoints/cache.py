@@ -0,0 +1,20 @@
+
+from typing import Any, List
+
+from fastapi import APIRouter, Depends
+
+from app.api import deps
+from app.cache.core import caches
+from app.models.user import User
+from app.schemas.cache import CacheStats
+
+router = APIRouter()
+
+@router.get("/stats", response_model=List[CacheStats])
+def read_cache_stats(
+    current_user: User = Depends(deps.get_current_admin),
+) -> Any:
+    """
+    Hit, miss and invalidation counters of every cache in this process.
+    """
+    return [cache.stats()._asdict() for cache in caches.values()]
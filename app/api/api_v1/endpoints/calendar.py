@@ -0,0 +1,95 @@
+from typing import Any, Optional
+from datetime import date, datetime, time, timedelta
+import hashlib
+
+from fastapi import APIRouter, Depends, HTTPException, Request, Response
+from sqlalchemy.orm import Session
+
+from app.api import deps
+from app.api.etag import not_modified
+from app.core import icalendar, security
+from app.core.config import settings
+from app.crud.crud_calendar import calendar_feed
+from app.models.user import User
+from app.schemas.calendar import WeekGrid
+
+router = APIRouter()
+
+ICS_MEDIA_TYPE = "text/calendar; charset=utf-8"
+
+@router.get("/token", response_model=dict)
+def read_calendar_token(
+    current_user: User = Depends(deps.get_current_active_user),
+) -> Any:
+    """
+    Get the private URL of the current user's calendar feed.
+    """
+    token = security.create_calendar_token(current_user.id, current_user.role.value)
+    return {"token": token, "url": f"{settings.API_V1_STR}/calendar/{token}.ics"}
+
+@router.get("/week", response_model=WeekGrid)
+def read_week_grid(
+    *,
+    db: Session = Depends(deps.get_db),
+    start: Optional[date] = None,
+    current_user: User = Depends(deps.get_current_active_user),
+) -> Any:
+    """
+    Everything needed to draw the week containing `start` (default: this week):
+    groups with occupancy and instructors, a day-by-hour grid of group ids,
+    and the groups the current user is registered for.
+    """
+    day = start or date.today()
+    week_start = day - timedelta(days=day.weekday())
+    grid = calendar_feed.get_week_grid(
+        db, week_start=week_start, role=current_user.role.value,
+        gender=current_user.gender.value if current_user.gender else None
+    )
+    begin = datetime.combine(week_start, time.min)
+    my_group_ids = calendar_feed.get_registered_group_ids(
+        db, visitor_id=current_user.id, start=begin, end=begin + timedelta(days=7)
+    ) if grid["groups"] else []
+    return {**grid, "my_group_ids": my_group_ids}
+
+@router.get("/{token}.ics", response_class=Response)
+def read_calendar_feed(
+    *,
+    db: Session = Depends(deps.get_db),
+    token: str,
+    request: Request,
+) -> Any:
+    """
+    iCalendar feed of the user's sessions, for calendar apps to subscribe to.
+    Supports If-None-Match: an unchanged feed costs a single aggregate query
+    and is answered with 304 before anything is rendered. There is no
+    Last-Modified: dropping a registration removes an event without changing
+    the latest update time, so only the ETag (which also covers the count)
+    tells the feeds apart.
+    """
+    identity = security.verify_calendar_token(token)
+    if identity is None:
+        raise HTTPException(status_code=404, detail="Calendar not found")
+    user_id, role = identity
+    
+    version = calendar_feed.get_version(db, user_id=user_id, role=role)
+    stamp = version.last_modified.timestamp() if version.last_modified else 0
+    digest = hashlib.sha1(f"{user_id}:{role}:{version.count}:{stamp}".encode()).hexdigest()[:20]
+    headers = {"ETag": f'"{digest}"', "Cache-Control": "private, max-age=300"}
+    
+    if not_modified(request, headers["ETag"]):
+        return Response(status_code=304, headers=headers)
+    
+    events = (
+        icalendar.event(
+            uid=f"group-{group_obj.id}@pool-scheduler",
+            start=group_obj.start_time,
+            end=group_obj.end_time,
+            summary=group_obj.name,
+            description=group_obj.description,
+            stamp=group_obj.updated_at,
+        )
+        for group_obj in calendar_feed.get_groups(db, user_id=user_id, role=role)
+    )
+    return Response(
+        content=icalendar.calendar("Pool sessions", events), media_type=ICS_MEDIA_TYPE, headers=headers
+    )
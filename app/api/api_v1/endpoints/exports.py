@@ -0,0 +1,48 @@
+
+from datetime import date, datetime, time
+from typing import Any
+
+from fastapi import APIRouter, Depends, HTTPException, Query
+from fastapi.responses import StreamingResponse
+from sqlalchemy.orm import Session
+
+from app.api import deps
+from app.core import columnar
+from app.crud.crud_export import analytics_export
+from app.models.user import User
+
+router = APIRouter()
+
+@router.get("/{dataset}")
+def export_dataset(
+    *,
+    db: Session = Depends(deps.get_db),
+    dataset: str,
+    start: date,
+    end: date,
+    format: str = Query("parquet", pattern="^(arrow|parquet)$"),
+    current_user: User = Depends(deps.get_current_admin),
+) -> Any:
+    """
+    Export groups, registrations or assignments of groups starting in [start, end)
+    as an Arrow IPC stream or a Parquet file, encoded batch by batch from a DB cursor.
+    """
+    if not columnar.is_available():
+        raise HTTPException(status_code=501, detail="Columnar export requires pyarrow")
+    try:
+        statement = analytics_export.get_statement(
+            dataset=dataset, start=datetime.combine(start, time.min), end=datetime.combine(end, time.min)
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+    extension = "arrows" if format == "arrow" else "parquet"
+    return StreamingResponse(
+        columnar.stream(
+            analytics_export.get_columns(statement),
+            analytics_export.iter_batches(db, statement),
+            format=format
+        ),
+        media_type=columnar.FORMATS[format],
+        headers={"Content-Disposition": f'attachment; filename="{dataset}-{start}-{end}.{extension}"'}
+    )
@@ -1,44 +1,87 @@
 
-from typing import Any, List, Optional
+from typing import Any, Dict, List, Optional
 
-from fastapi import APIRouter, Depends, HTTPException, Query
+import orjson
+from fastapi import APIRouter, Depends, HTTPException, Query, Request
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import StreamingResponse
 from sqlalchemy.orm import Session
 
 from app.api import deps
+from app.api.etag import REVALIDATE, make_etag, not_modified, not_modified_response
+from app.api.responses import trusted_response, parse_fields
 from app.models.user import User, Gender
 from app.crud.crud_group import group
 from app.crud.crud_instructor import instructor
-from app.schemas.group import Group, GroupCreate, GroupUpdate, GroupList
-from app.schemas.instructor import InstructorAvailability
+from app.db.changes import table_versions
+from app.schemas.group import Group, GroupCreate, GroupUpdate, GroupList, CloneWeekRequest, CloneWeekResult
+from app.schemas.instructor import (
+    InstructorAvailability, InstructorAvailabilityBatchRequest, GroupInstructorAvailability,
+    AutoAssignRequest, AutoAssignResult
+)
+from app.scheduling.availability import InstructorFit
+from app.scheduling.solver import AssignmentProblem, AssignmentSolver
+from app.realtime.occupancy import occupancy_hub
 from app.core.config import settings
 
 router = APIRouter()
 
+# Seconds between keep-alive comments on an idle occupancy stream
+SSE_HEARTBEAT_SECONDS = 15
+
+# Groups one occupancy stream may watch
+MAX_STREAM_GROUPS = 50
+
+def _sse(event: str, data: Dict[str, Any]) -> bytes:
+    return b"event: " + event.encode() + b"\ndata: " + orjson.dumps(data) + b"\n\n"
+
 @router.get("/", response_model=List[GroupList])
 def read_groups(
+    request: Request,
     db: Session = Depends(deps.get_db),
     skip: int = 0,
     limit: int = 100,
+    fields: Optional[str] = Query(None, description="Comma-separated fields to return, e.g. id,name,start_time,is_full"),
     current_user: User = Depends(deps.get_current_active_user),
 ) -> Any:
     """
-    Retrieve groups.
+    Retrieve groups. Only the columns behind the requested fields are selected.
     """
-    groups = group.get_multi_with_details(db, skip=skip, limit=limit)
-    return groups
+    # Participant counts come from registrations, so both tables version the list
+    etag = make_etag("groups", table_versions.get(db, "groups", "registrations"), skip, limit, fields)
+    if not_modified(request, etag):
+        return not_modified_response(etag)
+    selected = parse_fields(fields, GroupList)
+    groups = group.get_fields(db, fields=selected, skip=skip, limit=limit)
+    response = trusted_response(GroupList, groups)
+    response.headers.update({"ETag": etag, "Cache-Control": REVALIDATE})
+    return response
 
 @router.get("/upcoming", response_model=List[GroupList])
 def read_upcoming_groups(
+    request: Request,
     db: Session = Depends(deps.get_db),
     skip: int = 0,
     limit: int = 100,
+    fields: Optional[str] = Query(None, description="Comma-separated fields to return, e.g. id,name,start_time,is_full"),
     current_user: User = Depends(deps.get_current_active_user),
 ) -> Any:
     """
     Retrieve upcoming groups.
     """
-    groups = group.get_upcoming_groups(db, skip=skip, limit=limit)
-    return groups
+    # The list also changes without writes whenever a group starts
+    versions = table_versions.get(db, "groups", "registrations")
+    etag = make_etag(
+        "groups/upcoming", versions,
+        group.get_upcoming_boundary(db, groups_version=versions[0]), skip, limit, fields
+    )
+    if not_modified(request, etag):
+        return not_modified_response(etag)
+    selected = parse_fields(fields, GroupList)
+    groups = group.get_upcoming_fields(db, fields=selected, skip=skip, limit=limit)
+    response = trusted_response(GroupList, groups)
+    response.headers.update({"ETag": etag, "Cache-Control": REVALIDATE})
+    return response
 
 @router.get("/available", response_model=List[GroupList])
 def read_available_groups(
@@ -58,6 +101,58 @@ def read_available_groups(
     )
     return groups
 
+@router.get("/occupancy/stream")
+async def stream_occupancy(
+    request: Request,
+    group_ids: str = Query(..., description="Comma-separated group ids, e.g. 1,2,3"),
+    db: Session = Depends(deps.get_db),
+    current_user: User = Depends(deps.get_current_active_user),
+) -> Any:
+    """
+    Server-Sent Events stream of the occupancy (total, male, female, is_full)
+    of the given groups: an `occupancy` event per group right away, then one
+    whenever a registration or cancellation changes it.
+    """
+    try:
+        ids = sorted({int(value) for value in group_ids.split(",") if value.strip()})
+    except ValueError:
+        raise HTTPException(status_code=400, detail="group_ids must be comma-separated integers")
+    if not ids or len(ids) > MAX_STREAM_GROUPS:
+        raise HTTPException(status_code=400, detail=f"Watch between 1 and {MAX_STREAM_GROUPS} groups")
+
+    # Subscribe before reading, so no change between the read and the stream is lost
+    subscription = occupancy_hub.subscribe(ids)
+    try:
+        initial = await run_in_threadpool(group.get_occupancy, db, ids=ids)
+        # End the transaction, handing the connection back to the pool for the life of the stream
+        await run_in_threadpool(db.commit)
+    except Exception:
+        occupancy_hub.unsubscribe(subscription)
+        raise
+    if len(initial) != len(ids):
+        occupancy_hub.unsubscribe(subscription)
+        raise HTTPException(status_code=404, detail="Group not found")
+
+    async def events():
+        try:
+            yield b"retry: 5000\n\n"
+            for occupancy in initial:
+                yield _sse("occupancy", occupancy)
+            while not await request.is_disconnected():
+                changes = await subscription.next(SSE_HEARTBEAT_SECONDS)
+                if not changes:
+                    yield b": keep-alive\n\n"
+                for occupancy in changes:
+                    yield _sse("occupancy", occupancy)
+        finally:
+            occupancy_hub.unsubscribe(subscription)
+
+    return StreamingResponse(
+        events(), media_type="text/event-stream",
+        # Proxies must pass events through as they come
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
 @router.post("/", response_model=Group)
 def create_group(
     *,
@@ -73,24 +168,97 @@ def create_group(
         instructor_user = db.query(User).filter(User.id == group_in.instructor_id).first()
         if not instructor_user or instructor_user.role != "instructor":
             raise HTTPException(status_code=400, detail="Invalid instructor")
+        
+        if instructor.get_conflicting_group_ids(
+            db, instructor_id=group_in.instructor_id,
+            start=group_in.start_time, end=group_in.end_time
+        ):
+            raise HTTPException(status_code=400, detail="Instructor has a conflicting group at this time")
     
-    group_obj = group.create_with_instructor(db, obj_in=group_in)
+    try:
+        group_obj = group.create_with_instructor(db, obj_in=group_in)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
     return group_obj
 
+@router.post("/auto-assign", response_model=AutoAssignResult)
+def auto_assign_instructors(
+    *,
+    db: Session = Depends(deps.get_db),
+    assign_in: AutoAssignRequest,
+    current_user: User = Depends(deps.get_current_admin),
+) -> Any:
+    """
+    Assign instructors to all unassigned groups starting in a date range.
+    With dry_run the proposed assignments are returned without being saved.
+    """
+    if assign_in.end <= assign_in.start:
+        raise HTTPException(status_code=400, detail="end must be after start")
+    
+    problem = AssignmentProblem.load(db, start=assign_in.start, end=assign_in.end)
+    solver = AssignmentSolver(problem)
+    plan = solver.solve()
+    
+    if not assign_in.dry_run and plan:
+        try:
+            group.assign_instructors(db, assignments=plan)
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=str(e))
+    
+    assignments = [
+        {
+            "group_id": group_id,
+            "instructor_id": instructor_id,
+            "matches_preferences": solver.matches_preferences(group_id, instructor_id),
+        }
+        for group_id, instructor_id in plan.items()
+    ]
+    return {
+        "dry_run": assign_in.dry_run,
+        "assignments": assignments,
+        "unassigned_group_ids": [g.id for g in problem.groups if g.id not in plan],
+        "preference_matches": sum(1 for a in assignments if a["matches_preferences"]),
+    }
+
+@router.post("/clone-week", response_model=CloneWeekResult)
+def clone_week(
+    *,
+    db: Session = Depends(deps.get_db),
+    clone_in: CloneWeekRequest,
+    current_user: User = Depends(deps.get_current_admin),
+) -> Any:
+    """
+    Copy all groups of one week into another week, optionally keeping their
+    instructors where that causes no overlap and stays within the weekly hours.
+    """
+    if clone_in.source_week.isocalendar()[:2] == clone_in.target_week.isocalendar()[:2]:
+        raise HTTPException(status_code=400, detail="Source and target must be different weeks")
+    
+    try:
+        created, conflicts = group.clone_week(
+            db, source_week=clone_in.source_week, target_week=clone_in.target_week,
+            keep_instructors=clone_in.keep_instructors
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    return {"created": created, "conflicts": [conflict._asdict() for conflict in conflicts]}
+
 @router.get("/{group_id}", response_model=Group)
 def read_group(
     *,
     db: Session = Depends(deps.get_db),
     group_id: int,
+    fields: Optional[str] = Query(None, description="Comma-separated fields to return, e.g. id,name,start_time,is_full"),
     current_user: User = Depends(deps.get_current_active_user),
 ) -> Any:
     """
     Get group by ID.
     """
-    group_obj = group.get_with_details(db, id=group_id)
-    if not group_obj:
+    selected = parse_fields(fields, Group)
+    group_row = group.get_fields_by_id(db, id=group_id, fields=selected)
+    if not group_row:
         raise HTTPException(status_code=404, detail="Group not found")
-    return group_obj
+    return trusted_response(Group, group_row, many=False)
 
 @router.put("/{group_id}", response_model=Group)
 def update_group(
@@ -113,9 +281,71 @@ def update_group(
         if not instructor_user or instructor_user.role != "instructor":
             raise HTTPException(status_code=400, detail="Invalid instructor")
     
-    group_obj = group.update(db, db_obj=group_obj, obj_in=group_in)
+    instructor_id = (
+        group_in.instructor_id if "instructor_id" in group_in.model_fields_set
+        else group_obj.instructor_id
+    )
+    if instructor_id and instructor.get_conflicting_group_ids(
+        db, instructor_id=instructor_id,
+        start=group_in.start_time, end=group_in.end_time, exclude_group_id=group_id
+    ):
+        raise HTTPException(status_code=400, detail="Instructor has a conflicting group at this time")
+    
+    try:
+        group_obj = group.update(db, db_obj=group_obj, obj_in=group_in)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
     return group_obj
 
+def _availability_response(fits: List[InstructorFit], sort_by: Optional[str]) -> List[dict]:
+    # Create response objects
+    result = []
+    for fit in fits:
+        result.append({
+            "instructor_id": fit.instructor.id,
+            "full_name": fit.instructor.full_name,
+            "email": fit.instructor.email,
+            "current_hours_scheduled": fit.current_hours,
+            "min_hours_required": settings.INSTRUCTOR_MIN_HOURS_PER_WEEK,
+            "max_hours_allowed": settings.INSTRUCTOR_MAX_HOURS_PER_WEEK,
+            "is_overloaded": fit.is_overloaded,
+            "matches_preferences": fit.matches_preferences,
+            "shift_coverage": fit.shift_coverage
+        })
+    
+    # Sort results if requested
+    if sort_by == "hours_scheduled":
+        result.sort(key=lambda x: x["current_hours_scheduled"])
+    elif sort_by == "preference_match":
+        result.sort(key=lambda x: (not x["matches_preferences"], x["current_hours_scheduled"]))
+    
+    return result
+
+@router.post("/available-instructors:batch", response_model=List[GroupInstructorAvailability])
+def read_available_instructors_batch(
+    *,
+    db: Session = Depends(deps.get_db),
+    batch_in: InstructorAvailabilityBatchRequest,
+    sort_by: Optional[str] = Query(None, description="Sort by: 'hours_scheduled', 'preference_match'"),
+    current_user: User = Depends(deps.get_current_admin),
+) -> Any:
+    """
+    Get available instructors for many groups at once. Instructors, weekly hours,
+    assigned slots and preferences are read once and shared by all groups.
+    """
+    groups = group.get_multi_by_ids(db, ids=batch_in.group_ids)
+    missing = set(batch_in.group_ids) - {group_obj.id for group_obj in groups}
+    if missing:
+        raise HTTPException(
+            status_code=404, detail=f"Group not found: {', '.join(str(i) for i in sorted(missing))}"
+        )
+    
+    fits = instructor.get_available_instructors_for_groups(db, groups=groups)
+    return [
+        {"group_id": group_id, "instructors": _availability_response(fits[group_id], sort_by)}
+        for group_id in dict.fromkeys(batch_in.group_ids)
+    ]
+
 @router.get("/{group_id}/available-instructors", response_model=List[InstructorAvailability])
 def read_available_instructors(
     *,
@@ -133,35 +363,8 @@ def read_available_instructors(
     if not group_obj:
         raise HTTPException(status_code=404, detail="Group not found")
     
-    available_instructors = instructor.get_available_instructors_for_group(
-        db, group_start=group_obj.start_time, group_end=group_obj.end_time, 
-        group_id=group_id, skip=skip, limit=limit
-    )
-    
-    # Create response objects
-    result = []
-    for instr, is_overloaded, matches_preferences in available_instructors:
-        result.append({
-            "instructor_id": instr.id,
-            "full_name": instr.full_name,
-            "email": instr.email,
-            "current_hours_scheduled": instructor.get_instructor_hours_in_week(
-                db, instructor_id=instr.id, 
-                start_date=group_obj.start_time - timedelta(days=group_obj.start_time.weekday())
-            ),
-            "min_hours_required": settings.INSTRUCTOR_MIN_HOURS_PER_WEEK,
-            "max_hours_allowed": settings.INSTRUCTOR_MAX_HOURS_PER_WEEK,
-            "is_overloaded": is_overloaded,
-            "matches_preferences": matches_preferences
-        })
-    
-    # Sort results if requested
-    if sort_by == "hours_scheduled":
-        result.sort(key=lambda x: x["current_hours_scheduled"])
-    elif sort_by == "preference_match":
-        result.sort(key=lambda x: (not x["matches_preferences"], x["current_hours_scheduled"]))
-    
-    return result
+    fits = instructor.get_available_instructors_for_groups(db, groups=[group_obj])[group_id]
+    return _availability_response(fits[skip:skip+limit], sort_by)
 
 @router.put("/{group_id}/instructor/{instructor_id}", response_model=Group)
 def update_group_instructor(
@@ -183,6 +386,12 @@ def update_group_instructor(
     if not group_obj:
         raise HTTPException(status_code=404, detail="Group not found")
     
+    if instructor.get_conflicting_group_ids(
+        db, instructor_id=instructor_id,
+        start=group_obj.start_time, end=group_obj.end_time, exclude_group_id=group_id
+    ):
+        raise HTTPException(status_code=400, detail="Instructor has a conflicting group at this time")
+    
     # Check if instructor is available and not overloaded
     available_instructors = instructor.get_available_instructors_for_group(
         db, group_start=group_obj.start_time, group_end=group_obj.end_time, 
@@ -196,7 +405,10 @@ def update_group_instructor(
             detail="Instructor is not available or would be overloaded by this assignment"
         )
     
-    group_obj = group.update_instructor(db, group_id=group_id, new_instructor_id=instructor_id)
+    try:
+        group_obj = group.update_instructor(db, group_id=group_id, new_instructor_id=instructor_id)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
     return group_obj
 
 @router.delete("/{group_id}/instructor", response_model=Group)
@@ -6,13 +6,15 @@ from sqlalchemy.orm import Session
 from datetime import datetime, timedelta
 
 from app.api import deps
+from app.api.responses import trusted_response
 from app.models.user import User, UserRole
 from app.models.instructor_preference import DayOfWeek
 from app.crud.crud_instructor import instructor_schedule, instructor_preference, instructor
 from app.crud.crud_group import group
 from app.schemas.instructor import (
     InstructorSchedule, InstructorScheduleCreate, InstructorScheduleUpdate,
-    InstructorPreference, InstructorPreferenceCreate, InstructorPreferenceUpdate
+    InstructorPreference, InstructorPreferenceCreate, InstructorPreferenceUpdate,
+    InstructorFreeWindows
 )
 from app.schemas.group import GroupList
 from app.core.config import settings
@@ -47,7 +49,7 @@ def read_instructor_groups(
     groups = group.get_instructor_groups(
         db, instructor_id=current_user.id, skip=skip, limit=limit
     )
-    return groups
+    return trusted_response(GroupList, groups)
 
 @router.get("/me/hours", response_model=dict)
 def read_instructor_hours(
@@ -157,6 +159,29 @@ def clear_instructor_preferences(
     return {"success": success}
 
 # Admin routes for instructor management
+@router.get("/availability", response_model=List[InstructorFreeWindows])
+def read_instructors_free_windows(
+    *,
+    db: Session = Depends(deps.get_db),
+    start: datetime,
+    end: datetime,
+    current_user: User = Depends(deps.get_current_admin),
+) -> Any:
+    """
+    Admin endpoint listing when each instructor is on shift and not teaching.
+    """
+    if end <= start:
+        raise HTTPException(status_code=400, detail="end must be after start")
+    
+    return [
+        {
+            "instructor_id": instructor_user.id,
+            "full_name": instructor_user.full_name,
+            "free": [{"start": window_start, "end": window_end} for window_start, window_end in windows],
+        }
+        for instructor_user, windows in instructor.get_free_windows(db, start=start, end=end)
+    ]
+
 @router.get("/{instructor_id}/hours", response_model=dict)
 def read_instructor_hours_admin(
     *,
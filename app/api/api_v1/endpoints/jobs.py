@@ -0,0 +1,99 @@
+
+import os
+from typing import Any, List, Optional
+
+from fastapi import APIRouter, Depends, HTTPException
+from fastapi.responses import FileResponse
+from sqlalchemy.orm import Session
+
+from app.api import deps
+from app.crud.crud_job import job as crud_job
+from app.jobs.runner import JobQueue
+from app.models.job import JobStatus
+from app.models.user import User
+from app.schemas.job import Job, JobCreate
+
+router = APIRouter()
+
+@router.get("/", response_model=List[Job])
+def read_jobs(
+    db: Session = Depends(deps.get_db),
+    status: Optional[JobStatus] = None,
+    skip: int = 0,
+    limit: int = 100,
+    current_user: User = Depends(deps.get_current_admin),
+) -> Any:
+    """
+    Retrieve jobs, newest first.
+    """
+    return crud_job.get_multi_by_status(db, status=status, skip=skip, limit=limit)
+
+@router.post("/", response_model=Job, status_code=202)
+def create_job(
+    *,
+    queue: JobQueue = Depends(deps.get_job_queue),
+    job_in: JobCreate,
+    current_user: User = Depends(deps.get_current_admin),
+) -> Any:
+    """
+    Queue a job for the background worker. Poll GET /jobs/{id} for its status.
+    """
+    try:
+        return queue.enqueue(
+            job_in.kind, job_in.payload, priority=job_in.priority,
+            max_attempts=job_in.max_attempts, created_by_id=current_user.id
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+@router.get("/{job_id}", response_model=Job)
+def read_job(
+    *,
+    db: Session = Depends(deps.get_db),
+    job_id: int,
+    current_user: User = Depends(deps.get_current_admin),
+) -> Any:
+    """
+    Get a job's status and, once finished, its result or error.
+    """
+    job_obj = crud_job.get(db, id=job_id)
+    if not job_obj:
+        raise HTTPException(status_code=404, detail="Job not found")
+    return job_obj
+
+@router.delete("/{job_id}", response_model=Job)
+def cancel_job(
+    *,
+    db: Session = Depends(deps.get_db),
+    job_id: int,
+    current_user: User = Depends(deps.get_current_admin),
+) -> Any:
+    """
+    Cancel a job that has not started yet.
+    """
+    job_obj = crud_job.get(db, id=job_id)
+    if not job_obj:
+        raise HTTPException(status_code=404, detail="Job not found")
+    try:
+        return crud_job.cancel(db, job=job_obj)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+@router.get("/{job_id}/output")
+def read_job_output(
+    *,
+    db: Session = Depends(deps.get_db),
+    job_id: int,
+    current_user: User = Depends(deps.get_current_admin),
+) -> Any:
+    """
+    Download the file a finished job wrote.
+    """
+    job_obj = crud_job.get(db, id=job_id)
+    if not job_obj:
+        raise HTTPException(status_code=404, detail="Job not found")
+    result = job_obj.result if isinstance(job_obj.result, dict) else {}
+    path = result.get("path")
+    if job_obj.status != JobStatus.SUCCEEDED or not path or not os.path.isfile(path):
+        raise HTTPException(status_code=404, detail="Job has no output")
+    return FileResponse(path, media_type=result.get("media_type"), filename=os.path.basename(path))
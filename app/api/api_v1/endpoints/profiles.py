@@ -0,0 +1,63 @@
+
+from typing import Any, List
+
+from fastapi import APIRouter, Depends, HTTPException, Query
+from fastapi.responses import Response
+
+from app.api import deps
+from app.metrics.profiling import RequestProfile, profiles
+from app.models.user import User
+from app.schemas.profile import Profile, ProfileSummary
+
+router = APIRouter()
+
+SORT_KEYS = ("cumulative", "tottime", "calls")
+
+def get_profile_or_404(profile_id: str) -> RequestProfile:
+    profile = profiles.get(profile_id)
+    if not profile:
+        raise HTTPException(status_code=404, detail="Profile not found")
+    return profile
+
+@router.get("/", response_model=List[ProfileSummary])
+def read_profiles(
+    current_user: User = Depends(deps.get_current_admin),
+) -> Any:
+    """
+    Requests profiled by this process (sent with "X-Profile: 1"), newest first.
+    """
+    return [profile.summary() for profile in profiles.list()]
+
+@router.get("/{profile_id}", response_model=Profile)
+def read_profile(
+    profile_id: str,
+    sort: str = "cumulative",
+    limit: int = Query(50, ge=1, le=1000),
+    current_user: User = Depends(deps.get_current_admin),
+) -> Any:
+    """
+    SQL statements with their times and the cProfile report of a profiled request.
+    """
+    if sort not in SORT_KEYS:
+        raise HTTPException(status_code=400, detail=f"sort must be one of {', '.join(SORT_KEYS)}")
+    profile = get_profile_or_404(profile_id)
+    return {
+        **profile.summary(),
+        "statements": profile.statements,
+        "stats": profile.stats_text(sort=sort, limit=limit),
+    }
+
+@router.get("/{profile_id}/pstats")
+def read_profile_pstats(
+    profile_id: str,
+    current_user: User = Depends(deps.get_current_admin),
+) -> Any:
+    """
+    Raw cProfile data of a profiled request, to open with pstats or snakeviz.
+    """
+    profile = get_profile_or_404(profile_id)
+    return Response(
+        profile.pstats_dump(),
+        media_type="application/octet-stream",
+        headers={"Content-Disposition": f'attachment; filename="{profile.id}.prof"'},
+    )
@@ -1,35 +1,48 @@
 
-from typing import Any, List
+from typing import Any, List, Optional
 
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, status
 from sqlalchemy.orm import Session
 
 from app.api import deps
+from app.api.etag import REVALIDATE, make_etag, not_modified, not_modified_response
+from app.api.responses import trusted_response, parse_fields
 from app.models.user import User, UserRole
 from app.crud.crud_registration import registration
+from app.db.changes import table_versions
 from app.schemas.registration import Registration, RegistrationCreate, RegistrationUpdate
 
 router = APIRouter()
 
 @router.get("/", response_model=List[Registration])
 def read_registrations(
+    request: Request,
     db: Session = Depends(deps.get_db),
     skip: int = 0,
     limit: int = 100,
+    fields: Optional[str] = Query(None, description="Comma-separated fields to return, e.g. id,group_id,attended"),
     current_user: User = Depends(deps.get_current_active_user),
 ) -> Any:
     """
     Retrieve current user's registrations.
     """
+    # Visitors get their own list, everyone else shares one
+    scope = current_user.id if current_user.role == UserRole.VISITOR else None
+    etag = make_etag("registrations", table_versions.get(db, "registrations"), scope, skip, limit, fields)
+    if not_modified(request, etag):
+        return not_modified_response(etag)
+    selected = parse_fields(fields, Registration)
     if current_user.role == UserRole.VISITOR:
         # Visitors see only their own registrations
-        registrations = registration.get_visitor_registrations(
-            db, visitor_id=current_user.id, skip=skip, limit=limit
+        registrations = registration.get_visitor_registration_fields(
+            db, visitor_id=current_user.id, fields=selected, skip=skip, limit=limit
         )
     else:
         # Admins and instructors can see all
-        registrations = registration.get_multi(db, skip=skip, limit=limit)
-    return registrations
+        registrations = registration.get_fields(db, fields=selected, skip=skip, limit=limit)
+    response = trusted_response(Registration, registrations)
+    response.headers.update({"ETag": etag, "Cache-Control": REVALIDATE})
+    return response
 
 @router.get("/group/{group_id}", response_model=List[Registration])
 def read_group_registrations(
@@ -38,11 +51,13 @@ def read_group_registrations(
     group_id: int,
     skip: int = 0,
     limit: int = 100,
+    fields: Optional[str] = Query(None, description="Comma-separated fields to return, e.g. id,visitor_id,attended"),
     current_user: User = Depends(deps.get_current_active_user),
 ) -> Any:
     """
     Retrieve registrations for a specific group.
     """
+    selected = parse_fields(fields, Registration)
     # Check access permissions
     if current_user.role == UserRole.VISITOR:
         # Check if visitor is registered for this group
@@ -53,10 +68,10 @@ def read_group_registrations(
                 detail="Access denied for this group's registrations",
             )
     
-    registrations = registration.get_group_registrations(
-        db, group_id=group_id, skip=skip, limit=limit
+    registrations = registration.get_group_registration_fields(
+        db, group_id=group_id, fields=selected, skip=skip, limit=limit
     )
-    return registrations
+    return trusted_response(Registration, registrations)
 
 @router.post("/", response_model=Registration)
 def create_registration(
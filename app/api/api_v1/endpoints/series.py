@@ -0,0 +1,240 @@
+from typing import Any, List
+from datetime import datetime, timedelta
+
+from fastapi import APIRouter, Depends, HTTPException
+from sqlalchemy.orm import Session
+
+from app.api import deps
+from app.models.user import User, UserRole
+from app.crud.crud_series import group_series
+from app.crud.crud_group import group
+from app.crud.crud_instructor import instructor
+from app.crud.crud_registration import registration
+from app.schemas.series import (
+    GroupSeries, GroupSeriesCreate, GroupSeriesUpdate, GroupSeriesException,
+    GroupSeriesExceptionCreate, Occurrence, OccurrenceRef, OccurrenceInstructor
+)
+from app.schemas.group import Group
+from app.schemas.registration import Registration, RegistrationCreate
+
+router = APIRouter()
+
+# Longest date window occurrences are expanded for in one request
+MAX_WINDOW = timedelta(days=366)
+
+RULE_FIELDS = ("first_start", "duration_minutes", "interval_weeks")
+
+def _check_window(start: datetime, end: datetime) -> None:
+    if end <= start:
+        raise HTTPException(status_code=400, detail="end must be after start")
+    if end - start > MAX_WINDOW:
+        raise HTTPException(status_code=400, detail="The window cannot be longer than 366 days")
+
+def _get_series_or_404(db: Session, series_id: int):
+    series_obj = group_series.get(db, id=series_id)
+    if not series_obj:
+        raise HTTPException(status_code=404, detail="Series not found")
+    return series_obj
+
+@router.get("/", response_model=List[GroupSeries])
+def read_series(
+    db: Session = Depends(deps.get_db),
+    skip: int = 0,
+    limit: int = 100,
+    current_user: User = Depends(deps.get_current_active_user),
+) -> Any:
+    """
+    Retrieve group series.
+    """
+    return group_series.get_multi(db, skip=skip, limit=limit)
+
+@router.post("/", response_model=GroupSeries)
+def create_series(
+    *,
+    db: Session = Depends(deps.get_db),
+    series_in: GroupSeriesCreate,
+    current_user: User = Depends(deps.get_current_admin),
+) -> Any:
+    """
+    Create a recurring group series. No groups are created until an occurrence
+    gets a registration or an instructor.
+    """
+    return group_series.create(db, obj_in=series_in)
+
+@router.get("/occurrences", response_model=List[Occurrence])
+def read_occurrences(
+    *,
+    db: Session = Depends(deps.get_db),
+    start: datetime,
+    end: datetime,
+    current_user: User = Depends(deps.get_current_active_user),
+) -> Any:
+    """
+    Occurrences of all series in a date window, expanded on the fly.
+    """
+    _check_window(start, end)
+    return [occurrence._asdict() for occurrence in group_series.get_occurrences(db, start=start, end=end)]
+
+@router.get("/{series_id}", response_model=GroupSeries)
+def read_series_by_id(
+    *,
+    db: Session = Depends(deps.get_db),
+    series_id: int,
+    current_user: User = Depends(deps.get_current_active_user),
+) -> Any:
+    """
+    Get a series by ID.
+    """
+    return _get_series_or_404(db, series_id)
+
+@router.put("/{series_id}", response_model=GroupSeries)
+def update_series(
+    *,
+    db: Session = Depends(deps.get_db),
+    series_id: int,
+    series_in: GroupSeriesUpdate,
+    current_user: User = Depends(deps.get_current_admin),
+) -> Any:
+    """
+    Update a series. Its rule can only change while no occurrence has been
+    materialized or given an exception; afterwards, end it with `until` and
+    start a new series.
+    """
+    series_obj = _get_series_or_404(db, series_id)
+    rule_changed = any(getattr(series_in, field) != getattr(series_obj, field) for field in RULE_FIELDS)
+    if rule_changed and group_series.has_overrides(db, series_id=series_id):
+        raise HTTPException(
+            status_code=400,
+            detail="Series has materialized or modified occurrences; end it with 'until' and create a new series"
+        )
+    return group_series.update(db, db_obj=series_obj, obj_in=series_in)
+
+@router.delete("/{series_id}", response_model=GroupSeries)
+def delete_series(
+    *,
+    db: Session = Depends(deps.get_db),
+    series_id: int,
+    current_user: User = Depends(deps.get_current_admin),
+) -> Any:
+    """
+    Delete a series. Groups already materialized from it are kept.
+    """
+    _get_series_or_404(db, series_id)
+    return group_series.remove(db, id=series_id)
+
+@router.get("/{series_id}/occurrences", response_model=List[Occurrence])
+def read_series_occurrences(
+    *,
+    db: Session = Depends(deps.get_db),
+    series_id: int,
+    start: datetime,
+    end: datetime,
+    current_user: User = Depends(deps.get_current_active_user),
+) -> Any:
+    """
+    Occurrences of one series in a date window.
+    """
+    _get_series_or_404(db, series_id)
+    _check_window(start, end)
+    return [
+        occurrence._asdict()
+        for occurrence in group_series.get_occurrences(db, start=start, end=end, series_id=series_id)
+    ]
+
+@router.post("/{series_id}/exceptions", response_model=GroupSeriesException)
+def set_series_exception(
+    *,
+    db: Session = Depends(deps.get_db),
+    series_id: int,
+    exception_in: GroupSeriesExceptionCreate,
+    current_user: User = Depends(deps.get_current_admin),
+) -> Any:
+    """
+    Cancel or move a single occurrence.
+    """
+    series_obj = _get_series_or_404(db, series_id)
+    try:
+        return group_series.set_exception(db, series=series_obj, obj_in=exception_in)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+@router.post("/{series_id}/occurrences/register", response_model=Registration)
+def register_for_occurrence(
+    *,
+    db: Session = Depends(deps.get_db),
+    series_id: int,
+    occurrence_in: OccurrenceRef,
+    current_user: User = Depends(deps.get_current_active_user),
+) -> Any:
+    """
+    Register the current visitor for one occurrence, creating its group if needed.
+    """
+    if current_user.role != UserRole.VISITOR:
+        raise HTTPException(
+            status_code=400,
+            detail="Only visitors can register for groups",
+        )
+    
+    series_obj = _get_series_or_404(db, series_id)
+    try:
+        group_obj = group_series.materialize(
+            db, series=series_obj, occurrence_start=occurrence_in.occurrence_start
+        )
+        registration_obj = registration.create_with_visitor(
+            db, obj_in=RegistrationCreate(group_id=group_obj.id), visitor_id=current_user.id
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    
+    return registration_obj
+
+@router.put("/{series_id}/occurrences/instructor", response_model=Group)
+def update_occurrence_instructor(
+    *,
+    db: Session = Depends(deps.get_db),
+    series_id: int,
+    assignment_in: OccurrenceInstructor,
+    current_user: User = Depends(deps.get_current_admin),
+) -> Any:
+    """
+    Assign an instructor to one occurrence, creating its group if needed.
+    """
+    instructor_user = db.query(User).filter(User.id == assignment_in.instructor_id).first()
+    if not instructor_user or instructor_user.role != "instructor":
+        raise HTTPException(status_code=400, detail="Invalid instructor")
+    
+    series_obj = _get_series_or_404(db, series_id)
+    occurrence = group_series.get_occurrence(
+        db, series=series_obj, occurrence_start=assignment_in.occurrence_start
+    )
+    if occurrence is None:
+        raise HTTPException(status_code=404, detail="Occurrence not found")
+    
+    # Check before materializing, so a refused assignment leaves no group behind
+    if instructor.get_conflicting_group_ids(
+        db, instructor_id=assignment_in.instructor_id,
+        start=occurrence.start_time, end=occurrence.end_time, exclude_group_id=occurrence.group_id
+    ):
+        raise HTTPException(status_code=400, detail="Instructor has a conflicting group at this time")
+    
+    available_instructors = instructor.get_available_instructors_for_group(
+        db, group_start=occurrence.start_time, group_end=occurrence.end_time,
+        group_id=occurrence.group_id
+    )
+    valid_instructor_ids = [i[0].id for i in available_instructors if not i[1]]  # filter out overloaded
+    if assignment_in.instructor_id not in valid_instructor_ids:
+        raise HTTPException(
+            status_code=400,
+            detail="Instructor is not available or would be overloaded by this assignment"
+        )
+    
+    try:
+        group_obj = group_series.materialize(
+            db, series=series_obj, occurrence_start=assignment_in.occurrence_start
+        )
+        group_obj = group.update_instructor(
+            db, group_id=group_obj.id, new_instructor_id=assignment_in.instructor_id
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    return group_obj
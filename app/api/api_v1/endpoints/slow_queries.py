@@ -0,0 +1,22 @@
+
+from typing import Any, List
+
+from fastapi import APIRouter, Depends, Query
+
+from app.api import deps
+from app.metrics.slow_queries import slow_query_log
+from app.models.user import User
+from app.schemas.slow_query import SlowQuery
+
+router = APIRouter()
+
+@router.get("/", response_model=List[SlowQuery])
+def read_slow_queries(
+    limit: int = Query(100, ge=1, le=1000),
+    current_user: User = Depends(deps.get_current_admin),
+) -> Any:
+    """
+    Recent statements slower than SLOW_QUERY_SECONDS in this process, newest first.
+    """
+    return slow_query_log.list()[:limit]
+
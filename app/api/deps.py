@@ -1,17 +1,18 @@
 
 from typing import Generator, Optional
 
-from fastapi import Depends, HTTPException, status
+from fastapi import BackgroundTasks, Depends, HTTPException, status
 from fastapi.security import OAuth2PasswordBearer
 from jose import jwt
 from pydantic import ValidationError
 from sqlalchemy.orm import Session
 
-from app.db.session import get_db
+from app.db.session import SessionLocal, get_db
 from app.models.user import User, UserRole
 from app.core import security
 from app.core.config import settings
 from app.crud.crud_user import user
+from app.jobs.runner import JobQueue
 from app.schemas.token import TokenPayload
 
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl=f"{settings.API_V1_STR}/login/access-token")
@@ -66,3 +67,8 @@ def get_current_instructor(
             detail="Not an instructor"
         )
     return current_user
+
+def get_job_queue(
+    background_tasks: BackgroundTasks, db: Session = Depends(get_db)
+) -> JobQueue:
+    return JobQueue(db, background_tasks, session_factory=SessionLocal)
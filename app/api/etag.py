@@ -0,0 +1,23 @@
+
+import hashlib
+from typing import Any
+
+from fastapi import Request, Response
+
+# Per-user responses: caches may keep them but must revalidate every time
+REVALIDATE = "private, no-cache"
+
+def make_etag(*parts: Any) -> str:
+    """Strong ETag from the parts that determine a response"""
+    digest = hashlib.sha1(repr(parts).encode()).hexdigest()[:20]
+    return f'"{digest}"'
+
+def not_modified(request: Request, etag: str) -> bool:
+    """Whether the request's If-None-Match matches"""
+    if_none_match = request.headers.get("if-none-match")
+    if if_none_match is None:
+        return False
+    return if_none_match.strip() == "*" or etag in [tag.strip() for tag in if_none_match.split(",")]
+
+def not_modified_response(etag: str) -> Response:
+    return Response(status_code=304, headers={"ETag": etag, "Cache-Control": REVALIDATE})
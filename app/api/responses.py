@@ -0,0 +1,47 @@
+
+from typing import Any, Dict, List, Optional, Type
+
+import orjson
+from fastapi import HTTPException
+from fastapi.responses import Response
+from pydantic import BaseModel
+
+def _plain(schema: Type[BaseModel], obj: Any) -> Dict[str, Any]:
+    if isinstance(obj, dict):
+        return obj
+    return {name: getattr(obj, name) for name in schema.model_fields}
+
+def dump_json(schema: Type[BaseModel], obj: Any, *, many: bool = True) -> bytes:
+    """
+    JSON bytes of `schema` for rows read from the database, encoded by orjson
+    with no validation. Dicts must already hold exactly the schema's fields
+    and are written as they are; other objects are read attribute by attribute.
+    """
+    if many:
+        return orjson.dumps([_plain(schema, item) for item in obj])
+    return orjson.dumps(_plain(schema, obj))
+
+def trusted_response(schema: Type[BaseModel], obj: Any, *, many: bool = True, **kwargs: Any) -> Response:
+    """
+    Response for output the API built itself from the database. FastAPI would
+    validate the return value against response_model, convert it to plain
+    Python and then encode it; returning a ready Response skips all of that.
+    Endpoints keep response_model so the OpenAPI schema stays the same.
+    """
+    return Response(content=dump_json(schema, obj, many=many), media_type="application/json", **kwargs)
+
+def parse_fields(fields: Optional[str], schema: Type[BaseModel]) -> List[str]:
+    """
+    The response fields asked for with `?fields=a,b,c`, in the schema's order;
+    all of them when the parameter is absent.
+    """
+    if not fields:
+        return list(schema.model_fields)
+    requested = {name.strip() for name in fields.split(",") if name.strip()}
+    unknown = requested - set(schema.model_fields)
+    if unknown or not requested:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Unknown fields: {', '.join(sorted(unknown))}" if unknown else "No fields requested"
+        )
+    return [name for name in schema.model_fields if name in requested]
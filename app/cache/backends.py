@@ -0,0 +1,106 @@
+
+import threading
+import time
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+from typing import Any, Dict, Iterable, NamedTuple, Optional, Set, Tuple
+
+# Returned by `get` on a miss, so a stored None is not mistaken for one
+MISSING = object()
+
+
+class CacheBackend(ABC):
+    """
+    Storage behind a Cache. A shared backend (Redis or anything speaking its
+    protocol) can implement this with a key per entry and a set per tag:
+    `set` adds the key to each tag's set, `invalidate` deletes the keys in
+    the sets and then the sets. Keys are strings, values must be picklable.
+    """
+
+    @abstractmethod
+    def get(self, key: str) -> Any:
+        """The stored value, or MISSING"""
+
+    @abstractmethod
+    def set(self, key: str, value: Any, *, tags: Iterable[str], ttl: Optional[float]) -> None:
+        pass
+
+    @abstractmethod
+    def invalidate(self, tags: Iterable[str]) -> int:
+        """Drop every entry carrying any of the tags; returns how many were dropped"""
+
+    @abstractmethod
+    def clear(self) -> None:
+        pass
+
+    @abstractmethod
+    def __len__(self) -> int:
+        pass
+
+
+class _Entry(NamedTuple):
+    value: Any
+    tags: Tuple[str, ...]
+    # time.monotonic() deadline, None for no expiry
+    expires_at: Optional[float]
+
+
+class MemoryBackend(CacheBackend):
+    """Per-process LRU with an optional time to live and a tag -> keys index"""
+
+    def __init__(self, *, max_entries: int = 1024) -> None:
+        self.max_entries = max_entries
+        self._lock = threading.Lock()
+        self._entries: "OrderedDict[str, _Entry]" = OrderedDict()
+        self._keys_by_tag: Dict[str, Set[str]] = {}
+
+    def get(self, key: str) -> Any:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return MISSING
+            if entry.expires_at is not None and entry.expires_at <= time.monotonic():
+                self._discard(key)
+                return MISSING
+            self._entries.move_to_end(key)
+            return entry.value
+
+    def set(self, key: str, value: Any, *, tags: Iterable[str], ttl: Optional[float]) -> None:
+        tags = tuple(tags)
+        expires_at = time.monotonic() + ttl if ttl else None
+        with self._lock:
+            self._discard(key)
+            self._entries[key] = _Entry(value, tags, expires_at)
+            for tag in tags:
+                self._keys_by_tag.setdefault(tag, set()).add(key)
+            while len(self._entries) > self.max_entries:
+                self._discard(next(iter(self._entries)))
+
+    def invalidate(self, tags: Iterable[str]) -> int:
+        dropped = 0
+        with self._lock:
+            for tag in tags:
+                for key in self._keys_by_tag.pop(tag, ()):
+                    if self._discard(key):
+                        dropped += 1
+        return dropped
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self._keys_by_tag.clear()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def _discard(self, key: str) -> bool:
+        entry = self._entries.pop(key, None)
+        if entry is None:
+            return False
+        for tag in entry.tags:
+            keys = self._keys_by_tag.get(tag)
+            if keys is not None:
+                keys.discard(key)
+                if not keys:
+                    del self._keys_by_tag[tag]
+        return True
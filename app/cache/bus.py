@@ -0,0 +1,403 @@
+
+import json
+import logging
+import os
+import select
+import socket
+import threading
+import uuid
+from abc import ABC, abstractmethod
+from typing import Any, Callable, Dict, Iterable, List, Optional, Set, Tuple
+
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+
+from app.cache.core import invalidate_local_tags, subscribe_tags
+from app.core.config import settings
+from app.db import changes
+from app.db.base_class import Base
+from app.db.session import SessionLocal
+from app.models.group import Group
+from app.realtime.occupancy import occupancy_hub
+from app.scheduling.interval_index import interval_index
+from app.scheduling.preference_mask import preference_masks
+
+logger = logging.getLogger(__name__)
+
+# Invalidation bus: tells the other workers (processes, hosts) what this one
+# wrote, so their per-process state follows. Every commit already produces
+# table names (change feed) and entity tags such as "group:12" (cache layer);
+# both go out together, one message per commit, and are applied on receipt as
+# if the write had been local: caches drop the tags, change feed listeners
+# (week grids) see the tables, and remote listeners registered with
+# `on_remote` (scheduling indexes, occupancy streams) catch up. Tables written
+# by bulk statements are marked as such, since their tags are incomplete.
+
+# Identifies this process, so it can skip its own messages
+ORIGIN = uuid.uuid4().hex
+
+# Messages larger than this are replaced by "drop everything" (PostgreSQL caps
+# NOTIFY payloads at 8000 bytes)
+MAX_MESSAGE_BYTES = 7900
+
+RemoteListener = Callable[[Set[str], Set[str], Set[str]], None]
+Deliver = Callable[[bytes], None]
+
+
+class BusBackend(ABC):
+    """Carries opaque messages to the other processes on the bus"""
+
+    @abstractmethod
+    def start(self, deliver: Deliver) -> None:
+        """Begin receiving; `deliver(message)` may be called from any thread"""
+
+    @abstractmethod
+    def publish(self, message: bytes) -> None:
+        pass
+
+    @abstractmethod
+    def stop(self) -> None:
+        pass
+
+
+class MemoryBroker:
+    """Stands in for the network between MemoryBusBackends of one process"""
+
+    def __init__(self) -> None:
+        self.backends: List["MemoryBusBackend"] = []
+
+
+class MemoryBusBackend(BusBackend):
+    def __init__(self, broker: MemoryBroker) -> None:
+        self.broker = broker
+        self._deliver: Optional[Deliver] = None
+
+    def start(self, deliver: Deliver) -> None:
+        self._deliver = deliver
+        self.broker.backends.append(self)
+
+    def publish(self, message: bytes) -> None:
+        for backend in list(self.broker.backends):
+            if backend is not self and backend._deliver is not None:
+                backend._deliver(message)
+
+    def stop(self) -> None:
+        if self in self.broker.backends:
+            self.broker.backends.remove(self)
+
+
+class UnixSocketBusBackend(BusBackend):
+    """
+    Workers on one host, each bound to a datagram socket in a shared directory;
+    publishing sends to every other socket there. No broadcaster process is
+    needed, and sockets left behind by dead workers are removed on first use.
+    """
+
+    def __init__(self, directory: str) -> None:
+        self.directory = directory
+        self.path = os.path.join(directory, f"{os.getpid()}-{ORIGIN[:8]}.sock")
+        self._receiver: Optional[socket.socket] = None
+        self._sender = socket.socket(socket.AF_UNIX, socket.SOCK_DGRAM)
+        # A worker that stopped reading must not block the writer
+        self._sender.setblocking(False)
+
+    def start(self, deliver: Deliver) -> None:
+        os.makedirs(self.directory, mode=0o700, exist_ok=True)
+        self._receiver = socket.socket(socket.AF_UNIX, socket.SOCK_DGRAM)
+        self._receiver.bind(self.path)
+        threading.Thread(
+            target=self._receive, args=(self._receiver, deliver), name="invalidation-bus", daemon=True
+        ).start()
+
+    def _receive(self, receiver: socket.socket, deliver: Deliver) -> None:
+        while True:
+            try:
+                message = receiver.recv(65536)
+            except OSError:
+                # Closed by stop()
+                return
+            deliver(message)
+
+    def publish(self, message: bytes) -> None:
+        try:
+            names = os.listdir(self.directory)
+        except FileNotFoundError:
+            return
+        for name in names:
+            path = os.path.join(self.directory, name)
+            if not name.endswith(".sock") or path == self.path:
+                continue
+            try:
+                self._sender.sendto(message, path)
+            except (ConnectionRefusedError, FileNotFoundError):
+                # Nobody bound to it any more
+                try:
+                    os.unlink(path)
+                except OSError:
+                    pass
+            except OSError as e:
+                logger.warning("Invalidation for %s dropped: %s", path, e)
+
+    def stop(self) -> None:
+        if self._receiver is not None:
+            self._receiver.close()
+            self._receiver = None
+            try:
+                os.unlink(self.path)
+            except OSError:
+                pass
+
+
+class PostgresBusBackend(BusBackend):
+    """
+    LISTEN/NOTIFY on the application database, so workers on any host share
+    the bus without another service. One connection listens, one publishes.
+    """
+
+    def __init__(self, dsn: str, *, channel: str = "cache_invalidation") -> None:
+        self.dsn = dsn
+        self.channel = channel
+        self._publisher: Any = None
+        self._publish_lock = threading.Lock()
+        self._stopping = threading.Event()
+
+    def _connect(self) -> Any:
+        import psycopg2
+        import psycopg2.extensions
+
+        connection = psycopg2.connect(self.dsn)
+        connection.set_isolation_level(psycopg2.extensions.ISOLATION_LEVEL_AUTOCOMMIT)
+        return connection
+
+    def start(self, deliver: Deliver) -> None:
+        self._stopping.clear()
+        threading.Thread(
+            target=self._listen, args=(deliver,), name="invalidation-bus", daemon=True
+        ).start()
+
+    def _listen(self, deliver: Deliver) -> None:
+        connection = None
+        first = True
+        while not self._stopping.is_set():
+            try:
+                if connection is None:
+                    connection = self._connect()
+                    connection.cursor().execute(f'LISTEN "{self.channel}"')
+                    if not first:
+                        # Anything could have been missed while disconnected
+                        deliver(encode(tables=(), tags=(), everything=True, origin="reconnect"))
+                    first = False
+                # Wakes as soon as a notification arrives; the timeout only bounds stop()
+                if select.select([connection], [], [], 1.0)[0]:
+                    connection.poll()
+                    while connection.notifies:
+                        deliver(connection.notifies.pop(0).payload.encode())
+            except Exception:
+                logger.exception("Invalidation bus listener lost its connection")
+                if connection is not None:
+                    try:
+                        connection.close()
+                    except Exception:
+                        pass
+                connection = None
+                self._stopping.wait(1.0)
+        if connection is not None:
+            connection.close()
+
+    def publish(self, message: bytes) -> None:
+        with self._publish_lock:
+            for attempt in range(2):
+                try:
+                    if self._publisher is None or self._publisher.closed:
+                        self._publisher = self._connect()
+                    self._publisher.cursor().execute(
+                        "SELECT pg_notify(%s, %s)", (self.channel, message.decode())
+                    )
+                    return
+                except Exception:
+                    self._publisher = None
+                    if attempt:
+                        logger.exception("Invalidation could not be published")
+
+    def stop(self) -> None:
+        self._stopping.set()
+        with self._publish_lock:
+            if self._publisher is not None:
+                self._publisher.close()
+                self._publisher = None
+
+
+def encode(
+    *, tables: Iterable[str], tags: Iterable[str], bulk_tables: Iterable[str] = (),
+    everything: bool = False, origin: str = ORIGIN
+) -> bytes:
+    message = json.dumps({
+        "origin": origin, "tables": sorted(tables), "tags": sorted(tags),
+        "bulk": sorted(bulk_tables), "all": everything
+    }, separators=(",", ":")).encode()
+    if len(message) > MAX_MESSAGE_BYTES:
+        return encode(tables=(), tags=(), everything=True, origin=origin)
+    return message
+
+
+class InvalidationBus:
+    def __init__(self) -> None:
+        self.backend: Optional[BusBackend] = None
+        self._remote_listeners: List[RemoteListener] = []
+        # Set while a remote message is applied, so it is not published back
+        self._applying = threading.local()
+        # Tables and tags of the commits being dispatched, innermost last
+        self._commits = threading.local()
+        changes.subscribe(self._tables_changed)
+        subscribe_tags(self._tags_changed)
+        # The change feed and the cache layer dispatch a commit from their own
+        # after_commit listeners; bracket them to publish it as one message
+        event.listen(Session, "after_commit", self._begin_commit, insert=True)
+        event.listen(Session, "after_commit", self._end_commit)
+
+    def start(self, backend: Optional[BusBackend]) -> None:
+        self.stop()
+        self.backend = backend
+        if backend is not None:
+            backend.start(self.receive)
+
+    def stop(self) -> None:
+        if self.backend is not None:
+            self.backend.stop()
+            self.backend = None
+
+    def on_remote(self, listener: RemoteListener) -> RemoteListener:
+        """
+        Call `listener(tables, tags, bulk_tables)` for writes made by other
+        processes; usable as a decorator
+        """
+        self._remote_listeners.append(listener)
+        return listener
+
+    def _pending_commits(self) -> List[Tuple[Set[str], Set[str], Set[str]]]:
+        pending = getattr(self._commits, "pending", None)
+        if pending is None:
+            pending = self._commits.pending = []
+        return pending
+
+    def _begin_commit(self, session: Session) -> None:
+        self._pending_commits().append(
+            (set(), set(), set(session.info.get(changes.PENDING_BULK_TABLES, ())))
+        )
+
+    def _end_commit(self, session: Session) -> None:
+        pending = self._pending_commits()
+        if pending:
+            tables, tags, bulk_tables = pending.pop()
+            if tables or tags:
+                self._publish(tables=tables, tags=tags, bulk_tables=bulk_tables)
+
+    def _tables_changed(self, tables: Set[str]) -> None:
+        pending = self._pending_commits()
+        if pending:
+            pending[-1][0].update(tables)
+        else:
+            # Raw writes notify the feed themselves; which rows they touched is unknown
+            self._publish(tables=tables, bulk_tables=tables)
+
+    def _tags_changed(self, tags: Iterable[str]) -> None:
+        pending = self._pending_commits()
+        if pending:
+            pending[-1][1].update(tags)
+        else:
+            self._publish(tags=tags)
+
+    def _publish(
+        self, *, tables: Iterable[str] = (), tags: Iterable[str] = (), bulk_tables: Iterable[str] = ()
+    ) -> None:
+        backend = self.backend
+        if backend is None or getattr(self._applying, "active", False):
+            return
+        try:
+            backend.publish(encode(tables=tables, tags=tags, bulk_tables=bulk_tables))
+        except Exception:
+            # Other workers go stale until their TTLs run out, but this write stands
+            logger.exception("Invalidation could not be published")
+
+    def receive(self, message: bytes) -> None:
+        try:
+            data: Dict[str, Any] = json.loads(message)
+        except ValueError:
+            logger.warning("Malformed invalidation message: %r", message[:200])
+            return
+        if data.get("origin") == ORIGIN:
+            return
+        tags = set(data.get("tags") or ())
+        tables = set(data.get("tables") or ())
+        bulk_tables = set(data.get("bulk") or ())
+        if data.get("all"):
+            tables = bulk_tables = set(Base.metadata.tables)
+        self._applying.active = True
+        try:
+            if data.get("all"):
+                from app.cache.core import caches
+                for cache in list(caches.values()):
+                    cache.clear()
+            invalidate_local_tags(tags)
+            changes.notify(tables)
+            for listener in list(self._remote_listeners):
+                try:
+                    listener(tables, tags, bulk_tables)
+                except Exception:
+                    logger.exception("Remote invalidation listener %r failed", listener)
+        finally:
+            self._applying.active = False
+
+
+def make_backend(name: str) -> Optional[BusBackend]:
+    if not name:
+        return None
+    if name == "memory":
+        return MemoryBusBackend(MemoryBroker())
+    if name == "unix":
+        return UnixSocketBusBackend(settings.INVALIDATION_BUS_SOCKET_DIR)
+    if name == "postgres":
+        return PostgresBusBackend(settings.DATABASE_URI)
+    raise ValueError(f"Unknown invalidation bus: {name}")
+
+
+invalidation_bus = InvalidationBus()
+
+
+# Per-process state that local writers update incrementally rather than through
+# the change feed, so remote writes must reset it explicitly
+
+def _group_ids(tags: Set[str]) -> List[int]:
+    return [int(tag[6:]) for tag in tags if tag.startswith("group:") and tag[6:].isdigit()]
+
+@invalidation_bus.on_remote
+def _reset_scheduling(tables: Set[str], tags: Set[str], bulk_tables: Set[str]) -> None:
+    if "groups" in bulk_tables:
+        interval_index.invalidate()
+    elif "groups" in tables and interval_index.loaded:
+        # Every group written through the ORM carries its "group:N" tag
+        group_ids = _group_ids(tags)
+        db = SessionLocal()
+        try:
+            groups = db.query(Group).filter(Group.id.in_(group_ids)).all()
+        finally:
+            db.close()
+        for group in groups:
+            interval_index.sync_group(group)
+        for group_id in set(group_ids) - {group.id for group in groups}:
+            interval_index.discard(group_id)
+    if "instructor_preferences" in tables:
+        preference_masks.invalidate()
+
+@invalidation_bus.on_remote
+def _publish_occupancy(tables: Set[str], tags: Set[str], bulk_tables: Set[str]) -> None:
+    if not occupancy_hub.subscriber_count() or not tables & {"groups", "registrations"}:
+        return
+    group_ids = _group_ids(tags)
+    if not group_ids or not occupancy_hub.watched(group_ids):
+        return
+    db = SessionLocal()
+    try:
+        occupancy_hub.publish(db, group_ids=group_ids)
+    finally:
+        db.close()
@@ -0,0 +1,186 @@
+
+import functools
+import inspect
+import threading
+from typing import Any, Callable, Dict, Iterable, List, NamedTuple, Optional, Sequence, Set, Type
+
+from sqlalchemy import event
+from sqlalchemy import inspect as sa_inspect
+from sqlalchemy.orm import Session
+
+from app.cache.backends import MISSING, CacheBackend, MemoryBackend
+from app.core.config import settings
+from app.db import changes
+
+# Read-through caches for CRUD reads. Entries carry tags naming what they were
+# read from: an entity ("group:12", "instructor:3") or a whole table ("users").
+# Entity tags are invalidated after the commit of any ORM write to a tagged
+# object (see register_tags); table tags by the change feed, which also sees
+# bulk statements.
+
+TagFunction = Callable[[Any], Iterable[str]]
+
+# Session.info key holding the entity tags written in the current transaction
+PENDING_TAGS = "cache_tags"
+
+caches: Dict[str, "Cache"] = {}
+_tag_functions: Dict[Type[Any], TagFunction] = {}
+_tag_listeners: List[Callable[[Set[str]], None]] = []
+
+
+class CacheStats(NamedTuple):
+    name: str
+    entries: int
+    hits: int
+    misses: int
+    invalidations: int
+
+
+class Cache:
+    def __init__(
+        self, name: str, *, backend: Optional[CacheBackend] = None, ttl: Optional[float] = None
+    ) -> None:
+        self.name = name
+        self.backend = backend or MemoryBackend(max_entries=settings.CACHE_MAX_ENTRIES)
+        self.ttl = settings.CACHE_TTL_SECONDS if ttl is None else ttl
+        self._lock = threading.Lock()
+        # Bumped on invalidation, so a value loaded before a change is not stored
+        self._generation = 0
+        self.hits = 0
+        self.misses = 0
+        self.invalidations = 0
+        caches[name] = self
+
+    def get_or_load(self, key: str, load: Callable[[], Any], *, tags: Iterable[str]) -> Any:
+        value = self.backend.get(key)
+        if value is not MISSING:
+            with self._lock:
+                self.hits += 1
+            return value
+        with self._lock:
+            self.misses += 1
+            generation = self._generation
+        value = load()
+        with self._lock:
+            # "Not found" is not kept: rows can appear through bulk inserts that carry no entity tags
+            if value is not None and generation == self._generation:
+                self.backend.set(key, value, tags=tags, ttl=self.ttl)
+        return value
+
+    def invalidate(self, tags: Iterable[str]) -> None:
+        with self._lock:
+            self._generation += 1
+        dropped = self.backend.invalidate(tags)
+        with self._lock:
+            self.invalidations += dropped
+
+    def clear(self) -> None:
+        with self._lock:
+            self._generation += 1
+        self.backend.clear()
+
+    def stats(self) -> CacheStats:
+        return CacheStats(self.name, len(self.backend), self.hits, self.misses, self.invalidations)
+
+
+def invalidate_tags(tags: Iterable[str]) -> None:
+    """Invalidate the tags in this process's caches and pass them on to the tag listeners"""
+    tags = set(tags)
+    if tags:
+        invalidate_local_tags(tags)
+        for listener in list(_tag_listeners):
+            listener(tags)
+
+def invalidate_local_tags(tags: Iterable[str]) -> None:
+    tags = set(tags)
+    if tags:
+        for cache in list(caches.values()):
+            cache.invalidate(tags)
+
+def subscribe_tags(listener: Callable[[Set[str]], None]) -> None:
+    """Call `listener(tags)` after every invalidate_tags, e.g. to tell other processes"""
+    _tag_listeners.append(listener)
+
+def configure(backend_factory: Callable[[str], CacheBackend]) -> None:
+    """Move every cache onto a backend made by `backend_factory(cache_name)`"""
+    for cache in list(caches.values()):
+        cache.clear()
+        cache.backend = backend_factory(cache.name)
+
+def detached_copy(value: Any) -> Any:
+    """
+    Copy ORM instances (or lists of them) into new instances holding only their
+    column values, attached to no session, so they can outlive the session that
+    loaded them. Cached copies are shared: callers must treat them as read-only.
+    """
+    if isinstance(value, list):
+        return [detached_copy(item) for item in value]
+    mapper = getattr(type(value), "__mapper__", None)
+    if mapper is None:
+        return value
+    return type(value)(**{attr.key: getattr(value, attr.key) for attr in mapper.column_attrs})
+
+def cached(
+    cache: Cache, *, key: str, tags: Sequence[str] = (), detach: bool = False
+) -> Callable[[Callable[..., Any]], Callable[..., Any]]:
+    """
+    Read-through caching for a CRUD read method. `key` and `tags` are format
+    strings over the method's arguments, e.g. key="{instructor_id}" and
+    tags=["instructor:{instructor_id}"]. With `detach`, ORM results are stored
+    as detached_copy copies.
+    """
+    def decorator(method: Callable[..., Any]) -> Callable[..., Any]:
+        signature = inspect.signature(method)
+
+        @functools.wraps(method)
+        def wrapper(*args: Any, **kwargs: Any) -> Any:
+            arguments = signature.bind(*args, **kwargs)
+            arguments.apply_defaults()
+            values = arguments.arguments
+
+            def load() -> Any:
+                value = method(*args, **kwargs)
+                return detached_copy(value) if detach else value
+
+            return cache.get_or_load(
+                f"{method.__qualname__}:{key.format(**values)}", load,
+                tags=[tag.format(**values) for tag in tags]
+            )
+        return wrapper
+    return decorator
+
+def register_tags(model: Type[Any], tag_function: TagFunction) -> None:
+    """Tags to invalidate when an instance of `model` is inserted, updated or deleted"""
+    _tag_functions[model] = tag_function
+
+def loaded_values(obj: Any, name: str) -> List[Any]:
+    """
+    Current and, for a pending change, previous values of an attribute, read
+    without loading anything (deleted rows can no longer be loaded).
+    """
+    history = sa_inspect(obj).attrs[name].history
+    return list(dict.fromkeys(
+        value for value in (*history.added, *history.unchanged, *history.deleted) if value is not None
+    ))
+
+
+@event.listens_for(Session, "after_flush")
+def _collect_tags(session: Session, flush_context) -> None:
+    tags: Set[str] = set()
+    for obj in (*session.new, *session.dirty, *session.deleted):
+        tag_function = _tag_functions.get(type(obj))
+        if tag_function is not None:
+            tags.update(tag_function(obj))
+    if tags:
+        session.info.setdefault(PENDING_TAGS, set()).update(tags)
+
+@event.listens_for(Session, "after_commit")
+def _dispatch(session: Session) -> None:
+    invalidate_tags(session.info.pop(PENDING_TAGS, ()))
+
+@event.listens_for(Session, "after_rollback")
+def _discard(session: Session) -> None:
+    session.info.pop(PENDING_TAGS, None)
+
+# Table tags; the change feed reaches other processes by itself (see app.cache.bus)
+changes.subscribe(invalidate_local_tags)
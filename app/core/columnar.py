@@ -0,0 +1,97 @@
+
+import enum
+import importlib.util
+from typing import Any, Callable, Iterable, Iterator, List, Optional, Sequence, Tuple
+
+from sqlalchemy import types
+
+# pyarrow is optional: it is only imported once an export is requested
+FORMATS = {
+    "arrow": "application/vnd.apache.arrow.stream",
+    "parquet": "application/vnd.apache.parquet",
+}
+
+Column = Tuple[str, types.TypeEngine]
+
+def is_available() -> bool:
+    return importlib.util.find_spec("pyarrow") is not None
+
+def _arrow_type(pa: Any, sql_type: types.TypeEngine) -> Any:
+    if isinstance(sql_type, types.Boolean):
+        return pa.bool_()
+    if isinstance(sql_type, types.Integer):
+        return pa.int64()
+    if isinstance(sql_type, (types.Float, types.Numeric)):
+        return pa.float64()
+    if isinstance(sql_type, types.DateTime):
+        return pa.timestamp("us", tz="UTC" if sql_type.timezone else None)
+    if isinstance(sql_type, types.Enum):
+        # Few distinct values, so dictionary-encode them
+        return pa.dictionary(pa.int8(), pa.string())
+    return pa.string()
+
+def _converter(sql_type: types.TypeEngine) -> Optional[Callable[[Any], Any]]:
+    """Per-value conversion for types pyarrow cannot take as they come from the driver"""
+    if isinstance(sql_type, types.Enum):
+        return lambda value: value.value if isinstance(value, enum.Enum) else value
+    return None
+
+
+class _ChunkSink:
+    """Write-only file object collecting what the writer produced since the last drain"""
+
+    def __init__(self) -> None:
+        self._chunks: List[bytes] = []
+        self._position = 0
+        self.closed = False
+
+    def write(self, data: Any) -> int:
+        data = bytes(data)
+        self._chunks.append(data)
+        self._position += len(data)
+        return len(data)
+
+    def tell(self) -> int:
+        return self._position
+
+    def flush(self) -> None:
+        pass
+
+    def close(self) -> None:
+        self.closed = True
+
+    def drain(self) -> bytes:
+        data = b"".join(self._chunks)
+        self._chunks = []
+        return data
+
+
+def stream(columns: Sequence[Column], batches: Iterable[List[tuple]], *, format: str) -> Iterator[bytes]:
+    """
+    Encode row batches as an Arrow IPC stream or a Parquet file, yielding the
+    bytes after every batch so only one batch is held in memory at a time.
+    """
+    import pyarrow as pa
+
+    schema = pa.schema([(name, _arrow_type(pa, sql_type)) for name, sql_type in columns])
+    converters = [_converter(sql_type) for _, sql_type in columns]
+    sink = _ChunkSink()
+    if format == "parquet":
+        import pyarrow.parquet as pq
+        writer = pq.ParquetWriter(sink, schema, compression="zstd")
+    else:
+        writer = pa.ipc.new_stream(sink, schema)
+
+    with writer:
+        for rows in batches:
+            arrays = []
+            for values, convert, field in zip(zip(*rows), converters, schema):
+                if convert is not None:
+                    values = [convert(value) for value in values]
+                arrays.append(pa.array(values, type=field.type))
+            writer.write_batch(pa.RecordBatch.from_arrays(arrays, schema=schema))
+            chunk = sink.drain()
+            if chunk:
+                yield chunk
+    # Closing writes the end-of-stream marker or the Parquet footer
+    yield sink.drain()
@@ -24,6 +24,46 @@ class Settings(BaseSettings):
     INSTRUCTOR_MIN_HOURS_PER_WEEK: int = 20
     INSTRUCTOR_MAX_HOURS_PER_WEEK: int = 40
     
+    # Read-through caches of CRUD reads (entries per cache, seconds to live; 0 = no expiry)
+    CACHE_MAX_ENTRIES: int = 1024
+    CACHE_TTL_SECONDS: int = 300
+    
+    # Profiles of admin requests sent with "X-Profile: 1" kept per process
+    PROFILE_HISTORY: int = 20
+    
+    # Statements slower than this (seconds; 0 = off) are logged and explained.
+    # ANALYZE runs the slow SELECTs once more to get real row counts and timings
+    SLOW_QUERY_SECONDS: float = 0.5
+    SLOW_QUERY_EXPLAIN_ANALYZE: bool = False
+    SLOW_QUERY_HISTORY: int = 100
+    
+    # Request tracing: exporter "" (off), "otlp" (OTLP/JSON over HTTP to a collector)
+    # or "file" (OTLP/JSON lines); share of requests traced unless the caller decided
+    TRACING_EXPORTER: str = ""
+    TRACING_SAMPLE_RATE: float = 1.0
+    TRACING_OTLP_ENDPOINT: str = "http://localhost:4318/v1/traces"
+    TRACING_FILE: str = "traces.jsonl"
+    TRACING_SERVICE_NAME: str = "pool-scheduler"
+    
+    # Pooled connections opened at startup, so the first requests do not wait for them
+    WARMUP_POOL_CONNECTIONS: int = 5
+    
+    # Background jobs: worker poll interval, claim lease and first retry delay (seconds).
+    # JOBS_RUN_INLINE runs enqueued jobs in the API process after the response
+    # instead, for deployments without a worker.
+    JOB_POLL_SECONDS: float = 1.0
+    JOB_LEASE_SECONDS: int = 600
+    JOB_RETRY_DELAY_SECONDS: int = 30
+    JOBS_RUN_INLINE: bool = False
+    # Where jobs write files (exports)
+    JOB_OUTPUT_DIR: str = "job_output"
+    
+    # Invalidation bus keeping the caches of several workers in step: "" (off),
+    # "postgres" (LISTEN/NOTIFY), "unix" (datagram sockets in the directory below,
+    # for workers on one host) or "memory" (one process, for tests)
+    INVALIDATION_BUS: str = ""
+    INVALIDATION_BUS_SOCKET_DIR: str = "/tmp/pool-scheduler-bus"
+    
     class Config:
         case_sensitive = True
 
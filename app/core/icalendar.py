@@ -0,0 +1,72 @@
+
+from datetime import datetime, timezone
+from typing import Iterable, List, Optional
+
+# Content lines longer than this many octets are folded (RFC 5545, 3.1)
+MAX_LINE_OCTETS = 75
+
+def escape_text(value: str) -> str:
+    """Escape a TEXT property value (RFC 5545, 3.3.11)"""
+    return (
+        value.replace("\\", "\\\\").replace(";", "\\;").replace(",", "\\,")
+        .replace("\r\n", "\\n").replace("\n", "\\n")
+    )
+
+def fold(line: str) -> str:
+    """Split a content line into chunks of at most 75 octets, without cutting a UTF-8 sequence"""
+    encoded = line.encode()
+    if len(encoded) <= MAX_LINE_OCTETS:
+        return line
+    chunks = []
+    limit = MAX_LINE_OCTETS
+    while encoded:
+        cut = min(limit, len(encoded))
+        # Step back off UTF-8 continuation bytes
+        while cut < len(encoded) and encoded[cut] & 0xC0 == 0x80:
+            cut -= 1
+        chunks.append(encoded[:cut].decode())
+        encoded = encoded[cut:]
+        # Continuation lines start with a space, which counts towards the limit
+        limit = MAX_LINE_OCTETS - 1
+    return "\r\n ".join(chunks)
+
+def format_local(moment: datetime) -> str:
+    """DATE-TIME in floating form: group times are stored as local wall-clock time"""
+    return moment.strftime("%Y%m%dT%H%M%S")
+
+def format_utc(moment: datetime) -> str:
+    if moment.tzinfo is not None:
+        moment = moment.astimezone(timezone.utc)
+    return moment.strftime("%Y%m%dT%H%M%SZ")
+
+def event(
+    *, uid: str, start: datetime, end: datetime, summary: str, stamp: datetime,
+    description: Optional[str] = None
+) -> List[str]:
+    lines = [
+        "BEGIN:VEVENT",
+        f"UID:{uid}",
+        f"DTSTAMP:{format_utc(stamp)}",
+        f"DTSTART:{format_local(start)}",
+        f"DTEND:{format_local(end)}",
+        f"SUMMARY:{escape_text(summary)}",
+    ]
+    if description:
+        lines.append(f"DESCRIPTION:{escape_text(description)}")
+    lines.append("END:VEVENT")
+    return lines
+
+def calendar(name: str, events: Iterable[List[str]]) -> str:
+    """A VCALENDAR object with CRLF line endings"""
+    lines = [
+        "BEGIN:VCALENDAR",
+        "VERSION:2.0",
+        "PRODID:-//Pool Time Scheduler//Calendar Feed//EN",
+        "CALSCALE:GREGORIAN",
+        "METHOD:PUBLISH",
+        f"X-WR-CALNAME:{escape_text(name)}",
+    ]
+    for event_lines in events:
+        lines.extend(event_lines)
+    lines.append("END:VCALENDAR")
+    return "\r\n".join(fold(line) for line in lines) + "\r\n"
@@ -1,6 +1,8 @@
 
+import hashlib
+import hmac
 from datetime import datetime, timedelta
-from typing import Optional, Union, Any
+from typing import Optional, Tuple, Union, Any
 from jose import jwt
 from passlib.context import CryptContext
 
@@ -23,3 +25,26 @@ def verify_password(plain_password: str, hashed_password: str) -> bool:
 
 def get_password_hash(password: str) -> str:
     return pwd_context.hash(password)
+
+def _calendar_signature(user_id: int, role: str) -> str:
+    message = f"calendar:{user_id}:{role}".encode()
+    return hmac.new(settings.SECRET_KEY.encode(), message, hashlib.sha256).hexdigest()[:32]
+
+def create_calendar_token(user_id: int, role: str) -> str:
+    """
+    Long-lived token for a user's calendar feed URL. It is stateless: it carries
+    the user id and role, signed with the secret key, so validating it needs no
+    database access. Rotating SECRET_KEY revokes all feed URLs.
+    """
+    return f"{user_id}-{role}-{_calendar_signature(user_id, role)}"
+
+def verify_calendar_token(token: str) -> Optional[Tuple[int, str]]:
+    """(user_id, role) of a valid calendar token, None otherwise"""
+    try:
+        user_id, role, signature = token.split("-")
+        user_id = int(user_id)
+    except ValueError:
+        return None
+    if not hmac.compare_digest(signature, _calendar_signature(user_id, role)):
+        return None
+    return user_id, role
@@ -0,0 +1,81 @@
+
+import logging
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from typing import Any, Callable, Dict, List, Optional
+
+from sqlalchemy.engine import Engine
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.core.security import pwd_context
+from app.crud.crud_calendar import calendar_feed
+from app.crud.crud_group import group
+from app.crud.crud_user import user
+from app.crud.crud_week_hours import week_start_of
+from app.db.changes import table_versions
+from app.models.user import Gender, UserRole
+from app.scheduling.interval_index import interval_index
+from app.scheduling.preference_mask import preference_masks
+
+logger = logging.getLogger(__name__)
+
+# Startup work that would otherwise land on the first requests of a new worker.
+# Each step is timed and logged; a failing step is logged and skipped, since a
+# worker that starts a little slow is better than one that does not start.
+
+def open_pool_connections(bind: Any, count: int) -> int:
+    """Open `count` pooled connections in parallel and hand them back to the pool"""
+    if not isinstance(bind, Engine) or count <= 0:
+        # Sessions bound to a single connection (tests) have no pool to fill
+        return 0
+
+    def connect(_: int) -> None:
+        with bind.connect() as connection:
+            connection.exec_driver_sql("SELECT 1")
+
+    with ThreadPoolExecutor(max_workers=count) as executor:
+        list(executor.map(connect, range(count)))
+    return count
+
+def prime_password_hashing() -> None:
+    """Load and self-test the bcrypt backend, which passlib otherwise does on the first login"""
+    pwd_context.handler("bcrypt").get_backend()
+
+def warm_caches(db: Session) -> None:
+    interval_index.load(db)
+    preference_masks.load(db)
+    user.get_instructors(db)
+    group.get_upcoming_boundary(db, groups_version=table_versions.get(db, "groups")[0])
+    # This week as drawn for visitors of either gender and for staff
+    week_start = week_start_of(datetime.now())
+    for role, gender in (
+        (UserRole.VISITOR.value, Gender.MALE.value),
+        (UserRole.VISITOR.value, Gender.FEMALE.value),
+        (UserRole.ADMIN.value, None),
+    ):
+        calendar_feed.get_week_grid(db, week_start=week_start, role=role, gender=gender)
+
+def run(db: Session, *, extra: Optional[Dict[str, Callable[[], Any]]] = None) -> Dict[str, float]:
+    """Run every warm-up step; returns the seconds each took"""
+    steps: Dict[str, Callable[[], Any]] = {
+        "pool": lambda: open_pool_connections(db.get_bind(), settings.WARMUP_POOL_CONNECTIONS),
+        "bcrypt": prime_password_hashing,
+        "caches": lambda: warm_caches(db),
+        **(extra or {}),
+    }
+    timings: Dict[str, float] = {}
+    for name, step in steps.items():
+        started = time.perf_counter()
+        try:
+            step()
+        except Exception:
+            logger.exception("Warm-up step %s failed", name)
+            db.rollback()
+        timings[name] = time.perf_counter() - started
+    logger.info(
+        "Warm-up done in %.3fs (%s)", sum(timings.values()),
+        ", ".join(f"{name} {seconds:.3f}s" for name, seconds in timings.items())
+    )
+    return timings
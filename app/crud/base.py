@@ -1,15 +1,19 @@
 
-from typing import Any, Dict, Generic, List, Optional, Type, TypeVar, Union
+import re
+from typing import Any, Dict, Generic, Iterable, List, Optional, Sequence, Type, TypeVar, Union
 from fastapi.encoders import jsonable_encoder
 from pydantic import BaseModel
 from sqlalchemy.orm import Session
 
+from app.cache.core import loaded_values, register_tags
 from app.db.base_class import Base
+from app.metrics.tracing import traced_methods
 
 ModelType = TypeVar("ModelType", bound=Base)
 CreateSchemaType = TypeVar("CreateSchemaType", bound=BaseModel)
 UpdateSchemaType = TypeVar("UpdateSchemaType", bound=BaseModel)
 
+@traced_methods
 class CRUDBase(Generic[ModelType, CreateSchemaType, UpdateSchemaType]):
     def __init__(self, model: Type[ModelType]):
         """
@@ -21,6 +25,13 @@ class CRUDBase(Generic[ModelType, CreateSchemaType, UpdateSchemaType]):
         * `schema`: A Pydantic model (schema) class
         """
         self.model = model
+        # Prefix of this model's entity cache tags, e.g. "group" or "instructor_preference"
+        self.cache_tag = re.sub(r"(?<!^)(?=[A-Z])", "_", model.__name__).lower()
+        register_tags(model, self.cache_tags)
+
+    def cache_tags(self, obj: ModelType) -> List[str]:
+        """Tags of the cache entries made stale by writing `obj`"""
+        return [f"{self.cache_tag}:{id}" for id in loaded_values(obj, "id")]
 
     def get(self, db: Session, id: Any) -> Optional[ModelType]:
         return db.query(self.model).filter(self.model.id == id).first()
@@ -30,6 +41,22 @@ class CRUDBase(Generic[ModelType, CreateSchemaType, UpdateSchemaType]):
     ) -> List[ModelType]:
         return db.query(self.model).offset(skip).limit(limit).all()
 
+    def get_fields(
+        self, db: Session, *, fields: Sequence[str], filters: Iterable[Any] = (),
+        order_by: Iterable[Any] = (), skip: int = 0, limit: int = 100
+    ) -> List[Dict[str, Any]]:
+        """
+        Only the named fields of the matching rows, selected as columns
+        without building ORM objects.
+        """
+        query = db.query(*[self.field_expression(name).label(name) for name in fields])
+        query = query.filter(*filters).order_by(*order_by).offset(skip).limit(limit)
+        return [dict(row._mapping) for row in query.all()]
+
+    def field_expression(self, name: str) -> Any:
+        """SQL expression for a response field"""
+        return getattr(self.model, name)
+
     def create(self, db: Session, *, obj_in: CreateSchemaType) -> ModelType:
         obj_in_data = jsonable_encoder(obj_in)
         db_obj = self.model(**obj_in_data)
@@ -49,7 +76,7 @@ class CRUDBase(Generic[ModelType, CreateSchemaType, UpdateSchemaType]):
         if isinstance(obj_in, dict):
             update_data = obj_in
         else:
-            update_data = obj_in.dict(exclude_unset=True)
+            update_data = obj_in.model_dump(exclude_unset=True)
         for field in obj_data:
             if field in update_data:
                 setattr(db_obj, field, update_data[field])
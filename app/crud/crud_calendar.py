@@ -0,0 +1,202 @@
+
+import threading
+from collections import OrderedDict
+from datetime import date, datetime, time, timedelta, timezone
+from time import monotonic
+from typing import Any, Dict, List, NamedTuple, Optional, Set, Tuple
+
+from sqlalchemy import case, func
+from sqlalchemy.orm import Query, Session
+
+from app.core.config import settings
+from app.db import changes
+from app.metrics.tracing import traced_methods
+from app.models.group import Group
+from app.models.registration import Registration
+from app.models.user import Gender, User, UserRole
+
+# How far back feeds reach; older sessions drop out of the calendar
+FEED_HISTORY = timedelta(days=90)
+
+# Number of (week, role, gender) grids kept
+WEEK_GRID_CACHE_SIZE = 64
+
+# Writes to these tables can change a cached grid
+WEEK_GRID_TABLES = {"groups", "registrations", "users"}
+
+GridKey = Tuple[date, str, Optional[str]]
+# monotonic() deadline, None for no expiry, and the grid
+GridEntry = Tuple[Optional[float], Dict[str, Any]]
+
+class FeedVersion(NamedTuple):
+    count: int
+    last_modified: Optional[datetime]
+
+
+@traced_methods
+class CRUDCalendar:
+    """
+    Groups shown in a user's calendar feed: the groups an instructor teaches,
+    or the groups a visitor (or anyone else) is registered for.
+    """
+
+    def __init__(self) -> None:
+        self._grid_lock = threading.Lock()
+        self._grids: "OrderedDict[GridKey, GridEntry]" = OrderedDict()
+        # Bumped on invalidation, so a grid built from data read before a change is not stored
+        self._generation = 0
+        changes.subscribe(self._on_change)
+
+    def _feed_query(self, db: Session, query: Query, *, user_id: int, role: str) -> Query:
+        since = datetime.now() - FEED_HISTORY
+        if role == UserRole.INSTRUCTOR.value:
+            query = query.join(User, User.id == Group.instructor_id).filter(Group.instructor_id == user_id)
+        else:
+            query = query.join(Registration, Registration.group_id == Group.id).join(
+                User, User.id == Registration.visitor_id
+            ).filter(Registration.visitor_id == user_id)
+        # Deactivated users get an empty feed
+        return query.filter(User.is_active == True, Group.end_time >= since)
+
+    def get_version(self, db: Session, *, user_id: int, role: str) -> FeedVersion:
+        """
+        Row count and latest change of the feed, in one indexed aggregate query.
+        Registrations count as changes too, so registering or cancelling moves it.
+        """
+        columns = [func.count(Group.id), func.max(Group.updated_at)]
+        if role != UserRole.INSTRUCTOR.value:
+            columns.append(func.max(Registration.updated_at))
+        row = self._feed_query(db, db.query(*columns), user_id=user_id, role=role).one()
+        stamps = [_as_utc(stamp) for stamp in row[1:] if stamp is not None]
+        return FeedVersion(row[0], max(stamps) if stamps else None)
+
+    def get_groups(self, db: Session, *, user_id: int, role: str) -> List[Group]:
+        return self._feed_query(
+            db, db.query(Group), user_id=user_id, role=role
+        ).order_by(Group.start_time).all()
+
+    def get_week_grid(
+        self, db: Session, *, week_start: date, role: str, gender: Optional[str]
+    ) -> Dict[str, Any]:
+        """
+        Everything the week view draws, except the user's own registrations:
+        groups with occupancy and instructor names, and the day-by-hour cells.
+        Built with three queries and cached per (week, role, gender) until a
+        group, registration or user changes. Writes by other workers arrive
+        over the invalidation bus; without one, grids expire after
+        CACHE_TTL_SECONDS like the tagged caches.
+        """
+        key = (week_start, role, gender if role == UserRole.VISITOR.value else None)
+        with self._grid_lock:
+            entry = self._grids.get(key)
+            if entry is not None and (entry[0] is None or entry[0] > monotonic()):
+                self._grids.move_to_end(key)
+                return entry[1]
+            generation = self._generation
+        grid = self._build_week_grid(db, week_start=week_start, role=role, gender=key[2])
+        with self._grid_lock:
+            if generation != self._generation:
+                return grid
+            ttl = settings.CACHE_TTL_SECONDS
+            self._grids[key] = (monotonic() + ttl if ttl else None, grid)
+            self._grids.move_to_end(key)
+            while len(self._grids) > WEEK_GRID_CACHE_SIZE:
+                self._grids.popitem(last=False)
+        return grid
+
+    def get_registered_group_ids(
+        self, db: Session, *, visitor_id: int, start: datetime, end: datetime
+    ) -> List[int]:
+        return [row[0] for row in db.query(Registration.group_id).join(
+            Group, Group.id == Registration.group_id
+        ).filter(
+            Registration.visitor_id == visitor_id,
+            Group.start_time >= start,
+            Group.start_time < end
+        ).all()]
+
+    def _build_week_grid(
+        self, db: Session, *, week_start: date, role: str, gender: Optional[str]
+    ) -> Dict[str, Any]:
+        begin = datetime.combine(week_start, time.min)
+        end = begin + timedelta(days=7)
+        groups = db.query(
+            Group.id, Group.name, Group.start_time, Group.end_time, Group.capacity,
+            Group.max_male, Group.max_female, Group.instructor_id, Group.series_id
+        ).filter(Group.start_time >= begin, Group.start_time < end).order_by(Group.start_time, Group.id).all()
+        if not groups:
+            return {"week_start": week_start, "groups": [], "cells": []}
+        group_ids = [g.id for g in groups]
+
+        counts = {
+            group_id: (total, male, female)
+            for group_id, total, male, female in db.query(
+                Registration.group_id,
+                func.count(Registration.id),
+                func.sum(case((User.gender == Gender.MALE, 1), else_=0)),
+                func.sum(case((User.gender == Gender.FEMALE, 1), else_=0)),
+            ).join(User, User.id == Registration.visitor_id).filter(
+                Registration.group_id.in_(group_ids)
+            ).group_by(Registration.group_id).all()
+        }
+        instructor_ids = {g.instructor_id for g in groups if g.instructor_id is not None}
+        names = dict(db.query(User.id, User.full_name).filter(User.id.in_(instructor_ids)).all()) \
+            if instructor_ids else {}
+
+        staff = role != UserRole.VISITOR.value
+        rows = []
+        cells: Dict[Tuple[int, int], List[int]] = {}
+        for g in groups:
+            total, male, female = counts.get(g.id, (0, 0, 0))
+            spots_left = g.capacity - total
+            if gender == Gender.MALE.value:
+                spots_left = min(spots_left, g.max_male - male)
+            elif gender == Gender.FEMALE.value:
+                spots_left = min(spots_left, g.max_female - female)
+            rows.append({
+                "id": g.id,
+                "name": g.name,
+                "start_time": g.start_time,
+                "end_time": g.end_time,
+                "capacity": g.capacity,
+                "participants": total,
+                "male_participants": male if staff else None,
+                "female_participants": female if staff else None,
+                "spots_left": max(spots_left, 0),
+                "is_full": total >= g.capacity,
+                "instructor_id": g.instructor_id,
+                "instructor_name": names.get(g.instructor_id),
+                "series_id": g.series_id,
+            })
+            # Every hour of the week the group runs in, up to the end of the week
+            hour = g.start_time.replace(minute=0, second=0, microsecond=0)
+            while hour < min(g.end_time, end):
+                cells.setdefault((hour.weekday(), hour.hour), []).append(g.id)
+                hour += timedelta(hours=1)
+
+        return {
+            "week_start": week_start,
+            "groups": rows,
+            "cells": [
+                {"day": day, "hour": hour, "group_ids": ids}
+                for (day, hour), ids in sorted(cells.items())
+            ],
+        }
+
+    def _on_change(self, tables: Set[str]) -> None:
+        if tables & WEEK_GRID_TABLES:
+            with self._grid_lock:
+                self._generation += 1
+                self._grids.clear()
+
+
+def _as_utc(stamp) -> datetime:
+    # SQLite hands back CURRENT_TIMESTAMP values as naive UTC strings
+    if isinstance(stamp, str):
+        stamp = datetime.fromisoformat(stamp)
+    if stamp.tzinfo is None:
+        return stamp.replace(tzinfo=timezone.utc)
+    return stamp.astimezone(timezone.utc)
+
+
+calendar_feed = CRUDCalendar()
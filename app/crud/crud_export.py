@@ -0,0 +1,81 @@
+
+from datetime import datetime
+from typing import Iterator, List, Tuple
+
+from sqlalchemy import Select, func, select
+from sqlalchemy.orm import Session
+
+from app.metrics.tracing import traced_methods
+from app.models.group import Group
+from app.models.registration import Registration
+from app.models.user import User
+
+# Rows fetched per round trip and encoded per record batch
+EXPORT_BATCH_SIZE = 10000
+
+def _groups(start: datetime, end: datetime) -> Select:
+    participants = select(func.count(Registration.id)).where(
+        Registration.group_id == Group.id
+    ).scalar_subquery()
+    attended = select(func.count(Registration.id)).where(
+        Registration.group_id == Group.id, Registration.attended == True
+    ).scalar_subquery()
+    return select(
+        Group.id, Group.name, Group.start_time, Group.end_time, Group.capacity,
+        Group.max_male, Group.max_female, Group.instructor_id, Group.series_id,
+        participants.label("participants"), attended.label("attended"),
+    ).where(Group.start_time >= start, Group.start_time < end).order_by(Group.start_time, Group.id)
+
+def _registrations(start: datetime, end: datetime) -> Select:
+    return select(
+        Registration.id, Registration.group_id, Registration.visitor_id, User.gender,
+        # Rows inserted before the column had a default hold NULL
+        func.coalesce(Registration.attended, False).label("attended"),
+        Registration.created_at, Group.start_time.label("group_start_time"),
+    ).join(Group, Group.id == Registration.group_id).join(
+        User, User.id == Registration.visitor_id
+    ).where(Group.start_time >= start, Group.start_time < end).order_by(Group.start_time, Registration.id)
+
+def _assignments(start: datetime, end: datetime) -> Select:
+    return select(
+        Group.id.label("group_id"), Group.instructor_id, User.full_name.label("instructor_name"),
+        Group.start_time, Group.end_time,
+    ).join(User, User.id == Group.instructor_id).where(
+        Group.start_time >= start, Group.start_time < end
+    ).order_by(Group.start_time, Group.id)
+
+DATASETS = {
+    "groups": _groups,
+    "registrations": _registrations,
+    "assignments": _assignments,
+}
+
+
+@traced_methods
+class CRUDExport:
+    """
+    Flat rows for analytics exports, read with plain Core selects so no ORM
+    objects are built, and fetched in batches from a streaming cursor.
+    """
+
+    def get_statement(self, *, dataset: str, start: datetime, end: datetime) -> Select:
+        if dataset not in DATASETS:
+            raise ValueError(f"Unknown dataset: {dataset}")
+        if end <= start:
+            raise ValueError("End must be after start")
+        return DATASETS[dataset](start, end)
+
+    def get_columns(self, statement: Select) -> List[Tuple[str, object]]:
+        """Name and SQL type of every selected column"""
+        return [(column.name, column.type) for column in statement.selected_columns]
+
+    def iter_batches(
+        self, db: Session, statement: Select, *, batch_size: int = EXPORT_BATCH_SIZE
+    ) -> Iterator[List[tuple]]:
+        # yield_per streams from a server-side cursor where the driver supports one
+        result = db.execute(statement.execution_options(yield_per=batch_size))
+        for partition in result.partitions():
+            yield [tuple(row) for row in partition]
+
+
+analytics_export = CRUDExport()
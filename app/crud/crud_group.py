@@ -1,31 +1,91 @@
 
-from typing import List, Optional, Dict, Any, Union
+from contextlib import contextmanager
+from typing import Iterator, List, NamedTuple, Optional, Dict, Any, Sequence, Tuple, Union
 from sqlalchemy.orm import Session, joinedload
-from sqlalchemy import func, and_, or_, extract
+from sqlalchemy import func, and_, or_, extract, case, insert, null, select, type_coerce, DateTime
+from sqlalchemy.exc import IntegrityError
 
+from app.cache.core import Cache, cached
 from app.crud.base import CRUDBase
-from app.models.group import Group
-from app.models.user import User, UserRole
+from app.core.config import settings
+from app.crud.crud_week_hours import instructor_week_hours, week_start_of
+from app.metrics.tracing import traced_methods
+from app.models.group import Group, OVERLAP_CONSTRAINT
+from app.models.registration import Registration
+from app.models.user import User, UserRole, Gender
 from app.schemas.group import GroupCreate, GroupUpdate
-from datetime import datetime, timedelta
+from app.scheduling.interval_index import interval_index
+from datetime import date, datetime, time, timedelta
 
+# Flags derived in Python from a count and a limit, so no boolean SQL is needed
+DERIVED_FIELDS = {
+    "is_full": ("current_participants", "capacity"),
+    "is_male_full": ("current_male_participants", "max_male"),
+    "is_female_full": ("current_female_participants", "max_female"),
+}
+
+group_cache = Cache("groups")
+
+class CloneConflict(NamedTuple):
+    group_id: int
+    instructor_id: int
+    # 'overlap' or 'max_hours'
+    reason: str
+
+@contextmanager
+def overlap_guard(db: Session) -> Iterator[None]:
+    """
+    Turn the database's rejection of a double-booked instructor into a ValueError.
+    The endpoints check for conflicts first; this covers the race where two
+    requests pass that check at the same time.
+    """
+    try:
+        yield
+    except IntegrityError as e:
+        db.rollback()
+        if OVERLAP_CONSTRAINT in str(e.orig):
+            raise ValueError("Instructor has a conflicting group at this time") from e
+        raise
+
+@traced_methods
 class CRUDGroup(CRUDBase[Group, GroupCreate, GroupUpdate]):
+    # (groups table version, next start) behind get_upcoming_boundary
+    _upcoming_boundary: Optional[Tuple[int, Optional[datetime]]] = None
+
     def create_with_instructor(
         self, db: Session, *, obj_in: GroupCreate, instructor_id: Optional[int] = None
     ) -> Group:
-        obj_in_data = obj_in.dict()
+        obj_in_data = obj_in.model_dump()
         if instructor_id:
             obj_in_data["instructor_id"] = instructor_id
         db_obj = Group(**obj_in_data)
         db.add(db_obj)
-        db.commit()
+        with overlap_guard(db):
+            db.commit()
         db.refresh(db_obj)
+        interval_index.sync_group(db_obj)
+        return db_obj
+    
+    def update(
+        self, db: Session, *, db_obj: Group, obj_in: Union[GroupUpdate, Dict[str, Any]]
+    ) -> Group:
+        with overlap_guard(db):
+            db_obj = super().update(db, db_obj=db_obj, obj_in=obj_in)
+        interval_index.sync_group(db_obj)
         return db_obj
     
+    def remove(self, db: Session, *, id: int) -> Group:
+        obj = super().remove(db, id=id)
+        interval_index.discard(id)
+        return obj
+    
+    def get_multi_by_ids(self, db: Session, *, ids: List[int]) -> List[Group]:
+        return db.query(Group).filter(Group.id.in_(ids)).all()
+    
     def get_with_details(self, db: Session, id: int) -> Optional[Group]:
         return db.query(Group).options(
             joinedload(Group.instructor),
-            joinedload(Group.registrations).joinedload("visitor")
+            joinedload(Group.registrations).joinedload(Registration.visitor)
         ).filter(Group.id == id).first()
     
     def get_multi_with_details(
@@ -33,9 +93,84 @@ class CRUDGroup(CRUDBase[Group, GroupCreate, GroupUpdate]):
     ) -> List[Group]:
         return db.query(Group).options(
             joinedload(Group.instructor),
-            joinedload(Group.registrations).joinedload("visitor")
+            joinedload(Group.registrations).joinedload(Registration.visitor)
         ).offset(skip).limit(limit).all()
     
+    def get_fields(self, db: Session, *, fields: Sequence[str], **kwargs: Any) -> List[Dict[str, Any]]:
+        """
+        Participant counts are selected only when asked for (directly or through
+        an is_*_full flag), as correlated counts instead of loaded registrations.
+        """
+        selected = list(dict.fromkeys(
+            name for field in fields for name in DERIVED_FIELDS.get(field, (field,))
+        ))
+        rows = super().get_fields(db, fields=selected, **kwargs)
+        for row in rows:
+            for field in fields:
+                if field in DERIVED_FIELDS:
+                    count, limit = DERIVED_FIELDS[field]
+                    row[field] = row[count] >= row[limit]
+        return [{field: row[field] for field in fields} for row in rows]
+    
+    # Gender counts depend on the registered users, hence the users table tag
+    @cached(group_cache, key="{id}:{fields}", tags=["group:{id}", "users"])
+    def get_fields_by_id(
+        self, db: Session, *, id: int, fields: Sequence[str]
+    ) -> Optional[Dict[str, Any]]:
+        rows = self.get_fields(db, fields=fields, filters=[Group.id == id], limit=1)
+        return rows[0] if rows else None
+    
+    def get_upcoming_fields(
+        self, db: Session, *, fields: Sequence[str], skip: int = 0, limit: int = 100
+    ) -> List[Dict[str, Any]]:
+        return self.get_fields(
+            db, fields=fields, filters=[Group.start_time > datetime.now()],
+            order_by=[Group.start_time], skip=skip, limit=limit
+        )
+    
+    def get_occupancy(self, db: Session, *, ids: Sequence[int]) -> List[Dict[str, Any]]:
+        """Participant counts by gender and the full flag of the groups, in one aggregate query"""
+        if not ids:
+            return []
+        rows = db.query(
+            Group.id, Group.capacity,
+            func.count(Registration.id),
+            func.coalesce(func.sum(case((User.gender == Gender.MALE, 1), else_=0)), 0),
+            func.coalesce(func.sum(case((User.gender == Gender.FEMALE, 1), else_=0)), 0),
+        ).outerjoin(Registration, Registration.group_id == Group.id).outerjoin(
+            User, User.id == Registration.visitor_id
+        ).filter(Group.id.in_(ids)).group_by(Group.id, Group.capacity).all()
+        return [
+            {"group_id": id, "total": total, "male": male, "female": female, "is_full": total >= capacity}
+            for id, capacity, total, male, female in rows
+        ]
+    
+    def get_upcoming_boundary(self, db: Session, *, groups_version: int) -> Optional[datetime]:
+        """
+        Start of the next group to begin. Until then the upcoming list only changes
+        through writes, so the result is cached per `groups_version`, the caller's
+        reading of the groups table version.
+        """
+        now = datetime.now()
+        cached = self._upcoming_boundary
+        if cached is not None and cached[0] == groups_version and (cached[1] is None or cached[1] > now):
+            return cached[1]
+        boundary = db.query(func.min(Group.start_time)).filter(Group.start_time > now).scalar()
+        self._upcoming_boundary = (groups_version, boundary)
+        return boundary
+    
+    def field_expression(self, name: str) -> Any:
+        if name == "current_participants":
+            return select(func.count(Registration.id)).where(
+                Registration.group_id == Group.id
+            ).scalar_subquery()
+        if name in ("current_male_participants", "current_female_participants"):
+            gender = Gender.MALE if name == "current_male_participants" else Gender.FEMALE
+            return select(func.count(Registration.id)).join(
+                User, User.id == Registration.visitor_id
+            ).where(Registration.group_id == Group.id, User.gender == gender).scalar_subquery()
+        return super().field_expression(name)
+    
     def get_upcoming_groups(
         self, db: Session, *, skip: int = 0, limit: int = 100
     ) -> List[Group]:
@@ -96,9 +231,104 @@ class CRUDGroup(CRUDBase[Group, GroupCreate, GroupUpdate]):
         if group:
             group.instructor_id = new_instructor_id
             db.add(group)
-            db.commit()
+            with overlap_guard(db):
+                db.commit()
             db.refresh(group)
+            interval_index.sync_group(group)
         return group
+    
+    def assign_instructors(
+        self, db: Session, *, assignments: Dict[int, int]
+    ) -> List[Group]:
+        """Set the instructor of many groups in a single transaction"""
+        groups = db.query(Group).filter(Group.id.in_(assignments)).all()
+        slots = []
+        for group_obj in groups:
+            group_obj.instructor_id = assignments[group_obj.id]
+            slots.append((group_obj.id, group_obj.instructor_id, group_obj.start_time, group_obj.end_time))
+        with overlap_guard(db):
+            db.commit()
+        for group_id, instructor_id, start, end in slots:
+            interval_index.add(group_id=group_id, instructor_id=instructor_id, start=start, end=end)
+        return groups
+
+    
+    def clone_week(
+        self, db: Session, *, source_week: date, target_week: date, keep_instructors: bool = True
+    ) -> Tuple[int, List[CloneConflict]]:
+        """
+        Copy the standalone groups starting in the week of `source_week` into the
+        week of `target_week` with one INSERT ... SELECT.
+        
+        With `keep_instructors`, copies keep their instructor unless that would
+        overlap the instructor's existing groups in the target week or push their
+        hours past the weekly maximum; those copies are left unassigned and
+        reported. Returns the number of groups created and the conflicts.
+        """
+        source_begin = datetime.combine(source_week - timedelta(days=source_week.weekday()), time.min)
+        target_begin = datetime.combine(target_week - timedelta(days=target_week.weekday()), time.min)
+        shift = target_begin - source_begin
+        in_source_week = and_(
+            Group.start_time >= source_begin,
+            Group.start_time < source_begin + timedelta(days=7),
+            # Series occurrences recur on their own
+            Group.series_id.is_(None)
+        )
+        
+        kept_ids: List[int] = []
+        conflicts: List[CloneConflict] = []
+        if keep_instructors:
+            interval_index.ensure_loaded(db)
+            hours = instructor_week_hours.get_hours_by_instructor(db, week_start=target_begin.date())
+            for group_id, instructor_id, start, end in db.query(
+                Group.id, Group.instructor_id, Group.start_time, Group.end_time
+            ).filter(in_source_week, Group.instructor_id.isnot(None)).order_by(Group.start_time).all():
+                if interval_index.has_conflict(instructor_id=instructor_id, start=start + shift, end=end + shift):
+                    conflicts.append(CloneConflict(group_id, instructor_id, "overlap"))
+                    continue
+                total = hours.get(instructor_id, 0.0) + (end - start).total_seconds() / 3600
+                if total > settings.INSTRUCTOR_MAX_HOURS_PER_WEEK:
+                    conflicts.append(CloneConflict(group_id, instructor_id, "max_hours"))
+                    continue
+                hours[instructor_id] = total
+                kept_ids.append(group_id)
+        
+        columns = ["name", "description", "capacity", "max_male", "max_female", "start_time", "end_time", "instructor_id"]
+        with overlap_guard(db):
+            # RETURNING gives exactly the rows this statement inserted, whatever
+            # other requests insert meanwhile
+            inserted = db.execute(insert(Group).from_select(columns, select(
+                Group.name, Group.description, Group.capacity, Group.max_male, Group.max_female,
+                self._shifted(db, Group.start_time, shift), self._shifted(db, Group.end_time, shift),
+                case((Group.id.in_(kept_ids), Group.instructor_id), else_=None) if kept_ids else null()
+            ).where(in_source_week).order_by(Group.start_time)).returning(
+                Group.id, Group.instructor_id, Group.start_time, Group.end_time
+            )).all()
+            created = len(inserted)
+            
+            # The rows bypassed the ORM, so the rollup and the index are brought up to date here
+            new_slots = [slot for slot in inserted if slot.instructor_id is not None]
+            instructor_week_hours.refresh(
+                db.connection(),
+                keys={(instructor_id, week_start_of(start)) for _, instructor_id, start, _ in new_slots}
+            )
+            db.commit()
+        for group_id, instructor_id, start, end in new_slots:
+            interval_index.add(group_id=group_id, instructor_id=instructor_id, start=start, end=end)
+        return created, conflicts
+    
+    @staticmethod
+    def _shifted(db: Session, column, shift: timedelta):
+        """`column` moved by `shift` in SQL"""
+        if db.get_bind().dialect.name == "sqlite":
+            # SQLite keeps datetimes as text; shift the date and time and keep the
+            # fractional seconds as written so comparisons stay lexicographic
+            return type_coerce(
+                func.strftime("%Y-%m-%d %H:%M:%S", column, f"{int(shift.total_seconds()):+d} seconds")
+                .op("||")(func.substr(column, 20)),
+                DateTime
+            )
+        return column + shift
 
 
 group = CRUDGroup(Group)
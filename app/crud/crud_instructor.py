@@ -1,9 +1,11 @@
 
-from typing import List, Optional, Dict, Any, Tuple
+from typing import List, Optional, Dict, Any, Tuple, Union
 from sqlalchemy.orm import Session, joinedload
-from sqlalchemy import func, and_, or_, extract, case
+from sqlalchemy import func, and_, or_, extract, case, literal_column
 
+from app.cache.core import Cache, cached, invalidate_tags, loaded_values
 from app.crud.base import CRUDBase
+from app.metrics.tracing import traced_methods
 from app.models.instructor_schedule import InstructorSchedule
 from app.models.instructor_preference import InstructorPreference, DayOfWeek
 from app.models.user import User, UserRole
@@ -11,9 +13,24 @@ from app.models.group import Group
 from app.schemas.instructor import InstructorScheduleCreate, InstructorScheduleUpdate
 from app.schemas.instructor import InstructorPreferenceCreate, InstructorPreferenceUpdate
 from app.core.config import settings
+from app.crud.crud_week_hours import instructor_week_hours, week_start_of
+from app.scheduling.availability import AvailabilitySnapshot, InstructorFit, load_shifts
+from app.scheduling.interval_index import interval_index
+from app.scheduling.preference_mask import preference_masks
+from app.scheduling.sweep import Interval, free_windows
 from datetime import datetime, timedelta, time
 
+preference_cache = Cache("instructor_preferences")
+
+def _instructor_tags(obj: Any) -> List[str]:
+    return [f"instructor:{instructor_id}" for instructor_id in loaded_values(obj, "instructor_id")]
+
+
+@traced_methods
 class CRUDInstructorSchedule(CRUDBase[InstructorSchedule, InstructorScheduleCreate, InstructorScheduleUpdate]):
+    def cache_tags(self, obj: InstructorSchedule) -> List[str]:
+        return super().cache_tags(obj) + _instructor_tags(obj)
+    
     def create_for_instructor(
         self, db: Session, *, obj_in: InstructorScheduleCreate, instructor_id: int
     ) -> InstructorSchedule:
@@ -44,7 +61,11 @@ class CRUDInstructorSchedule(CRUDBase[InstructorSchedule, InstructorScheduleCrea
         ).order_by(InstructorSchedule.start_time).all()
 
 
+@traced_methods
 class CRUDInstructorPreference(CRUDBase[InstructorPreference, InstructorPreferenceCreate, InstructorPreferenceUpdate]):
+    def cache_tags(self, obj: InstructorPreference) -> List[str]:
+        return super().cache_tags(obj) + _instructor_tags(obj)
+    
     def create_for_instructor(
         self, db: Session, *, obj_in: InstructorPreferenceCreate, instructor_id: int
     ) -> InstructorPreference:
@@ -57,8 +78,23 @@ class CRUDInstructorPreference(CRUDBase[InstructorPreference, InstructorPreferen
         db.add(db_obj)
         db.commit()
         db.refresh(db_obj)
+        preference_masks.rebuild_instructor(db, instructor_id=instructor_id)
         return db_obj
     
+    def update(
+        self, db: Session, *, db_obj: InstructorPreference,
+        obj_in: Union[InstructorPreferenceUpdate, Dict[str, Any]]
+    ) -> InstructorPreference:
+        db_obj = super().update(db, db_obj=db_obj, obj_in=obj_in)
+        preference_masks.rebuild_instructor(db, instructor_id=db_obj.instructor_id)
+        return db_obj
+    
+    def remove(self, db: Session, *, id: int) -> InstructorPreference:
+        obj = super().remove(db, id=id)
+        preference_masks.rebuild_instructor(db, instructor_id=obj.instructor_id)
+        return obj
+    
+    @cached(preference_cache, key="{instructor_id}", tags=["instructor:{instructor_id}"], detach=True)
     def get_instructor_preferences(
         self, db: Session, *, instructor_id: int
     ) -> List[InstructorPreference]:
@@ -73,29 +109,51 @@ class CRUDInstructorPreference(CRUDBase[InstructorPreference, InstructorPreferen
             InstructorPreference.instructor_id == instructor_id
         ).delete()
         db.commit()
+        # A bulk delete flushes no objects, so nothing was tagged automatically
+        invalidate_tags([f"instructor:{instructor_id}"])
+        preference_masks.rebuild_instructor(db, instructor_id=instructor_id)
         return True
 
 
+@traced_methods
 class CRUDInstructor:
     def get_instructor_hours_in_week(
         self, db: Session, *, instructor_id: int, start_date: datetime
     ) -> float:
-        """Calculate instructor hours for a week starting from start_date"""
-        end_date = start_date + timedelta(days=7)
-        
-        # Get all groups for the instructor in the date range
-        groups = db.query(Group).filter(
-            Group.instructor_id == instructor_id,
-            Group.start_time >= start_date,
-            Group.end_time <= end_date
-        ).all()
-        
-        total_hours = 0
-        for group in groups:
-            delta = (group.end_time - group.start_time).total_seconds() / 3600
-            total_hours += delta
-        
-        return total_hours
+        """Scheduled hours of the instructor in the ISO week containing start_date"""
+        return instructor_week_hours.get_hours(
+            db, instructor_id=instructor_id, week_start=week_start_of(start_date)
+        )
+    
+    def get_conflicting_group_ids(
+        self, db: Session, *, instructor_id: int, start: datetime, end: datetime,
+        exclude_group_id: Optional[int] = None
+    ) -> List[int]:
+        """Ids of the instructor's groups overlapping [start, end), served from the interval index"""
+        interval_index.ensure_loaded(db)
+        return interval_index.find_conflicts(
+            instructor_id=instructor_id, start=start, end=end,
+            exclude_group_id=exclude_group_id
+        )
+    
+    def get_conflicting_group_ids_sql(
+        self, db: Session, *, instructor_id: int, start: datetime, end: datetime,
+        exclude_group_id: Optional[int] = None
+    ) -> List[int]:
+        """
+        Same as `get_conflicting_group_ids`, answered by the database. On PostgreSQL
+        this is a probe of the GiST index behind the no-overlap exclusion constraint.
+        """
+        query = db.query(Group.id).filter(Group.instructor_id == instructor_id)
+        if db.get_bind().dialect.name == "postgresql":
+            query = query.filter(
+                literal_column("groups.slot").op("&&")(func.tsrange(start, end, "[)"))
+            )
+        else:
+            query = query.filter(Group.start_time < end, Group.end_time > start)
+        if exclude_group_id:
+            query = query.filter(Group.id != exclude_group_id)
+        return [row[0] for row in query.all()]
     
     def get_available_instructors_for_group(
         self, db: Session, *, group_start: datetime, group_end: datetime, 
@@ -108,80 +166,56 @@ class CRUDInstructor:
         
         Returns a list of tuples (instructor, is_overloaded, matches_preferences)
         """
-        instructors = db.query(User).filter(
-            User.role == UserRole.INSTRUCTOR,
-            User.is_active == True
-        ).all()
-        
-        results = []
-        start_of_week = group_start - timedelta(days=group_start.weekday())
-        
-        for instructor in instructors:
-            # Check current scheduled hours
-            current_hours = self.get_instructor_hours_in_week(
-                db, instructor_id=instructor.id, start_date=start_of_week
-            )
-            
-            # Get potential new hours if assigned to this group
-            group_hours = (group_end - group_start).total_seconds() / 3600
-            total_hours = current_hours + group_hours
-            
-            # Check if instructor would be overloaded with this additional group
-            is_overloaded = (
-                total_hours > settings.INSTRUCTOR_MAX_HOURS_PER_WEEK or
-                total_hours < settings.INSTRUCTOR_MIN_HOURS_PER_WEEK
-            )
-            
-            # Check for time conflicts with existing groups
-            conflicts = db.query(Group).filter(
-                Group.instructor_id == instructor.id,
-                or_(
-                    and_(
-                        Group.start_time <= group_start,
-                        Group.end_time > group_start
-                    ),
-                    and_(
-                        Group.start_time < group_end,
-                        Group.end_time >= group_end
-                    ),
-                    and_(
-                        Group.start_time >= group_start,
-                        Group.end_time <= group_end
-                    )
-                )
+        snapshot = AvailabilitySnapshot.load(db, slots=[(group_start, group_end)])
+        results = [
+            (fit.instructor, fit.is_overloaded, fit.matches_preferences)
+            for fit in snapshot.evaluate(
+                group_start=group_start, group_end=group_end, group_id=group_id
             )
-            
-            # Exclude the current group being edited if group_id is provided
-            if group_id:
-                conflicts = conflicts.filter(Group.id != group_id)
-            
-            if conflicts.first():
-                # Skip this instructor if there's a time conflict
-                continue
-            
-            # Check if the time matches instructor preferences
-            day_of_week = DayOfWeek(group_start.strftime('%A').lower())
-            group_start_time = group_start.time()
-            group_end_time = group_end.time()
-            
-            preferences = db.query(InstructorPreference).filter(
-                InstructorPreference.instructor_id == instructor.id,
-                InstructorPreference.day_of_week == day_of_week
-            ).all()
-            
-            matches_preferences = False
-            if preferences:
-                for pref in preferences:
-                    if pref.start_time <= group_start_time and pref.end_time >= group_end_time:
-                        matches_preferences = True
-                        break
-            
-            # Add to results if not overloaded or if we're just checking preferences
-            if not is_overloaded:
-                results.append((instructor, is_overloaded, matches_preferences))
+        ]
         
         # Apply pagination
         return results[skip:skip+limit]
+    
+    def get_available_instructors_for_groups(
+        self, db: Session, *, groups: List[Group]
+    ) -> Dict[int, List[InstructorFit]]:
+        """
+        Evaluate many groups against one shared snapshot of instructors, weekly
+        hours, assigned slots and preferences.
+        """
+        snapshot = AvailabilitySnapshot.load(
+            db, slots=[(group_obj.start_time, group_obj.end_time) for group_obj in groups]
+        )
+        return {
+            group_obj.id: snapshot.evaluate(
+                group_start=group_obj.start_time, group_end=group_obj.end_time,
+                group_id=group_obj.id
+            )
+            for group_obj in groups
+        }
+    
+    def get_free_windows(
+        self, db: Session, *, start: datetime, end: datetime
+    ) -> List[Tuple[User, List[Interval]]]:
+        """
+        For every active instructor, the parts of [start, end) inside their declared
+        shifts and not taken by an assigned group.
+        """
+        interval_index.ensure_loaded(db)
+        instructors = db.query(User).filter(
+            User.role == UserRole.INSTRUCTOR,
+            User.is_active == True
+        ).order_by(User.id).all()
+        shifts = load_shifts(db, start=start, end=end)
+        return [
+            (instructor_user, free_windows(
+                shifts.get(instructor_user.id, []),
+                interval_index.slots_between(instructor_id=instructor_user.id, start=start, end=end),
+                start, end
+            ))
+            for instructor_user in instructors
+        ]
 
 
 instructor_schedule = CRUDInstructorSchedule(InstructorSchedule)
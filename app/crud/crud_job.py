@@ -0,0 +1,134 @@
+
+from datetime import datetime, timedelta
+from typing import Any, Dict, List, Optional
+
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.crud.base import CRUDBase
+from app.metrics.tracing import traced_methods
+from app.models.job import Job, JobStatus
+from app.schemas.job import JobCreate, JobUpdate
+
+@traced_methods
+class CRUDJob(CRUDBase[Job, JobCreate, JobUpdate]):
+    def enqueue(
+        self, db: Session, *, kind: str, payload: Optional[Dict[str, Any]] = None, priority: int = 0,
+        max_attempts: int = 3, run_at: Optional[datetime] = None, created_by_id: Optional[int] = None
+    ) -> Job:
+        db_obj = Job(
+            kind=kind,
+            payload=payload or {},
+            status=JobStatus.QUEUED,
+            priority=priority,
+            run_at=run_at or datetime.now(),
+            max_attempts=max_attempts,
+            created_by_id=created_by_id
+        )
+        db.add(db_obj)
+        db.commit()
+        db.refresh(db_obj)
+        return db_obj
+
+    def get_multi_by_status(
+        self, db: Session, *, status: Optional[JobStatus] = None, skip: int = 0, limit: int = 100
+    ) -> List[Job]:
+        query = db.query(Job)
+        if status is not None:
+            query = query.filter(Job.status == status)
+        return query.order_by(Job.id.desc()).offset(skip).limit(limit).all()
+
+    def claim(self, db: Session, *, worker_id: str, kinds: Optional[List[str]] = None) -> Optional[Job]:
+        """
+        Take the next due job: highest priority first, then oldest. On PostgreSQL
+        the candidate row is locked with SKIP LOCKED, so concurrent workers pass
+        over each other's picks instead of queueing behind them; the conditional
+        update settles races on databases without row locks.
+        """
+        now = datetime.now()
+        query = db.query(Job.id).filter(Job.status == JobStatus.QUEUED, Job.run_at <= now)
+        if kinds:
+            query = query.filter(Job.kind.in_(kinds))
+        for _ in range(3):
+            row = query.order_by(
+                Job.priority.desc(), Job.run_at, Job.id
+            ).limit(1).with_for_update(skip_locked=True).first()
+            if row is None:
+                # End the read transaction rather than idle in it until the next poll
+                db.commit()
+                return None
+            claimed = db.query(Job).filter(Job.id == row.id, Job.status == JobStatus.QUEUED).update({
+                Job.status: JobStatus.RUNNING,
+                Job.attempts: Job.attempts + 1,
+                Job.locked_by: worker_id,
+                Job.locked_at: now,
+            }, synchronize_session=False)
+            db.commit()
+            if claimed:
+                return self.get(db, id=row.id)
+        return None
+
+    def complete(self, db: Session, *, job: Job, result: Any = None) -> Job:
+        job.status = JobStatus.SUCCEEDED
+        job.result = result
+        job.error = None
+        job.finished_at = datetime.now()
+        job.locked_by = None
+        db.add(job)
+        db.commit()
+        db.refresh(job)
+        return job
+
+    def fail(self, db: Session, *, job: Job, error: str, permanent: bool = False) -> Job:
+        """Record a failed attempt: retry later with exponential backoff, or give up"""
+        job.error = error
+        job.locked_by = None
+        if not permanent and job.attempts < job.max_attempts:
+            job.status = JobStatus.QUEUED
+            job.run_at = datetime.now() + timedelta(
+                seconds=settings.JOB_RETRY_DELAY_SECONDS * 2 ** (job.attempts - 1)
+            )
+        else:
+            job.status = JobStatus.FAILED
+            job.finished_at = datetime.now()
+        db.add(job)
+        db.commit()
+        db.refresh(job)
+        return job
+
+    def cancel(self, db: Session, *, job: Job) -> Job:
+        if job.status != JobStatus.QUEUED:
+            raise ValueError("Only queued jobs can be cancelled")
+        job.status = JobStatus.CANCELLED
+        job.finished_at = datetime.now()
+        db.add(job)
+        db.commit()
+        db.refresh(job)
+        return job
+
+    def requeue_expired(self, db: Session) -> int:
+        """
+        Take back jobs claimed longer than the lease ago, whose worker must have
+        died: queue them again, or fail them when out of attempts.
+        """
+        now = datetime.now()
+        expired = db.query(Job).filter(
+            Job.status == JobStatus.RUNNING,
+            Job.locked_at < now - timedelta(seconds=settings.JOB_LEASE_SECONDS)
+        )
+        changed = expired.filter(Job.attempts >= Job.max_attempts).update({
+            Job.status: JobStatus.FAILED,
+            Job.locked_by: None,
+            Job.finished_at: now,
+            Job.error: "Worker lease expired",
+        }, synchronize_session=False)
+        changed += expired.filter(Job.attempts < Job.max_attempts).update({
+            Job.status: JobStatus.QUEUED,
+            Job.locked_by: None,
+            Job.error: "Worker lease expired",
+        }, synchronize_session=False)
+        db.commit()
+        return changed
+
+
+job = CRUDJob(Job)
@@ -1,15 +1,25 @@
 
-from typing import List, Optional
+from typing import Any, Dict, List, Optional, Sequence
 from sqlalchemy.orm import Session, joinedload
 from sqlalchemy import and_
 
+from app.cache.core import loaded_values
 from app.crud.base import CRUDBase
+from app.metrics.tracing import traced_methods
 from app.models.registration import Registration
 from app.models.user import User, Gender
 from app.models.group import Group
+from app.realtime.occupancy import occupancy_hub
 from app.schemas.registration import RegistrationCreate, RegistrationUpdate
 
+@traced_methods
 class CRUDRegistration(CRUDBase[Registration, RegistrationCreate, RegistrationUpdate]):
+    def cache_tags(self, obj: Registration) -> List[str]:
+        # Registrations change the participant counts of their group
+        return super().cache_tags(obj) + [
+            f"group:{group_id}" for group_id in loaded_values(obj, "group_id")
+        ]
+    
     def create_with_visitor(
         self, db: Session, *, obj_in: RegistrationCreate, visitor_id: int
     ) -> Registration:
@@ -24,7 +34,7 @@ class CRUDRegistration(CRUDBase[Registration, RegistrationCreate, RegistrationUp
         
         # Check if the group has capacity
         group = db.query(Group).options(
-            joinedload(Group.registrations).joinedload("visitor")
+            joinedload(Group.registrations).joinedload(Registration.visitor)
         ).filter(Group.id == obj_in.group_id).first()
         
         if not group:
@@ -53,17 +63,32 @@ class CRUDRegistration(CRUDBase[Registration, RegistrationCreate, RegistrationUp
         db.add(db_obj)
         db.commit()
         db.refresh(db_obj)
+        occupancy_hub.publish(db, group_ids=[db_obj.group_id])
         return db_obj
     
     def get_visitor_registrations(
         self, db: Session, *, visitor_id: int, skip: int = 0, limit: int = 100
     ) -> List[Registration]:
         return db.query(Registration).options(
-            joinedload(Registration.group).joinedload("instructor")
+            joinedload(Registration.group).joinedload(Group.instructor)
         ).filter(
             Registration.visitor_id == visitor_id
         ).offset(skip).limit(limit).all()
     
+    def get_visitor_registration_fields(
+        self, db: Session, *, visitor_id: int, fields: Sequence[str], skip: int = 0, limit: int = 100
+    ) -> List[Dict[str, Any]]:
+        return self.get_fields(
+            db, fields=fields, filters=[Registration.visitor_id == visitor_id], skip=skip, limit=limit
+        )
+    
+    def get_group_registration_fields(
+        self, db: Session, *, group_id: int, fields: Sequence[str], skip: int = 0, limit: int = 100
+    ) -> List[Dict[str, Any]]:
+        return self.get_fields(
+            db, fields=fields, filters=[Registration.group_id == group_id], skip=skip, limit=limit
+        )
+    
     def get_group_registrations(
         self, db: Session, *, group_id: int, skip: int = 0, limit: int = 100
     ) -> List[Registration]:
@@ -84,6 +109,7 @@ class CRUDRegistration(CRUDBase[Registration, RegistrationCreate, RegistrationUp
         if registration:
             db.delete(registration)
             db.commit()
+            occupancy_hub.publish(db, group_ids=[group_id])
             return True
         return False
     
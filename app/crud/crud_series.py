@@ -0,0 +1,197 @@
+
+from collections import defaultdict
+from datetime import datetime
+from typing import List, Optional
+
+from sqlalchemy import and_, or_, select, union
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+
+from app.crud.base import CRUDBase
+from app.metrics.tracing import traced_methods
+from app.models.group import Group
+from app.models.group_series import GroupSeries, GroupSeriesException
+from app.schemas.series import GroupSeriesCreate, GroupSeriesUpdate, GroupSeriesExceptionCreate
+from app.scheduling.recurrence import MAX_DURATION, Occurrence, duration_of, expand, is_rule_start
+
+@traced_methods
+class CRUDGroupSeries(CRUDBase[GroupSeries, GroupSeriesCreate, GroupSeriesUpdate]):
+    def create(self, db: Session, *, obj_in: GroupSeriesCreate) -> GroupSeries:
+        db_obj = GroupSeries(**obj_in.model_dump())
+        db.add(db_obj)
+        db.commit()
+        db.refresh(db_obj)
+        return db_obj
+
+    def get_occurrences(
+        self, db: Session, *, start: datetime, end: datetime, series_id: Optional[int] = None
+    ) -> List[Occurrence]:
+        """
+        Occurrences of all series (or of one) overlapping [start, end), expanded
+        from the rules with three queries however long the window is.
+        """
+        # Exceptions and materialized groups can move an occurrence into the
+        # window from a series whose rule lies entirely outside it
+        moved_in = union(
+            select(GroupSeriesException.series_id).where(
+                GroupSeriesException.start_time < end, GroupSeriesException.end_time > start
+            ),
+            select(Group.series_id).where(
+                Group.series_id.isnot(None), Group.start_time < end, Group.end_time > start
+            )
+        )
+        query = db.query(GroupSeries).filter(or_(
+            and_(
+                GroupSeries.first_start < end,
+                or_(GroupSeries.until.is_(None), GroupSeries.until > start - MAX_DURATION)
+            ),
+            GroupSeries.id.in_(moved_in)
+        ))
+        if series_id is not None:
+            query = query.filter(GroupSeries.id == series_id)
+        series_list = query.all()
+        if not series_list:
+            return []
+
+        ids = [series.id for series in series_list]
+        longest = max(duration_of(series) for series in series_list)
+        exceptions = defaultdict(list)
+        for exception in db.query(GroupSeriesException).filter(
+            GroupSeriesException.series_id.in_(ids),
+            or_(
+                and_(GroupSeriesException.occurrence_start > start - longest,
+                     GroupSeriesException.occurrence_start < end),
+                and_(GroupSeriesException.start_time < end, GroupSeriesException.end_time > start)
+            )
+        ).all():
+            exceptions[exception.series_id].append(exception)
+        groups = defaultdict(list)
+        for group_obj in db.query(Group).filter(
+            Group.series_id.in_(ids),
+            or_(
+                and_(Group.occurrence_start > start - longest, Group.occurrence_start < end),
+                and_(Group.start_time < end, Group.end_time > start)
+            )
+        ).all():
+            groups[group_obj.series_id].append(group_obj)
+
+        occurrences = []
+        for series in series_list:
+            occurrences.extend(expand(
+                series, start, end, exceptions=exceptions[series.id], groups=groups[series.id]
+            ))
+        occurrences.sort(key=lambda occurrence: (occurrence.start_time, occurrence.series_id))
+        return occurrences
+
+    def get_occurrence(
+        self, db: Session, *, series: GroupSeries, occurrence_start: datetime
+    ) -> Optional[Occurrence]:
+        """The occurrence the rule generates at `occurrence_start`, unless it is cancelled"""
+        group_obj = self.get_materialized(db, series_id=series.id, occurrence_start=occurrence_start)
+        if group_obj:
+            return Occurrence(
+                series.id, group_obj.name, occurrence_start, group_obj.start_time, group_obj.end_time,
+                group_obj.id, group_obj.instructor_id
+            )
+        if not is_rule_start(series, occurrence_start):
+            return None
+        exception = self.get_exception(db, series_id=series.id, occurrence_start=occurrence_start)
+        if exception and exception.is_cancelled:
+            return None
+        if exception:
+            return Occurrence(
+                series.id, series.name, occurrence_start, exception.start_time, exception.end_time
+            )
+        return Occurrence(
+            series.id, series.name, occurrence_start, occurrence_start,
+            occurrence_start + duration_of(series)
+        )
+
+    def get_materialized(
+        self, db: Session, *, series_id: int, occurrence_start: datetime
+    ) -> Optional[Group]:
+        return db.query(Group).filter(
+            Group.series_id == series_id, Group.occurrence_start == occurrence_start
+        ).first()
+
+    def get_exception(
+        self, db: Session, *, series_id: int, occurrence_start: datetime
+    ) -> Optional[GroupSeriesException]:
+        return db.query(GroupSeriesException).filter(
+            GroupSeriesException.series_id == series_id,
+            GroupSeriesException.occurrence_start == occurrence_start
+        ).first()
+
+    def has_overrides(self, db: Session, *, series_id: int) -> bool:
+        """Whether any occurrence has been materialized or has an exception"""
+        return db.query(Group.id).filter(Group.series_id == series_id).first() is not None or \
+            db.query(GroupSeriesException.id).filter(
+                GroupSeriesException.series_id == series_id
+            ).first() is not None
+
+    def materialize(
+        self, db: Session, *, series: GroupSeries, occurrence_start: datetime
+    ) -> Group:
+        """
+        The Group row of an occurrence, created on first use. Concurrent callers
+        end up with the same row thanks to the (series_id, occurrence_start) key.
+        """
+        group_obj = self.get_materialized(db, series_id=series.id, occurrence_start=occurrence_start)
+        if group_obj:
+            return group_obj
+        occurrence = self.get_occurrence(db, series=series, occurrence_start=occurrence_start)
+        if occurrence is None:
+            raise ValueError("Occurrence not found")
+
+        group_obj = Group(
+            name=series.name,
+            description=series.description,
+            capacity=series.capacity,
+            max_male=series.max_male,
+            max_female=series.max_female,
+            start_time=occurrence.start_time,
+            end_time=occurrence.end_time,
+            series_id=series.id,
+            occurrence_start=occurrence_start,
+        )
+        db.add(group_obj)
+        try:
+            db.commit()
+        except IntegrityError:
+            db.rollback()
+            group_obj = self.get_materialized(db, series_id=series.id, occurrence_start=occurrence_start)
+            if group_obj is None:
+                raise
+            return group_obj
+        db.refresh(group_obj)
+        return group_obj
+
+    def set_exception(
+        self, db: Session, *, series: GroupSeries, obj_in: GroupSeriesExceptionCreate
+    ) -> GroupSeriesException:
+        """Cancel or move one occurrence that has not been materialized yet"""
+        if not is_rule_start(series, obj_in.occurrence_start):
+            raise ValueError("Occurrence not found")
+        if self.get_materialized(db, series_id=series.id, occurrence_start=obj_in.occurrence_start):
+            raise ValueError("Occurrence is already a group; edit or delete the group instead")
+
+        exception = self.get_exception(
+            db, series_id=series.id, occurrence_start=obj_in.occurrence_start
+        ) or GroupSeriesException(series_id=series.id, occurrence_start=obj_in.occurrence_start)
+        exception.is_cancelled = obj_in.is_cancelled
+        exception.start_time = None if obj_in.is_cancelled else obj_in.start_time
+        exception.end_time = None if obj_in.is_cancelled else obj_in.end_time
+        db.add(exception)
+        db.commit()
+        db.refresh(exception)
+        return exception
+
+    def remove(self, db: Session, *, id: int) -> GroupSeries:
+        """Delete a series; groups already materialized from it are kept as standalone groups"""
+        db.query(Group).filter(Group.series_id == id).update(
+            {Group.series_id: None, Group.occurrence_start: None}, synchronize_session=False
+        )
+        return super().remove(db, id=id)
+
+
+group_series = CRUDGroupSeries(GroupSeries)
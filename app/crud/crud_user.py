@@ -2,11 +2,16 @@
 from typing import Any, Dict, Optional, Union, List
 from sqlalchemy.orm import Session
 
+from app.cache.core import Cache, cached
 from app.core.security import get_password_hash, verify_password
 from app.crud.base import CRUDBase
+from app.metrics.tracing import traced_methods
 from app.models.user import User, UserRole
 from app.schemas.user import UserCreate, UserUpdate
 
+user_cache = Cache("users")
+
+@traced_methods
 class CRUDUser(CRUDBase[User, UserCreate, UserUpdate]):
     def get_by_email(self, db: Session, *, email: str) -> Optional[User]:
         return db.query(User).filter(User.email == email).first()
@@ -31,7 +36,7 @@ class CRUDUser(CRUDBase[User, UserCreate, UserUpdate]):
         if isinstance(obj_in, dict):
             update_data = obj_in
         else:
-            update_data = obj_in.dict(exclude_unset=True)
+            update_data = obj_in.model_dump(exclude_unset=True)
         if update_data.get("password"):
             hashed_password = get_password_hash(update_data["password"])
             del update_data["password"]
@@ -55,6 +60,7 @@ class CRUDUser(CRUDBase[User, UserCreate, UserUpdate]):
     def is_instructor(self, user: User) -> bool:
         return user.role == UserRole.INSTRUCTOR
     
+    @cached(user_cache, key="active", tags=["users"], detach=True)
     def get_instructors(self, db: Session) -> List[User]:
         return db.query(User).filter(User.role == UserRole.INSTRUCTOR, User.is_active == True).all()
 
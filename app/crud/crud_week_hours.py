@@ -0,0 +1,154 @@
+
+from typing import Dict, Iterable, Optional, Set, Tuple
+from datetime import date, datetime, time, timedelta
+
+from sqlalchemy import event, inspect, select, update
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.engine import Connection
+from sqlalchemy.orm import Session
+from sqlalchemy.sql import func
+
+from app.metrics.tracing import traced_methods
+from app.models.group import Group
+from app.models.instructor_week_hours import InstructorWeekHours
+
+WeekKey = Tuple[int, date]
+
+# Session.info key holding the (instructor_id, week_start) pairs touched by a flush
+PENDING_KEYS = "instructor_week_hours_keys"
+
+def week_start_of(moment: datetime) -> date:
+    """Monday of the ISO week containing `moment`"""
+    return (moment - timedelta(days=moment.weekday())).date()
+
+
+@traced_methods
+class CRUDInstructorWeekHours:
+    def get_hours(self, db: Session, *, instructor_id: int, week_start: date) -> float:
+        hours = db.query(InstructorWeekHours.hours).filter(
+            InstructorWeekHours.instructor_id == instructor_id,
+            InstructorWeekHours.week_start == week_start
+        ).scalar()
+        return hours or 0.0
+
+    def get_hours_by_instructor(self, db: Session, *, week_start: date) -> Dict[int, float]:
+        rows = db.query(InstructorWeekHours.instructor_id, InstructorWeekHours.hours).filter(
+            InstructorWeekHours.week_start == week_start
+        ).all()
+        return {instructor_id: hours for instructor_id, hours in rows}
+
+    def refresh(self, connection: Connection, *, keys: Iterable[WeekKey]) -> None:
+        """Recompute the rollup rows for the given (instructor_id, week_start) pairs"""
+        for instructor_id, week_start in keys:
+            begin = datetime.combine(week_start, time.min)
+            rows = connection.execute(
+                select(Group.start_time, Group.end_time).where(
+                    Group.instructor_id == instructor_id,
+                    Group.start_time >= begin,
+                    Group.start_time < begin + timedelta(days=7)
+                )
+            ).all()
+            hours = sum((end - start).total_seconds() for start, end in rows) / 3600
+            self._upsert(connection, instructor_id=instructor_id, week_start=week_start, hours=hours)
+
+    def rebuild(self, db: Session) -> int:
+        """Recompute the whole rollup from the groups table. Returns the number of rows written."""
+        totals: Dict[WeekKey, float] = {}
+        rows = db.execute(
+            select(Group.instructor_id, Group.start_time, Group.end_time).where(
+                Group.instructor_id.isnot(None)
+            ).execution_options(yield_per=10000)
+        )
+        for instructor_id, start, end in rows:
+            key = (instructor_id, week_start_of(start))
+            totals[key] = totals.get(key, 0.0) + (end - start).total_seconds() / 3600
+
+        db.query(InstructorWeekHours).delete()
+        if totals:
+            db.execute(InstructorWeekHours.__table__.insert(), [
+                {"instructor_id": instructor_id, "week_start": week_start, "hours": hours}
+                for (instructor_id, week_start), hours in totals.items()
+            ])
+        db.commit()
+        return len(totals)
+
+    def _upsert(
+        self, connection: Connection, *, instructor_id: int, week_start: date, hours: float
+    ) -> None:
+        table = InstructorWeekHours.__table__
+        values = {"instructor_id": instructor_id, "week_start": week_start, "hours": hours}
+        dialects = {"postgresql": postgresql, "sqlite": sqlite}
+        dialect = dialects.get(connection.dialect.name)
+        if dialect is not None:
+            stmt = dialect.insert(table).values(**values)
+            connection.execute(stmt.on_conflict_do_update(
+                index_elements=[table.c.instructor_id, table.c.week_start],
+                set_={"hours": stmt.excluded.hours, "updated_at": func.now()}
+            ))
+            return
+        result = connection.execute(
+            update(table).where(
+                table.c.instructor_id == instructor_id, table.c.week_start == week_start
+            ).values(hours=hours)
+        )
+        if not result.rowcount:
+            connection.execute(table.insert().values(**values))
+
+
+def _current_key(group: Group) -> Optional[WeekKey]:
+    if group.instructor_id is None or group.start_time is None:
+        return None
+    return group.instructor_id, week_start_of(group.start_time)
+
+def _persisted_key(session: Session, group: Group) -> Optional[WeekKey]:
+    """The key of the row as it is stored, before this flush changes it"""
+    state = inspect(group)
+    values = {}
+    for name in ("instructor_id", "start_time"):
+        history = state.attrs[name].history
+        if history.deleted:
+            values[name] = history.deleted[0]
+        elif history.unchanged:
+            values[name] = history.unchanged[0]
+    if len(values) < 2:
+        row = session.connection().execute(
+            select(Group.instructor_id, Group.start_time).where(Group.id == state.identity[0])
+        ).first()
+        if row is None:
+            return None
+        values = {"instructor_id": row.instructor_id, "start_time": row.start_time}
+    if values["instructor_id"] is None or values["start_time"] is None:
+        return None
+    return values["instructor_id"], week_start_of(values["start_time"])
+
+@event.listens_for(Session, "before_flush")
+def _collect_week_hours_keys(session: Session, flush_context, instances) -> None:
+    keys: Set[WeekKey] = set()
+    for obj in session.new:
+        if isinstance(obj, Group):
+            keys.add(_current_key(obj))
+    for obj in session.deleted:
+        if isinstance(obj, Group):
+            keys.add(_persisted_key(session, obj))
+    for obj in session.dirty:
+        if not isinstance(obj, Group):
+            continue
+        state = inspect(obj)
+        if any(
+            state.attrs[name].history.has_changes()
+            for name in ("instructor_id", "start_time", "end_time")
+        ):
+            keys.add(_persisted_key(session, obj))
+            keys.add(_current_key(obj))
+    keys.discard(None)
+    if keys:
+        session.info.setdefault(PENDING_KEYS, set()).update(keys)
+
+@event.listens_for(Session, "after_flush")
+def _refresh_week_hours(session: Session, flush_context) -> None:
+    keys = session.info.pop(PENDING_KEYS, None)
+    if keys:
+        instructor_week_hours.refresh(session.connection(), keys=keys)
+
+
+instructor_week_hours = CRUDInstructorWeekHours()
@@ -3,6 +3,10 @@
 from app.db.base_class import Base
 from app.models.user import User
 from app.models.group import Group
+from app.models.group_series import GroupSeries, GroupSeriesException
 from app.models.registration import Registration
 from app.models.instructor_schedule import InstructorSchedule
 from app.models.instructor_preference import InstructorPreference
+from app.models.instructor_week_hours import InstructorWeekHours
+from app.models.job import Job
+from app.models.table_version import TableVersion
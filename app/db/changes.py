@@ -0,0 +1,142 @@
+
+import logging
+import threading
+from typing import Callable, Iterable, List, Set, Tuple
+
+from sqlalchemy import event, insert, select, update
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.engine import Connection
+from sqlalchemy.orm import ORMExecuteState, Session
+
+from app.models.table_version import TableVersion
+
+logger = logging.getLogger(__name__)
+
+# INSERT ... ON CONFLICT, where the dialect has it
+UPSERTS = {"postgresql": postgresql.insert, "sqlite": sqlite.insert}
+
+# Change feed: tells subscribers which tables a committed transaction wrote to.
+# ORM flushes and ORM-enabled bulk statements (session.execute(insert(...)),
+# query.update(...)) are picked up automatically; raw connection writes that
+# bypass the session have to call `notify` themselves, and
+# `table_versions.bump` within their transaction.
+
+Listener = Callable[[Set[str]], None]
+
+# Session.info key holding the tables written in the current transaction
+PENDING_TABLES = "changed_tables"
+# ... and the subset written by bulk statements, whose rows are not known
+PENDING_BULK_TABLES = "bulk_changed_tables"
+
+_listeners: List[Listener] = []
+_lock = threading.Lock()
+
+def subscribe(listener: Listener) -> Listener:
+    """Call `listener(tables)` after every commit that wrote to any table; usable as a decorator"""
+    with _lock:
+        _listeners.append(listener)
+    return listener
+
+def unsubscribe(listener: Listener) -> None:
+    with _lock:
+        if listener in _listeners:
+            _listeners.remove(listener)
+
+def notify(tables: Iterable[str]) -> None:
+    """Dispatch a change right away, for writes made outside an ORM session"""
+    tables = set(tables)
+    if not tables:
+        return
+    with _lock:
+        listeners = list(_listeners)
+    for listener in listeners:
+        try:
+            listener(tables)
+        except Exception:
+            # A failing subscriber must not turn a committed write into an error
+            logger.exception("Change listener %r failed", listener)
+
+def _record(session: Session, tables: Iterable[str]) -> None:
+    session.info.setdefault(PENDING_TABLES, set()).update(tables)
+
+@event.listens_for(Session, "after_flush")
+def _collect_flushed_tables(session: Session, flush_context) -> None:
+    _record(session, {
+        obj.__table__.name
+        for obj in (*session.new, *session.dirty, *session.deleted)
+        if hasattr(obj, "__table__")
+    })
+
+@event.listens_for(Session, "do_orm_execute")
+def _collect_bulk_tables(state: ORMExecuteState) -> None:
+    if state.is_insert or state.is_update or state.is_delete:
+        table = getattr(state.statement, "table", None)
+        if table is not None:
+            _record(state.session, {table.name})
+            state.session.info.setdefault(PENDING_BULK_TABLES, set()).add(table.name)
+
+@event.listens_for(Session, "after_commit")
+def _dispatch(session: Session) -> None:
+    session.info.pop(PENDING_BULK_TABLES, None)
+    notify(session.info.pop(PENDING_TABLES, set()))
+
+@event.listens_for(Session, "after_rollback")
+def _discard(session: Session) -> None:
+    session.info.pop(PENDING_TABLES, None)
+    session.info.pop(PENDING_BULK_TABLES, None)
+
+
+class TableVersions:
+    """
+    Per-table version rows, bumped inside every transaction that writes to
+    one of `tables`, so every worker process reads the same versions. Reading
+    them is a single primary-key query, which makes them a cheap validator for
+    conditional GETs of whole collections.
+
+    The bump runs just before the commit, so concurrent writers of a table
+    only queue on its version row for the time the commit takes.
+    """
+
+    def __init__(self, *tables: str) -> None:
+        self.tables = frozenset(tables)
+
+    def get(self, db: Session, *tables: str) -> Tuple[int, ...]:
+        versions = dict(db.execute(
+            select(TableVersion.table_name, TableVersion.version).where(TableVersion.table_name.in_(tables))
+        ).all())
+        return tuple(versions.get(table, 0) for table in tables)
+
+    def bump(self, connection: Connection, tables: Iterable[str]) -> None:
+        """For writes made outside an ORM session, in their own transaction"""
+        names = sorted(self.tables.intersection(tables))
+        if not names:
+            return
+        dialect = connection.dialect.name
+        if dialect in UPSERTS:
+            statement = UPSERTS[dialect](TableVersion).values([
+                {"table_name": name, "version": 1} for name in names
+            ])
+            connection.execute(statement.on_conflict_do_update(
+                index_elements=[TableVersion.table_name],
+                set_={"version": TableVersion.version + 1}
+            ))
+            return
+        updated = connection.execute(
+            update(TableVersion).where(TableVersion.table_name.in_(names))
+            .values(version=TableVersion.version + 1).returning(TableVersion.table_name)
+        ).scalars().all()
+        missing = [name for name in names if name not in updated]
+        if missing:
+            connection.execute(insert(TableVersion), [{"table_name": name, "version": 1} for name in missing])
+
+
+# The collections served with ETags
+table_versions = TableVersions("groups", "registrations")
+
+@event.listens_for(Session, "before_commit")
+def _bump_versions(session: Session) -> None:
+    # Flush first, so the tables of the commit's own flush are known
+    session.flush()
+    tables = session.info.get(PENDING_TABLES)
+    if tables:
+        table_versions.bump(session.connection(), tables)
@@ -0,0 +1,64 @@
+
+import os
+from datetime import date, datetime, time
+from typing import Any, Callable, Dict
+
+from sqlalchemy.orm import Session
+
+from app.core import columnar
+from app.core.config import settings
+from app.crud.crud_export import analytics_export
+from app.crud.crud_week_hours import instructor_week_hours
+
+# Job kinds and the functions running them. A handler gets the session of the
+# runner that claimed the job, which records the outcome on it afterwards (and
+# rolls back first if the handler raised), and the job's JSON payload, and
+# returns a JSON-serializable result. ValueError means the payload cannot work
+# and fails the job at once; any other exception is retried with backoff.
+
+Handler = Callable[[Session, Dict[str, Any]], Any]
+
+HANDLERS: Dict[str, Handler] = {}
+
+def handler(kind: str) -> Callable[[Handler], Handler]:
+    def register(function: Handler) -> Handler:
+        HANDLERS[kind] = function
+        return function
+    return register
+
+
+@handler("rebuild_week_hours")
+def rebuild_week_hours(db: Session, payload: Dict[str, Any]) -> Dict[str, Any]:
+    return {"rows": instructor_week_hours.rebuild(db)}
+
+@handler("export")
+def export(db: Session, payload: Dict[str, Any]) -> Dict[str, Any]:
+    """Write an analytics export (see /exports) to JOB_OUTPUT_DIR"""
+    if not columnar.is_available():
+        raise ValueError("Columnar export requires pyarrow")
+    try:
+        dataset = payload["dataset"]
+        start, end = date.fromisoformat(payload["start"]), date.fromisoformat(payload["end"])
+    except (KeyError, TypeError) as e:
+        raise ValueError(f"Invalid export payload: {e}")
+    format = payload.get("format", "parquet")
+    if format not in columnar.FORMATS:
+        raise ValueError(f"Unknown format: {format}")
+    statement = analytics_export.get_statement(
+        dataset=dataset, start=datetime.combine(start, time.min), end=datetime.combine(end, time.min)
+    )
+
+    os.makedirs(settings.JOB_OUTPUT_DIR, exist_ok=True)
+    extension = "arrows" if format == "arrow" else "parquet"
+    path = os.path.join(
+        settings.JOB_OUTPUT_DIR, f"{dataset}-{start}-{end}-{datetime.now():%Y%m%d%H%M%S}.{extension}"
+    )
+    size = 0
+    with open(path, "wb") as output:
+        for chunk in columnar.stream(
+            analytics_export.get_columns(statement), analytics_export.iter_batches(db, statement),
+            format=format
+        ):
+            output.write(chunk)
+            size += len(chunk)
+    return {"path": path, "bytes": size, "media_type": columnar.FORMATS[format]}
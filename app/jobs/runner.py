@@ -0,0 +1,144 @@
+
+import logging
+import os
+import signal
+import socket
+import threading
+import time
+import traceback
+from typing import Any, Callable, Dict, List, Optional
+
+from fastapi import BackgroundTasks
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.crud.crud_job import job as crud_job
+from app.jobs.handlers import HANDLERS
+from app.models.job import Job
+
+logger = logging.getLogger(__name__)
+
+# How often a worker takes back jobs of dead workers, in seconds
+REQUEUE_INTERVAL = 60
+
+def run_job(db: Session, job: Job) -> Job:
+    """Run a claimed job and record the outcome"""
+    handler = HANDLERS.get(job.kind)
+    if handler is None:
+        return crud_job.fail(db, job=job, error=f"Unknown job kind: {job.kind}", permanent=True)
+    started = time.perf_counter()
+    try:
+        result = handler(db, dict(job.payload or {}))
+    except ValueError as e:
+        db.rollback()
+        logger.warning("Job %s (%s) rejected: %s", job.id, job.kind, e)
+        return crud_job.fail(db, job=job, error=str(e), permanent=True)
+    except Exception:
+        db.rollback()
+        logger.exception("Job %s (%s) failed on attempt %s", job.id, job.kind, job.attempts)
+        return crud_job.fail(db, job=job, error=traceback.format_exc(limit=5))
+    logger.info("Job %s (%s) done in %.3fs", job.id, job.kind, time.perf_counter() - started)
+    return crud_job.complete(db, job=job, result=result)
+
+def run_pending(db: Session, *, worker_id: str, kinds: Optional[List[str]] = None) -> int:
+    """Run due jobs until none is left; returns how many ran"""
+    ran = 0
+    while True:
+        claimed = crud_job.claim(db, worker_id=worker_id, kinds=kinds)
+        if claimed is None:
+            return ran
+        run_job(db, claimed)
+        ran += 1
+
+
+class Worker:
+    """
+    Polls the jobs table and runs one job at a time. Several workers can run
+    side by side, on one host or many; a stopped worker finishes its current
+    job first.
+    """
+
+    def __init__(
+        self, session_factory: Callable[[], Session], *, kinds: Optional[List[str]] = None,
+        poll_seconds: Optional[float] = None
+    ) -> None:
+        self.session_factory = session_factory
+        self.kinds = kinds
+        self.poll_seconds = settings.JOB_POLL_SECONDS if poll_seconds is None else poll_seconds
+        self.worker_id = f"{socket.gethostname()}:{os.getpid()}"
+        self._stopping = threading.Event()
+        self._last_requeue = 0.0
+
+    def run_once(self) -> bool:
+        """Run at most one job; returns whether there was one"""
+        db = self.session_factory()
+        try:
+            if time.monotonic() - self._last_requeue >= REQUEUE_INTERVAL:
+                self._last_requeue = time.monotonic()
+                requeued = crud_job.requeue_expired(db)
+                if requeued:
+                    logger.warning("Took back %s jobs with expired leases", requeued)
+            claimed = crud_job.claim(db, worker_id=self.worker_id, kinds=self.kinds)
+            if claimed is None:
+                return False
+            run_job(db, claimed)
+            return True
+        finally:
+            db.close()
+
+    def run_forever(self) -> None:
+        for signum in (signal.SIGINT, signal.SIGTERM):
+            signal.signal(signum, lambda *_: self.stop())
+        logger.info("Worker %s polling for %s", self.worker_id, ", ".join(self.kinds or HANDLERS))
+        while not self._stopping.is_set():
+            try:
+                busy = self.run_once()
+            except Exception:
+                # Most likely the database went away; keep polling
+                logger.exception("Worker loop failed")
+                busy = False
+            if not busy:
+                self._stopping.wait(self.poll_seconds)
+        logger.info("Worker %s stopped", self.worker_id)
+
+    def stop(self) -> None:
+        self._stopping.set()
+
+
+class JobQueue:
+    """
+    Enqueues jobs from endpoints. The job row is committed before the response,
+    so its id can be polled right away. With JOBS_RUN_INLINE set, the job is
+    then run by a background task of the same request instead of a worker, on
+    a session of its own: the request's session belongs to get_db, which may
+    already have closed it by then.
+    """
+
+    def __init__(
+        self, db: Session, background_tasks: BackgroundTasks, *,
+        session_factory: Callable[[], Session]
+    ) -> None:
+        self.db = db
+        self.background_tasks = background_tasks
+        self.session_factory = session_factory
+
+    def enqueue(
+        self, kind: str, payload: Optional[Dict[str, Any]] = None, *, priority: int = 0,
+        max_attempts: int = 3, created_by_id: Optional[int] = None
+    ) -> Job:
+        if kind not in HANDLERS:
+            raise ValueError(f"Unknown job kind: {kind}")
+        job = crud_job.enqueue(
+            self.db, kind=kind, payload=payload, priority=priority,
+            max_attempts=max_attempts, created_by_id=created_by_id
+        )
+        if settings.JOBS_RUN_INLINE:
+            self.background_tasks.add_task(self._run_inline)
+        return job
+
+    def _run_inline(self) -> None:
+        db = self.session_factory()
+        try:
+            run_pending(db, worker_id=f"inline:{os.getpid()}")
+        finally:
+            db.close()
@@ -1,11 +1,24 @@
 
+from typing import Any, Dict, Optional
+
+import orjson
 from fastapi import FastAPI
+from fastapi.responses import ORJSONResponse, Response
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.openapi.docs import get_swagger_ui_html, get_redoc_html
 from fastapi.openapi.utils import get_openapi
 
 from app.api.api_v1.api import api_router
+from app.cache.bus import invalidation_bus, make_backend
+from app.core import warmup
 from app.core.config import settings
+from app.db.session import get_db
+# Register the pool, threadpool and cache gauges, and the slow-query log
+from app.metrics import collectors, slow_queries
+from app.metrics.middleware import MetricsMiddleware
+from app.metrics import tracing
+from app.metrics.profiling import ProfilingMiddleware, instrument
+from app.metrics.registry import CONTENT_TYPE, registry
 
 app = FastAPI(
     title="Pool Time Scheduler API",
@@ -14,6 +27,7 @@ app = FastAPI(
     docs_url=None,
     redoc_url=None,
     openapi_url=None,
+    default_response_class=ORJSONResponse,
 )
 
 # Configure CORS
@@ -25,8 +39,74 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# Admin requests sent with "X-Profile: 1"; sessions as the endpoints get them (tests override it)
+app.add_middleware(
+    ProfilingMiddleware, sessions=lambda: app.dependency_overrides.get(get_db, get_db)()
+)
+
+app.add_middleware(tracing.TracingMiddleware)
+
+# Added last, so it is outermost and times everything else
+app.add_middleware(MetricsMiddleware)
+
 # Include our API router
 app.include_router(api_router, prefix=settings.API_V1_STR)
+instrument(app)
+
+# The schema only changes with the code, so it is built (and encoded) once per process
+_openapi_json: Optional[bytes] = None
+
+def custom_openapi() -> Dict[str, Any]:
+    if app.openapi_schema is None:
+        app.openapi_schema = get_openapi(
+            title="Pool Time Scheduler API",
+            version="1.0.0",
+            description="Backend API for managing swimming pool schedules, instructors, and visitors",
+            routes=app.routes,
+        )
+    return app.openapi_schema
+
+app.openapi = custom_openapi
+
+def openapi_json() -> bytes:
+    global _openapi_json
+    if _openapi_json is None:
+        _openapi_json = orjson.dumps(app.openapi())
+    return _openapi_json
+
+@app.on_event("startup")
+def start_invalidation_bus():
+    invalidation_bus.start(make_backend(settings.INVALIDATION_BUS))
+
+@app.on_event("shutdown")
+def stop_invalidation_bus():
+    invalidation_bus.stop()
+
+@app.on_event("startup")
+def start_tracing():
+    tracing.tracer.start(tracing.make_exporter(settings.TRACING_EXPORTER))
+    if tracing.tracer.enabled:
+        tracing.instrument(app)
+
+@app.on_event("shutdown")
+def stop_tracing():
+    # Exports the spans still waiting
+    tracing.tracer.stop()
+
+@app.on_event("startup")
+def warm_up():
+    # Use the same session provider as the endpoints (tests override it)
+    sessions = app.dependency_overrides.get(get_db, get_db)()
+    db = next(sessions)
+    try:
+        warmup.run(db, extra={"openapi": openapi_json})
+    finally:
+        sessions.close()
+
+@app.get("/metrics", include_in_schema=False)
+async def metrics():
+    # Async on purpose: metrics are written on the event loop, and read there too
+    return Response(registry.render(), media_type=CONTENT_TYPE)
 
 @app.get("/")
 async def root():
@@ -50,9 +130,4 @@ async def redoc_html():
 
 @app.get("/openapi.json", include_in_schema=False)
 async def get_open_api_endpoint():
-    return get_openapi(
-        title="Pool Time Scheduler API",
-        version="1.0.0",
-        description="Backend API for managing swimming pool schedules, instructors, and visitors",
-        routes=app.routes,
-    )
+    return Response(content=openapi_json(), media_type="application/json")
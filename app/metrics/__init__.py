@@ -0,0 +1,2 @@
+
+# Initialize the metrics package
@@ -0,0 +1,46 @@
+
+from typing import Iterable, List, Tuple
+
+import anyio.to_thread
+
+from app.cache.core import caches
+from app.db.session import engine
+from app.metrics.registry import Labels, registry
+
+# Gauges read at scrape time from state other code owns
+
+def _pool_state(method: str) -> List[Tuple[Labels, float]]:
+    # Pools without the notion (SQLite's) report nothing
+    read = getattr(engine.pool, method, None)
+    return [((), float(read()))] if read is not None else []
+
+def _threadpool() -> Iterable[Tuple[Labels, float]]:
+    # Runs on the event loop (the /metrics endpoint is async), where the limiter lives
+    limiter = anyio.to_thread.current_default_thread_limiter()
+    return [(("busy",), float(limiter.borrowed_tokens)), (("limit",), float(limiter.total_tokens))]
+
+def _cache_stat(field: str) -> Iterable[Tuple[Labels, float]]:
+    return [((cache.name,), float(getattr(cache.stats(), field))) for cache in list(caches.values())]
+
+
+registry.gauge(
+    "threadpool_threads", "Worker threads running sync endpoints: busy and limit", ("state",),
+    collect=_threadpool
+)
+registry.gauge("db_pool_size", "Configured connection pool size", collect=lambda: _pool_state("size"))
+registry.gauge(
+    "db_pool_checked_out", "Connections in use", collect=lambda: _pool_state("checkedout")
+)
+registry.gauge(
+    "db_pool_checked_in", "Idle connections in the pool", collect=lambda: _pool_state("checkedin")
+)
+registry.gauge(
+    "db_pool_overflow", "Connections open beyond the pool size", collect=lambda: _pool_state("overflow")
+)
+registry.gauge("cache_entries", "Entries held per cache", ("cache",), collect=lambda: _cache_stat("entries"))
+registry.counter("cache_hits_total", "Cache hits", ("cache",), collect=lambda: _cache_stat("hits"))
+registry.counter("cache_misses_total", "Cache misses", ("cache",), collect=lambda: _cache_stat("misses"))
+registry.counter(
+    "cache_invalidations_total", "Entries dropped by invalidation", ("cache",),
+    collect=lambda: _cache_stat("invalidations")
+)
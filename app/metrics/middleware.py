@@ -0,0 +1,115 @@
+
+from contextvars import ContextVar
+from time import perf_counter
+from typing import Any, Optional
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+from app.metrics.registry import registry
+
+# Requests are labelled with the route template ("/api/v1/groups/{group_id}"),
+# never the raw path, so the number of series stays bounded
+UNMATCHED = "<unmatched>"
+
+REQUEST_LABELS = ("method", "route")
+
+requests_total = registry.counter(
+    "http_requests_total", "Requests by route and status code", REQUEST_LABELS + ("status",)
+)
+request_seconds = registry.histogram(
+    "http_request_duration_seconds", "Request latency, up to the end of the response body", REQUEST_LABELS
+)
+db_queries_total = registry.counter(
+    "http_db_queries_total", "SQL statements executed by requests", REQUEST_LABELS
+)
+db_seconds = registry.histogram(
+    "http_db_duration_seconds", "Time a request spent executing SQL", REQUEST_LABELS
+)
+
+
+class QueryUsage:
+    """SQL executed on behalf of one request, filled in from whichever thread runs it"""
+
+    __slots__ = ("scope", "count", "seconds", "started")
+
+    def __init__(self, scope: Optional[dict] = None) -> None:
+        self.scope = scope
+        self.count = 0
+        self.seconds = 0.0
+        self.started = 0.0
+
+# Copied into the threadpool with the rest of the request's context, so sync
+# endpoints and dependencies add to the same object
+_query_usage: ContextVar[Optional[QueryUsage]] = ContextVar("query_usage", default=None)
+
+
+@event.listens_for(Engine, "before_cursor_execute")
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany) -> None:
+    usage = _query_usage.get()
+    if usage is not None:
+        usage.started = perf_counter()
+
+@event.listens_for(Engine, "after_cursor_execute")
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany) -> None:
+    usage = _query_usage.get()
+    if usage is not None:
+        usage.count += 1
+        usage.seconds += perf_counter() - usage.started
+
+def current_route() -> Optional[str]:
+    """Method and route template of the request running here, once routed"""
+    usage = _query_usage.get()
+    if usage is None or usage.scope is None:
+        return None
+    route = usage.scope.get("route")
+    return f"{usage.scope['method']} {getattr(route, 'path', UNMATCHED)}"
+
+
+# Updated from the event loop only
+_in_flight = [0]
+
+registry.gauge("http_requests_in_flight", "Requests being handled", collect=lambda: [((), _in_flight[0])])
+
+
+class MetricsMiddleware:
+    """
+    Pure ASGI middleware, so a request costs a context variable, a wrapped
+    `send` and a few dict updates, with no extra task or body buffering.
+    Everything is recorded on the event loop thread once the response ends.
+    """
+
+    def __init__(self, app: Any) -> None:
+        self.app = app
+
+    async def __call__(self, scope, receive, send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        status = 500
+
+        async def send_with_status(message) -> None:
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            await send(message)
+
+        usage = QueryUsage(scope)
+        token = _query_usage.set(usage)
+        _in_flight[0] += 1
+        started = perf_counter()
+        try:
+            await self.app(scope, receive, send_with_status)
+        finally:
+            elapsed = perf_counter() - started
+            _in_flight[0] -= 1
+            _query_usage.reset(token)
+            # Set by the router on a match, on the scope object shared with us
+            route = scope.get("route")
+            labels = (scope["method"], getattr(route, "path", UNMATCHED))
+            requests_total.inc(labels + (str(status),))
+            request_seconds.observe(labels, elapsed)
+            if usage.count:
+                db_queries_total.inc(labels, usage.count)
+                db_seconds.observe(labels, usage.seconds)
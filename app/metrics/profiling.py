@@ -0,0 +1,246 @@
+
+import asyncio
+import cProfile
+import functools
+import io
+import marshal
+import pstats
+import threading
+import uuid
+from collections import deque
+from contextvars import ContextVar
+from datetime import datetime
+from time import perf_counter
+from typing import Any, Callable, Deque, Dict, Generator, List, Optional
+
+from fastapi import FastAPI, HTTPException
+from fastapi.routing import APIRoute
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+from sqlalchemy.orm import Session
+from starlette.concurrency import run_in_threadpool
+from starlette.responses import JSONResponse
+
+from app.api import deps
+from app.core.config import settings
+
+# On-demand profiling of single requests. An admin sends `X-Profile: 1`; the
+# endpoint function then runs under cProfile, every SQL statement is recorded
+# with its time, and the result is kept in a small ring buffer under the id
+# returned in `X-Profile-Id` (see the /profiles endpoints). Requests without
+# the header pay one header lookup.
+
+PROFILE_HEADER = b"x-profile"
+PROFILE_ID_HEADER = b"x-profile-id"
+
+# Per profiled request, statements beyond this are counted but not kept
+MAX_STATEMENTS = 500
+
+
+class RequestProfile:
+    def __init__(self, method: str, path: str) -> None:
+        self.id = uuid.uuid4().hex
+        self.method = method
+        self.path = path
+        self.route: Optional[str] = None
+        self.status: Optional[int] = None
+        self.started_at = datetime.now()
+        self.duration_seconds = 0.0
+        self.db_seconds = 0.0
+        self.statement_count = 0
+        self.statements: List[Dict[str, Any]] = []
+        self.profiler = cProfile.Profile()
+        self._statement_started = 0.0
+        # Sync endpoints run in some threadpool thread; one at a time per profiler
+        self._lock = threading.Lock()
+
+    @property
+    def python_seconds(self) -> float:
+        """Wall time not spent executing SQL: Python, but also waiting for a thread or the client"""
+        return max(self.duration_seconds - self.db_seconds, 0.0)
+
+    def summary(self) -> Dict[str, Any]:
+        return {
+            "id": self.id,
+            "method": self.method,
+            "path": self.path,
+            "route": self.route,
+            "status": self.status,
+            "started_at": self.started_at,
+            "duration_seconds": self.duration_seconds,
+            "db_seconds": self.db_seconds,
+            "python_seconds": self.python_seconds,
+            "statement_count": self.statement_count,
+        }
+
+    def stats_text(self, *, sort: str = "cumulative", limit: int = 50) -> str:
+        output = io.StringIO()
+        try:
+            stats = pstats.Stats(self.profiler, stream=output)
+        except TypeError:
+            # The endpoint never ran (e.g. a dependency rejected the request)
+            return ""
+        stats.strip_dirs().sort_stats(sort).print_stats(limit)
+        return output.getvalue()
+
+    def pstats_dump(self) -> bytes:
+        """The profile in the format of Profile.dump_stats, for pstats or snakeviz"""
+        self.profiler.create_stats()
+        return marshal.dumps(self.profiler.stats)
+
+
+class ProfileStore:
+    def __init__(self, size: int) -> None:
+        self._profiles: Deque[RequestProfile] = deque(maxlen=size)
+        self._lock = threading.Lock()
+
+    def add(self, profile: RequestProfile) -> None:
+        with self._lock:
+            self._profiles.append(profile)
+
+    def get(self, profile_id: str) -> Optional[RequestProfile]:
+        with self._lock:
+            return next((p for p in self._profiles if p.id == profile_id), None)
+
+    def list(self) -> List[RequestProfile]:
+        """Newest first"""
+        with self._lock:
+            return list(reversed(self._profiles))
+
+    def clear(self) -> None:
+        with self._lock:
+            self._profiles.clear()
+
+
+profiles = ProfileStore(settings.PROFILE_HISTORY)
+
+# Copied into the threadpool with the request's context
+_current: ContextVar[Optional[RequestProfile]] = ContextVar("request_profile", default=None)
+
+
+@event.listens_for(Engine, "before_cursor_execute")
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany) -> None:
+    profile = _current.get()
+    if profile is not None:
+        profile._statement_started = perf_counter()
+
+@event.listens_for(Engine, "after_cursor_execute")
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany) -> None:
+    profile = _current.get()
+    if profile is None:
+        return
+    seconds = perf_counter() - profile._statement_started
+    profile.db_seconds += seconds
+    profile.statement_count += 1
+    if len(profile.statements) < MAX_STATEMENTS:
+        profile.statements.append({
+            "statement": statement,
+            "parameters": repr(parameters)[:500],
+            "seconds": seconds,
+        })
+
+
+def _profiled(call: Callable[..., Any]) -> Callable[..., Any]:
+    """Wrap an endpoint function so it runs under the request's profiler, if any"""
+    if asyncio.iscoroutinefunction(call):
+        @functools.wraps(call)
+        async def profiled_async(*args: Any, **kwargs: Any) -> Any:
+            profile = _current.get()
+            if profile is None:
+                return await call(*args, **kwargs)
+            # On the event loop, other requests' work between awaits is included too
+            profile.profiler.enable()
+            try:
+                return await call(*args, **kwargs)
+            finally:
+                profile.profiler.disable()
+        return profiled_async
+
+    @functools.wraps(call)
+    def profiled(*args: Any, **kwargs: Any) -> Any:
+        profile = _current.get()
+        if profile is None:
+            return call(*args, **kwargs)
+        # cProfile only follows the thread that enabled it, so this runs in the
+        # threadpool thread executing the endpoint
+        with profile._lock:
+            profile.profiler.enable()
+            try:
+                return call(*args, **kwargs)
+            finally:
+                profile.profiler.disable()
+    return profiled
+
+def instrument(app: FastAPI) -> None:
+    """Make every endpoint of `app` profileable; call once the routers are included"""
+    for route in app.routes:
+        if isinstance(route, APIRoute) and not getattr(route.dependant.call, "profiled", False):
+            # The request handler reads `dependant.call` on every request
+            route.dependant.call = _profiled(route.dependant.call)
+            route.dependant.call.profiled = True
+
+
+def _header(scope, name: bytes) -> Optional[bytes]:
+    for key, value in scope["headers"]:
+        if key == name:
+            return value
+    return None
+
+def _is_admin(sessions: Callable[[], Generator[Session, None, None]], token: str) -> bool:
+    generator = sessions()
+    db = next(generator)
+    try:
+        current_user = deps.get_current_user(db, token)
+        deps.get_current_admin(deps.get_current_active_user(current_user))
+        return True
+    except HTTPException:
+        return False
+    finally:
+        generator.close()
+
+
+class ProfilingMiddleware:
+    """
+    Starts a RequestProfile for admin requests carrying `X-Profile: 1`. The
+    bearer token goes through the same dependencies as admin endpoints;
+    anyone else asking for a profile gets 403.
+    """
+
+    def __init__(self, app: Any, *, sessions: Callable[[], Generator[Session, None, None]]) -> None:
+        self.app = app
+        self.sessions = sessions
+
+    async def __call__(self, scope, receive, send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        if _header(scope, PROFILE_HEADER) not in (b"1", b"true"):
+            await self.app(scope, receive, send)
+            return
+
+        authorization = (_header(scope, b"authorization") or b"").decode("latin-1")
+        scheme, _, bearer = authorization.partition(" ")
+        if scheme.lower() != "bearer" or not await run_in_threadpool(_is_admin, self.sessions, bearer):
+            response = JSONResponse({"detail": "Only admins can profile requests"}, status_code=403)
+            await response(scope, receive, send)
+            return
+
+        profile = RequestProfile(scope["method"], scope["path"])
+
+        async def send_with_id(message) -> None:
+            if message["type"] == "http.response.start":
+                profile.status = message["status"]
+                message["headers"] = list(message.get("headers", [])) + [
+                    (PROFILE_ID_HEADER, profile.id.encode())
+                ]
+            await send(message)
+
+        token = _current.set(profile)
+        started = perf_counter()
+        try:
+            await self.app(scope, receive, send_with_id)
+        finally:
+            profile.duration_seconds = perf_counter() - started
+            _current.reset(token)
+            profile.route = getattr(scope.get("route"), "path", None)
+            profiles.add(profile)
@@ -0,0 +1,143 @@
+
+import math
+from abc import ABC, abstractmethod
+from bisect import bisect_left
+from typing import Callable, Dict, Iterable, Iterator, List, Optional, Sequence, Tuple
+
+# A minimal Prometheus client: counters, gauges and histograms rendered in the
+# text exposition format. Updates are plain dict operations without locks, so
+# metrics must only be written from one thread (the event loop); values owned
+# by other threads are read at scrape time through gauge callbacks instead.
+
+Labels = Tuple[str, ...]
+Sample = Tuple[str, Labels, float]
+
+# Prometheus' own defaults, in seconds
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+
+class Metric(ABC):
+    kind = "untyped"
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()) -> None:
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+
+    @abstractmethod
+    def samples(self) -> Iterator[Sample]:
+        pass
+
+
+class Counter(Metric):
+    """A value that only goes up, or one read at scrape time from `collect`"""
+
+    kind = "counter"
+
+    def __init__(
+        self, name: str, documentation: str, labelnames: Sequence[str] = (),
+        collect: Optional[Callable[[], Iterable[Tuple[Labels, float]]]] = None
+    ) -> None:
+        super().__init__(name, documentation, labelnames)
+        self.values: Dict[Labels, float] = {}
+        self.collect = collect
+
+    def inc(self, labels: Labels = (), amount: float = 1.0) -> None:
+        self.values[labels] = self.values.get(labels, 0.0) + amount
+
+    def samples(self) -> Iterator[Sample]:
+        values = self.collect() if self.collect is not None else list(self.values.items())
+        for labels, value in values:
+            yield self.name, labels, value
+
+
+class Gauge(Counter):
+    kind = "gauge"
+
+    def set(self, labels: Labels = (), value: float = 0.0) -> None:
+        self.values[labels] = value
+
+
+class Histogram(Metric):
+    kind = "histogram"
+
+    def __init__(
+        self, name: str, documentation: str, labelnames: Sequence[str] = (),
+        buckets: Sequence[float] = DEFAULT_BUCKETS
+    ) -> None:
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(sorted(buckets))
+        # Per label set: a count per bucket (not cumulative) plus the +Inf one, then the sum
+        self.values: Dict[Labels, List[float]] = {}
+
+    def observe(self, labels: Labels, value: float) -> None:
+        entry = self.values.get(labels)
+        if entry is None:
+            entry = self.values[labels] = [0] * (len(self.buckets) + 2)
+        entry[bisect_left(self.buckets, value)] += 1
+        entry[-1] += value
+
+    def samples(self) -> Iterator[Sample]:
+        bounds = [format_value(bound) for bound in self.buckets] + ["+Inf"]
+        for labels, entry in list(self.values.items()):
+            entry = list(entry)
+            total = 0
+            for bound, count in zip(bounds, entry):
+                total += count
+                yield self.name + "_bucket", labels + (bound,), total
+            yield self.name + "_sum", labels, entry[-1]
+            yield self.name + "_count", labels, total
+
+
+def format_value(value: float) -> str:
+    if math.isnan(value):
+        return "NaN"
+    if math.isinf(value):
+        return "+Inf" if value > 0 else "-Inf"
+    if value == int(value) and abs(value) < 1e15:
+        return f"{int(value)}.0"
+    return repr(float(value))
+
+def escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+class Registry:
+    def __init__(self) -> None:
+        self.metrics: Dict[str, Metric] = {}
+
+    def register(self, metric: Metric) -> Metric:
+        if metric.name in self.metrics:
+            raise ValueError(f"Metric {metric.name} is already registered")
+        self.metrics[metric.name] = metric
+        return metric
+
+    def counter(self, name: str, documentation: str, labelnames: Sequence[str] = (), **kwargs) -> Counter:
+        return self.register(Counter(name, documentation, labelnames, **kwargs))
+
+    def gauge(self, name: str, documentation: str, labelnames: Sequence[str] = (), **kwargs) -> Gauge:
+        return self.register(Gauge(name, documentation, labelnames, **kwargs))
+
+    def histogram(self, name: str, documentation: str, labelnames: Sequence[str] = (), **kwargs) -> Histogram:
+        return self.register(Histogram(name, documentation, labelnames, **kwargs))
+
+    def render(self) -> str:
+        lines: List[str] = []
+        for metric in self.metrics.values():
+            lines.append(f"# HELP {metric.name} {escape(metric.documentation)}")
+            lines.append(f"# TYPE {metric.name} {metric.kind}")
+            labelnames = metric.labelnames + (("le",) if metric.kind == "histogram" else ())
+            for name, labels, value in metric.samples():
+                if labels:
+                    pairs = ",".join(
+                        f'{label}="{escape(str(part))}"' for label, part in zip(labelnames, labels)
+                    )
+                    lines.append(f"{name}{{{pairs}}} {format_value(value)}")
+                else:
+                    lines.append(f"{name} {format_value(value)}")
+        return "\n".join(lines) + "\n"
+
+
+registry = Registry()
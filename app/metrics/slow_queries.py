@@ -0,0 +1,165 @@
+
+import itertools
+import logging
+import sys
+import threading
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from time import perf_counter
+from types import FrameType
+from typing import Any, Deque, Dict, List, Optional
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+from app.core.config import settings
+from app.metrics.middleware import current_route
+
+logger = logging.getLogger(__name__)
+
+# Slow-query log: statements slower than SLOW_QUERY_SECONDS are logged with
+# their parameters, the route and the CRUD method that ran them, and kept in a
+# ring buffer. Their plan is captured with EXPLAIN on a separate connection in
+# a background thread, so the request that was already slow does not also wait
+# for the plan.
+
+STARTED = "slow_query_started"
+
+# Plans waiting beyond this are skipped rather than queued (a slow database
+# produces slow queries faster than it can explain them)
+MAX_PENDING_EXPLAINS = 10
+
+# Statements whose plan can be taken with ANALYZE, which runs them again
+READ_ONLY = ("select", "with")
+
+
+def _frame_name(frame: FrameType) -> str:
+    # code.co_qualname only exists from Python 3.11
+    name = frame.f_code.co_name
+    owner = frame.f_locals.get("self")
+    if owner is not None:
+        name = f"{type(owner).__name__}.{name}"
+    return f"{frame.f_globals.get('__name__', '')}.{name}"
+
+def _source() -> Optional[str]:
+    """The innermost CRUD method on the stack, else the innermost application frame"""
+    frame: Optional[FrameType] = sys._getframe(2)
+    fallback = None
+    while frame is not None:
+        module = frame.f_globals.get("__name__", "")
+        if module.startswith("app.crud."):
+            return _frame_name(frame)
+        if fallback is None and module.startswith("app.") and not module.startswith("app.metrics."):
+            fallback = _frame_name(frame)
+        frame = frame.f_back
+    return fallback
+
+
+class SlowQueryLog:
+    def __init__(self, size: int) -> None:
+        self._entries: Deque[Dict[str, Any]] = deque(maxlen=size)
+        self._lock = threading.Lock()
+        self._ids = itertools.count(1)
+        self._explainer = ThreadPoolExecutor(max_workers=1, thread_name_prefix="explain")
+        self._pending = 0
+        # Set in the explain thread, whose own statements are not logged
+        self._local = threading.local()
+
+    def record(
+        self, conn: Any, *, statement: str, parameters: Any, seconds: float, executemany: bool
+    ) -> Dict[str, Any]:
+        entry: Dict[str, Any] = {
+            "id": next(self._ids),
+            "at": datetime.now(),
+            "seconds": seconds,
+            "statement": statement,
+            "parameters": repr(parameters)[:1000],
+            "route": current_route(),
+            "source": _source(),
+            "plan": None,
+            "plan_error": None,
+        }
+        logger.warning(
+            "Slow query (%.3fs) from %s via %s: %s; parameters %s",
+            seconds, entry["route"] or "no request", entry["source"], statement, entry["parameters"]
+        )
+        with self._lock:
+            self._entries.append(entry)
+            explain = not executemany and self._pending < MAX_PENDING_EXPLAINS
+            if explain:
+                self._pending += 1
+        if explain:
+            self._explainer.submit(self._explain, conn.engine, entry, statement, parameters)
+        else:
+            entry["plan_error"] = "Not explained"
+        return entry
+
+    def _explain(self, engine: Engine, entry: Dict[str, Any], statement: str, parameters: Any) -> None:
+        self._local.explaining = True
+        try:
+            with engine.connect() as connection:
+                if engine.dialect.name == "sqlite":
+                    prefix = "EXPLAIN QUERY PLAN "
+                elif (
+                    settings.SLOW_QUERY_EXPLAIN_ANALYZE
+                    and statement.lstrip().lower().startswith(READ_ONLY)
+                ):
+                    prefix = "EXPLAIN (ANALYZE, BUFFERS) "
+                else:
+                    prefix = "EXPLAIN "
+                rows = connection.exec_driver_sql(prefix + statement, parameters).fetchall()
+            entry["plan"] = "\n".join(" ".join(str(value) for value in row) for row in rows)
+        except Exception as e:
+            entry["plan_error"] = str(e)
+        finally:
+            self._local.explaining = False
+            with self._lock:
+                self._pending -= 1
+
+    def explaining(self) -> bool:
+        return getattr(self._local, "explaining", False)
+
+    def list(self) -> List[Dict[str, Any]]:
+        """Newest first"""
+        with self._lock:
+            return list(reversed(self._entries))
+
+    def flush(self, timeout: Optional[float] = None) -> None:
+        """Wait until the plans queued so far are captured"""
+        self._explainer.submit(lambda: None).result(timeout)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+
+slow_query_log = SlowQueryLog(settings.SLOW_QUERY_HISTORY)
+
+
+@event.listens_for(Engine, "before_cursor_execute")
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany) -> None:
+    if settings.SLOW_QUERY_SECONDS > 0:
+        conn.info.setdefault(STARTED, []).append(perf_counter())
+
+@event.listens_for(Engine, "after_cursor_execute")
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany) -> None:
+    started = conn.info.get(STARTED)
+    if not started:
+        return
+    seconds = perf_counter() - started.pop()
+    if seconds >= settings.SLOW_QUERY_SECONDS > 0 and not slow_query_log.explaining():
+        # An error here would surface from the statement's execute call
+        try:
+            slow_query_log.record(
+                conn, statement=statement, parameters=parameters, seconds=seconds, executemany=executemany
+            )
+        except Exception:
+            logger.exception("Failed to record a slow query")
+
+@event.listens_for(Engine, "handle_error")
+def _handle_error(exception_context) -> None:
+    # A failed statement never reaches after_cursor_execute
+    connection = exception_context.connection
+    if connection is not None and connection.info.get(STARTED):
+        connection.info[STARTED].pop()
@@ -0,0 +1,437 @@
+
+import asyncio
+import functools
+import inspect
+import json
+import logging
+import random
+import threading
+import time
+import urllib.request
+from abc import ABC, abstractmethod
+from contextlib import contextmanager
+from contextvars import ContextVar
+from enum import IntEnum
+from typing import Any, Callable, Dict, Iterator, List, Optional, Tuple, Type, TypeVar
+
+from fastapi import FastAPI
+from fastapi.dependencies.models import Dependant
+from fastapi.routing import APIRoute
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+# Request tracing: a server span per sampled request, with child spans for the
+# endpoint function and its dependencies, the CRUD methods they call and the
+# SQL statements those run. The current span lives in a context variable, so
+# the spans nest across the threadpool like the rest of the request context.
+# Finished spans are batched by a background thread to an exporter: OTLP/JSON
+# over HTTP (any OpenTelemetry collector) or a file of OTLP/JSON lines.
+# Outside a sampled request every hook costs one context variable lookup.
+
+SPANS = "trace_spans"
+
+# Export at least this often, and as soon as this many spans are waiting;
+# beyond MAX_PENDING_SPANS new spans are dropped until the exporter catches up
+EXPORT_INTERVAL_SECONDS = 5.0
+BATCH_SIZE = 512
+MAX_PENDING_SPANS = 8192
+
+CallableType = TypeVar("CallableType", bound=Callable[..., Any])
+ClassType = TypeVar("ClassType", bound=Type[Any])
+
+
+class SpanKind(IntEnum):
+    # Values of the OTLP enum
+    INTERNAL = 1
+    SERVER = 2
+    CLIENT = 3
+
+
+class Span:
+    __slots__ = (
+        "trace_id", "span_id", "parent_id", "name", "kind", "start_ns", "end_ns", "attributes", "error"
+    )
+
+    def __init__(
+        self, name: str, *, trace_id: str, parent_id: Optional[str], kind: SpanKind,
+        attributes: Optional[Dict[str, Any]] = None
+    ) -> None:
+        self.trace_id = trace_id
+        self.span_id = f"{random.getrandbits(64):016x}"
+        self.parent_id = parent_id
+        self.name = name
+        self.kind = kind
+        self.start_ns = time.time_ns()
+        self.end_ns = 0
+        self.attributes = attributes or {}
+        self.error: Optional[str] = None
+
+    def child(self, name: str, *, kind: SpanKind = SpanKind.INTERNAL, **attributes: Any) -> "Span":
+        return Span(name, trace_id=self.trace_id, parent_id=self.span_id, kind=kind, attributes=attributes)
+
+    def record_error(self, error: BaseException) -> None:
+        self.error = f"{type(error).__name__}: {error}"
+
+    def end(self) -> None:
+        self.end_ns = time.time_ns()
+        tracer.finished(self)
+
+
+class SpanExporter(ABC):
+    @abstractmethod
+    def export(self, spans: List[Span]) -> None:
+        pass
+
+    def shutdown(self) -> None:
+        pass
+
+
+class InMemoryExporter(SpanExporter):
+    """Keeps the spans, for tests"""
+
+    def __init__(self) -> None:
+        self.spans: List[Span] = []
+
+    def export(self, spans: List[Span]) -> None:
+        self.spans.extend(spans)
+
+
+class OTLPHTTPExporter(SpanExporter):
+    """POSTs OTLP/JSON to a collector's traces endpoint, e.g. http://collector:4318/v1/traces"""
+
+    def __init__(self, endpoint: str, *, timeout: float = 5.0) -> None:
+        self.endpoint = endpoint
+        self.timeout = timeout
+
+    def export(self, spans: List[Span]) -> None:
+        request = urllib.request.Request(
+            self.endpoint, data=json.dumps(to_otlp(spans)).encode(),
+            headers={"Content-Type": "application/json"}, method="POST"
+        )
+        with urllib.request.urlopen(request, timeout=self.timeout) as response:
+            response.read()
+
+
+class FileExporter(SpanExporter):
+    """Appends one OTLP/JSON document per batch, ready to replay to a collector"""
+
+    def __init__(self, path: str) -> None:
+        self.path = path
+        self._lock = threading.Lock()
+
+    def export(self, spans: List[Span]) -> None:
+        line = json.dumps(to_otlp(spans), separators=(",", ":"))
+        with self._lock, open(self.path, "a") as file:
+            file.write(line + "\n")
+
+
+def _otlp_value(value: Any) -> Dict[str, Any]:
+    if isinstance(value, bool):
+        return {"boolValue": value}
+    if isinstance(value, int):
+        return {"intValue": str(value)}
+    if isinstance(value, float):
+        return {"doubleValue": value}
+    return {"stringValue": str(value)}
+
+def to_otlp(spans: List[Span]) -> Dict[str, Any]:
+    """ExportTraceServiceRequest in the OTLP/JSON encoding"""
+    return {"resourceSpans": [{
+        "resource": {"attributes": [
+            {"key": "service.name", "value": {"stringValue": settings.TRACING_SERVICE_NAME}}
+        ]},
+        "scopeSpans": [{
+            "scope": {"name": __name__},
+            "spans": [{
+                "traceId": span.trace_id,
+                "spanId": span.span_id,
+                **({"parentSpanId": span.parent_id} if span.parent_id else {}),
+                "name": span.name,
+                "kind": int(span.kind),
+                "startTimeUnixNano": str(span.start_ns),
+                "endTimeUnixNano": str(span.end_ns),
+                "attributes": [
+                    {"key": key, "value": _otlp_value(value)} for key, value in span.attributes.items()
+                ],
+                # STATUS_CODE_ERROR, or UNSET
+                "status": {"code": 2, "message": span.error} if span.error else {},
+            } for span in spans],
+        }],
+    }]}
+
+
+class Tracer:
+    def __init__(self) -> None:
+        self.exporter: Optional[SpanExporter] = None
+        self.dropped = 0
+        self._pending: List[Span] = []
+        self._condition = threading.Condition()
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def enabled(self) -> bool:
+        return self.exporter is not None
+
+    def start(self, exporter: Optional[SpanExporter]) -> None:
+        self.stop()
+        self.exporter = exporter
+        if exporter is not None:
+            self._thread = threading.Thread(target=self._run, name="trace-export", daemon=True)
+            self._thread.start()
+
+    def stop(self) -> None:
+        exporter, thread = self.exporter, self._thread
+        self.exporter = self._thread = None
+        if thread is not None:
+            with self._condition:
+                self._condition.notify()
+            thread.join(timeout=10)
+        if exporter is not None:
+            self._export(exporter, self._take(len(self._pending)))
+            exporter.shutdown()
+
+    def start_trace(self, name: str, *, traceparent: Optional[str] = None, **attributes: Any) -> Optional[Span]:
+        """A root span, continuing the caller's W3C trace context if any; None when not sampled"""
+        parent = _parse_traceparent(traceparent) if traceparent else None
+        if parent is not None:
+            trace_id, parent_id, sampled = parent
+        else:
+            trace_id = f"{random.getrandbits(128):032x}"
+            parent_id = None
+            sampled = random.random() < settings.TRACING_SAMPLE_RATE
+        if not sampled:
+            return None
+        return Span(name, trace_id=trace_id, parent_id=parent_id, kind=SpanKind.SERVER, attributes=attributes)
+
+    def finished(self, span: Span) -> None:
+        with self._condition:
+            if len(self._pending) >= MAX_PENDING_SPANS:
+                self.dropped += 1
+                return
+            self._pending.append(span)
+            if len(self._pending) >= BATCH_SIZE:
+                self._condition.notify()
+
+    def flush(self) -> None:
+        """Export everything finished so far, in the calling thread"""
+        if self.exporter is not None:
+            self._export(self.exporter, self._take(len(self._pending)))
+
+    def _take(self, count: int) -> List[Span]:
+        with self._condition:
+            batch, self._pending = self._pending[:count], self._pending[count:]
+            return batch
+
+    def _export(self, exporter: SpanExporter, spans: List[Span]) -> None:
+        if spans:
+            try:
+                exporter.export(spans)
+            except Exception as e:
+                logger.warning("Dropped %d spans, the exporter failed: %s", len(spans), e)
+
+    def _run(self) -> None:
+        while True:
+            with self._condition:
+                if len(self._pending) < BATCH_SIZE:
+                    self._condition.wait(EXPORT_INTERVAL_SECONDS)
+            exporter = self.exporter
+            if exporter is None:
+                return
+            self._export(exporter, self._take(BATCH_SIZE))
+
+
+tracer = Tracer()
+
+_current: ContextVar[Optional[Span]] = ContextVar("current_span", default=None)
+
+
+def _parse_traceparent(value: str) -> Optional[Tuple[str, str, bool]]:
+    parts = value.strip().split("-")
+    if len(parts) != 4 or len(parts[1]) != 32 or len(parts[2]) != 16 or len(parts[3]) != 2:
+        return None
+    try:
+        flags = int(parts[3], 16)
+        int(parts[1], 16), int(parts[2], 16)
+    except ValueError:
+        return None
+    return parts[1], parts[2], bool(flags & 1)
+
+def current_span() -> Optional[Span]:
+    return _current.get()
+
+@contextmanager
+def span(name: str, *, kind: SpanKind = SpanKind.INTERNAL, **attributes: Any) -> Iterator[Optional[Span]]:
+    """A child of the current span for the duration of the block; nothing outside a trace"""
+    parent = _current.get()
+    if parent is None:
+        yield None
+        return
+    child = parent.child(name, kind=kind, **attributes)
+    token = _current.set(child)
+    try:
+        yield child
+    except BaseException as e:
+        child.record_error(e)
+        raise
+    finally:
+        _current.reset(token)
+        child.end()
+
+def traced(name: str, **attributes: Any) -> Callable[[CallableType], CallableType]:
+    """Run the decorated function (sync or async) in a span named `name`"""
+    def decorator(call: CallableType) -> CallableType:
+        if asyncio.iscoroutinefunction(call):
+            @functools.wraps(call)
+            async def traced_async(*args: Any, **kwargs: Any) -> Any:
+                if _current.get() is None:
+                    return await call(*args, **kwargs)
+                with span(name, **attributes):
+                    return await call(*args, **kwargs)
+            traced_async.traced = True
+            return traced_async
+
+        @functools.wraps(call)
+        def traced_sync(*args: Any, **kwargs: Any) -> Any:
+            if _current.get() is None:
+                return call(*args, **kwargs)
+            with span(name, **attributes):
+                return call(*args, **kwargs)
+        traced_sync.traced = True
+        return traced_sync
+    return decorator
+
+def traced_methods(cls: ClassType) -> ClassType:
+    """
+    Class decorator for CRUD classes: every public method defined on the class
+    that takes a session (`db`) runs in a span named "Class.method".
+    """
+    for name, value in list(vars(cls).items()):
+        if name.startswith("_") or not inspect.isfunction(value) or inspect.isgeneratorfunction(value):
+            continue
+        parameters = list(inspect.signature(value).parameters)
+        if parameters[1:2] == ["db"]:
+            setattr(cls, name, traced(
+                f"{cls.__name__}.{name}", **{"code.namespace": cls.__name__, "code.function": name}
+            )(value))
+    return cls
+
+
+# Dependencies shared by many routes get one wrapper, so FastAPI's
+# per-request dependency cache (keyed by the callable) still dedupes them
+_wrapped: Dict[Callable[..., Any], Callable[..., Any]] = {}
+
+def _wrap(call: Any, name: str) -> Any:
+    if not inspect.isfunction(call) or getattr(call, "traced", False):
+        return call
+    if inspect.isgeneratorfunction(call) or inspect.isasyncgenfunction(call):
+        # FastAPI tells yield dependencies apart by their function type
+        return call
+    if call not in _wrapped:
+        _wrapped[call] = traced(name, **{"code.function": call.__name__})(call)
+    return _wrapped[call]
+
+def _instrument_dependencies(dependant: Dependant) -> None:
+    for dependency in dependant.dependencies:
+        _instrument_dependencies(dependency)
+        dependency.call = _wrap(dependency.call, f"dependency {getattr(dependency.call, '__name__', '')}")
+
+def instrument(app: FastAPI) -> None:
+    """
+    Give the endpoint functions and their dependencies spans. Dependency
+    overrides must then be registered for the wrapped callables, which is why
+    this only runs when tracing is on; and while any override is set, FastAPI
+    rebuilds nested dependencies from signatures, so only direct ones get spans.
+    """
+    for route in app.routes:
+        if isinstance(route, APIRoute):
+            _instrument_dependencies(route.dependant)
+            route.dependant.call = _wrap(route.dependant.call, f"endpoint {route.name}")
+
+
+@event.listens_for(Engine, "before_cursor_execute")
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany) -> None:
+    parent = _current.get()
+    if parent is not None:
+        words = statement.split(None, 1)
+        conn.info.setdefault(SPANS, []).append(parent.child(
+            words[0].upper() if words else "SQL", kind=SpanKind.CLIENT, **{
+                "db.system": conn.dialect.name,
+                "db.statement": statement[:2000],
+                "db.executemany": executemany,
+            }
+        ))
+
+@event.listens_for(Engine, "after_cursor_execute")
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany) -> None:
+    if _current.get() is not None and conn.info.get(SPANS):
+        sql_span = conn.info[SPANS].pop()
+        if cursor.rowcount is not None and cursor.rowcount >= 0:
+            sql_span.attributes["db.rowcount"] = cursor.rowcount
+        sql_span.end()
+
+@event.listens_for(Engine, "handle_error")
+def _handle_error(exception_context) -> None:
+    connection = exception_context.connection
+    if connection is not None and connection.info.get(SPANS):
+        sql_span = connection.info[SPANS].pop()
+        sql_span.record_error(exception_context.original_exception)
+        sql_span.end()
+
+
+class TracingMiddleware:
+    """Opens the server span of sampled requests; named after the route template once routed"""
+
+    def __init__(self, app: Any) -> None:
+        self.app = app
+
+    async def __call__(self, scope, receive, send) -> None:
+        if scope["type"] != "http" or not tracer.enabled:
+            await self.app(scope, receive, send)
+            return
+        traceparent = next((v for k, v in scope["headers"] if k == b"traceparent"), None)
+        root = tracer.start_trace(
+            scope["method"], traceparent=traceparent.decode("latin-1") if traceparent else None, **{
+                "http.method": scope["method"],
+                "http.target": scope["path"],
+            }
+        )
+        if root is None:
+            await self.app(scope, receive, send)
+            return
+
+        async def send_with_status(message) -> None:
+            if message["type"] == "http.response.start":
+                root.attributes["http.status_code"] = message["status"]
+                if message["status"] >= 500:
+                    root.error = f"HTTP {message['status']}"
+            await send(message)
+
+        token = _current.set(root)
+        try:
+            await self.app(scope, receive, send_with_status)
+        except BaseException as e:
+            root.record_error(e)
+            raise
+        finally:
+            _current.reset(token)
+            route = scope.get("route")
+            if route is not None:
+                root.name = f"{scope['method']} {route.path}"
+                root.attributes["http.route"] = route.path
+            root.end()
+
+
+def make_exporter(name: str) -> Optional[SpanExporter]:
+    if not name:
+        return None
+    if name == "otlp":
+        return OTLPHTTPExporter(settings.TRACING_OTLP_ENDPOINT)
+    if name == "file":
+        return FileExporter(settings.TRACING_FILE)
+    if name == "memory":
+        return InMemoryExporter()
+    raise ValueError(f"Unknown trace exporter: {name}")
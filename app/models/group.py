@@ -1,26 +1,39 @@
 
-from sqlalchemy import Column, Integer, String, DateTime, ForeignKey, Text
+from sqlalchemy import Column, Integer, String, DateTime, ForeignKey, Text, Index, DDL, UniqueConstraint, event
 from sqlalchemy.orm import relationship
 
 from app.db.base_class import Base, BaseModel
 from datetime import datetime, timedelta
 
+# Name shared by the PostgreSQL exclusion constraint and the SQLite trigger error,
+# so a lost double-booking race can be told apart from other integrity errors
+OVERLAP_CONSTRAINT = "groups_instructor_no_overlap"
+
 class Group(Base, BaseModel):
     __tablename__ = "groups"
+    __table_args__ = (
+        Index("ix_groups_instructor_id_start_time", "instructor_id", "start_time"),
+        UniqueConstraint("series_id", "occurrence_start", name="uq_groups_series_occurrence"),
+    )
 
     name = Column(String, nullable=False)
     description = Column(Text, nullable=True)
     capacity = Column(Integer, nullable=False)
     max_male = Column(Integer, nullable=False)
     max_female = Column(Integer, nullable=False)
-    start_time = Column(DateTime, nullable=False)
+    start_time = Column(DateTime, nullable=False, index=True)
     end_time = Column(DateTime, nullable=False)
     
     # Foreign keys
     instructor_id = Column(Integer, ForeignKey("users.id"), nullable=True)
+    series_id = Column(Integer, ForeignKey("group_series.id"), nullable=True)
+    
+    # Set on groups materialized from a series: the occurrence they stand for
+    occurrence_start = Column(DateTime, nullable=True)
     
     # Relationships
     instructor = relationship("User", back_populates="groups")
+    series = relationship("GroupSeries", back_populates="groups")
     registrations = relationship("Registration", back_populates="group", cascade="all, delete-orphan")
     
     @property
@@ -60,3 +73,39 @@ class Group(Base, BaseModel):
     def is_female_full(self):
         """Check if the female capacity is reached"""
         return self.current_female_participants >= self.max_female
+
+
+# PostgreSQL: a generated tsrange column and an exclusion constraint (backed by a
+# GiST index) reject two groups of one instructor whose [start, end) slots overlap
+POSTGRES_OVERLAP_GUARD = [
+    "CREATE EXTENSION IF NOT EXISTS btree_gist",
+    "ALTER TABLE groups ADD COLUMN slot tsrange "
+    "GENERATED ALWAYS AS (tsrange(start_time, end_time, '[)')) STORED",
+    f"ALTER TABLE groups ADD CONSTRAINT {OVERLAP_CONSTRAINT} "
+    "EXCLUDE USING gist (instructor_id WITH =, slot WITH &&) WHERE (instructor_id IS NOT NULL)",
+]
+
+# SQLite has neither range types nor exclusion constraints; triggers answer the
+# same question with the (instructor_id, start_time) index
+_SQLITE_OVERLAP_CHECK = f"""
+WHEN NEW.instructor_id IS NOT NULL AND EXISTS (
+    SELECT 1 FROM groups
+    WHERE instructor_id = NEW.instructor_id AND id IS NOT NEW.id
+      AND start_time < NEW.end_time AND end_time > NEW.start_time
+)
+BEGIN
+    SELECT RAISE(ABORT, '{OVERLAP_CONSTRAINT}');
+END"""
+
+SQLITE_OVERLAP_GUARD = [
+    f"CREATE TRIGGER IF NOT EXISTS {OVERLAP_CONSTRAINT}_insert BEFORE INSERT ON groups"
+    + _SQLITE_OVERLAP_CHECK,
+    f"CREATE TRIGGER IF NOT EXISTS {OVERLAP_CONSTRAINT}_update "
+    "BEFORE UPDATE OF instructor_id, start_time, end_time ON groups"
+    + _SQLITE_OVERLAP_CHECK,
+]
+
+for statement in POSTGRES_OVERLAP_GUARD:
+    event.listen(Group.__table__, "after_create", DDL(statement).execute_if(dialect="postgresql"))
+for statement in SQLITE_OVERLAP_GUARD:
+    event.listen(Group.__table__, "after_create", DDL(statement).execute_if(dialect="sqlite"))
@@ -0,0 +1,48 @@
+
+from sqlalchemy import Column, Integer, String, DateTime, ForeignKey, Text, Boolean, UniqueConstraint
+from sqlalchemy.orm import relationship
+
+from app.db.base_class import Base, BaseModel
+
+class GroupSeries(Base, BaseModel):
+    """
+    A group that repeats every `interval_weeks` weeks from `first_start` until
+    `until` (inclusive, open-ended when null). Occurrences exist only as
+    expansions of this rule until something needs a real Group row for one.
+    """
+    __tablename__ = "group_series"
+
+    name = Column(String, nullable=False)
+    description = Column(Text, nullable=True)
+    capacity = Column(Integer, nullable=False)
+    max_male = Column(Integer, nullable=False)
+    max_female = Column(Integer, nullable=False)
+
+    # Recurrence rule
+    first_start = Column(DateTime, nullable=False)
+    duration_minutes = Column(Integer, nullable=False)
+    interval_weeks = Column(Integer, nullable=False, default=1)
+    until = Column(DateTime, nullable=True)
+
+    # Relationships
+    exceptions = relationship("GroupSeriesException", back_populates="series", cascade="all, delete-orphan")
+    groups = relationship("Group", back_populates="series")
+
+class GroupSeriesException(Base, BaseModel):
+    """A single occurrence that is cancelled or moved to other times"""
+    __tablename__ = "group_series_exceptions"
+    __table_args__ = (
+        UniqueConstraint("series_id", "occurrence_start", name="uq_group_series_exceptions_occurrence"),
+    )
+
+    # Foreign keys
+    series_id = Column(Integer, ForeignKey("group_series.id"), nullable=False)
+
+    # Start of the occurrence as generated by the rule
+    occurrence_start = Column(DateTime, nullable=False)
+    is_cancelled = Column(Boolean, nullable=False, default=False)
+    start_time = Column(DateTime, nullable=True)
+    end_time = Column(DateTime, nullable=True)
+
+    # Relationships
+    series = relationship("GroupSeries", back_populates="exceptions")
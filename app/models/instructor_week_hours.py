@@ -0,0 +1,23 @@
+
+from sqlalchemy import Column, Integer, ForeignKey, Date, Float, UniqueConstraint
+from sqlalchemy.orm import relationship
+
+from app.db.base_class import Base, BaseModel
+
+class InstructorWeekHours(Base, BaseModel):
+    __tablename__ = "instructor_week_hours"
+    __table_args__ = (
+        UniqueConstraint("instructor_id", "week_start", name="uq_instructor_week_hours_week"),
+    )
+
+    # Foreign keys
+    instructor_id = Column(Integer, ForeignKey("users.id"), nullable=False)
+
+    # Monday of the ISO week the hours belong to
+    week_start = Column(Date, nullable=False)
+
+    # Sum of the durations of the instructor's groups starting in that week
+    hours = Column(Float, nullable=False, default=0)
+
+    # Relationships
+    instructor = relationship("User")
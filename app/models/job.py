@@ -0,0 +1,49 @@
+
+from sqlalchemy import Column, Integer, String, DateTime, ForeignKey, Text, Enum, JSON, Index
+from sqlalchemy.orm import relationship
+
+from app.db.base_class import Base, BaseModel
+import enum
+
+class JobStatus(str, enum.Enum):
+    QUEUED = "queued"
+    RUNNING = "running"
+    SUCCEEDED = "succeeded"
+    FAILED = "failed"
+    CANCELLED = "cancelled"
+
+class Job(Base, BaseModel):
+    """
+    A unit of background work. The table is the queue: workers claim the
+    queued job with the highest priority whose run_at has passed.
+    """
+    __tablename__ = "jobs"
+    __table_args__ = (
+        Index("ix_jobs_claim", "status", "priority", "run_at"),
+    )
+
+    # Name of the registered handler, and its JSON arguments
+    kind = Column(String, nullable=False)
+    payload = Column(JSON, nullable=False, default=dict)
+
+    status = Column(Enum(JobStatus), nullable=False, default=JobStatus.QUEUED)
+    # Higher runs first
+    priority = Column(Integer, nullable=False, default=0)
+    # Not claimed before this time; pushed back after a failed attempt
+    run_at = Column(DateTime, nullable=False)
+    attempts = Column(Integer, nullable=False, default=0)
+    max_attempts = Column(Integer, nullable=False, default=3)
+
+    # Claim of the worker running the job; a claim older than the lease is taken back
+    locked_by = Column(String, nullable=True)
+    locked_at = Column(DateTime, nullable=True)
+
+    result = Column(JSON, nullable=True)
+    error = Column(Text, nullable=True)
+    finished_at = Column(DateTime, nullable=True)
+
+    # Foreign keys
+    created_by_id = Column(Integer, ForeignKey("users.id", ondelete="SET NULL"), nullable=True)
+
+    # Relationships
+    created_by = relationship("User")
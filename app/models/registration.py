@@ -8,8 +8,8 @@ class Registration(Base, BaseModel):
     __tablename__ = "registrations"
 
     # Foreign keys
-    visitor_id = Column(Integer, ForeignKey("users.id"), nullable=False)
-    group_id = Column(Integer, ForeignKey("groups.id"), nullable=False)
+    visitor_id = Column(Integer, ForeignKey("users.id"), nullable=False, index=True)
+    group_id = Column(Integer, ForeignKey("groups.id"), nullable=False, index=True)
     
     # Relationships
     visitor = relationship("User", back_populates="registrations")
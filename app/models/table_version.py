@@ -0,0 +1,11 @@
+
+from sqlalchemy import BigInteger, Column, String
+
+from app.db.base_class import Base
+
+class TableVersion(Base):
+    """Version of a table's contents, bumped by every transaction that writes to it (see app.db.changes)"""
+    __tablename__ = "table_versions"
+
+    table_name = Column(String, primary_key=True)
+    version = Column(BigInteger, nullable=False, default=0)
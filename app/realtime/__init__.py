@@ -0,0 +1,2 @@
+
+# Initialize the realtime package
@@ -0,0 +1,100 @@
+
+import asyncio
+import logging
+import threading
+from typing import Any, Dict, Iterable, List, Set
+
+from sqlalchemy.orm import Session
+
+from app.crud.crud_group import group
+
+logger = logging.getLogger(__name__)
+
+Occupancy = Dict[str, Any]
+
+
+class OccupancySubscription:
+    """
+    One stream's view of the hub. Only the latest occupancy of each group is
+    kept until the stream takes it, so a slow client costs at most one entry
+    per watched group, however many changes it missed.
+    """
+
+    def __init__(self, loop: asyncio.AbstractEventLoop, group_ids: Set[int]) -> None:
+        self.loop = loop
+        self.group_ids = group_ids
+        self._pending: Dict[int, Occupancy] = {}
+        self._ready = asyncio.Event()
+
+    def offer(self, occupancy: Occupancy) -> None:
+        # Runs on the event loop (see OccupancyHub.publish)
+        self._pending[occupancy["group_id"]] = occupancy
+        self._ready.set()
+
+    async def next(self, timeout: float) -> List[Occupancy]:
+        """Changes since the last call; empty when none came within `timeout` seconds"""
+        try:
+            await asyncio.wait_for(self._ready.wait(), timeout)
+        except asyncio.TimeoutError:
+            return []
+        self._ready.clear()
+        changes = list(self._pending.values())
+        self._pending.clear()
+        return changes
+
+
+class OccupancyHub:
+    """
+    Per-process fan-out of group occupancy to SSE streams. Registration
+    writers publish the groups they changed; the hub reads their occupancy
+    once, only if anyone watches them, and hands the same dict to every
+    subscription. Idle streams are just tasks waiting on an asyncio.Event.
+    """
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self._subscriptions: Dict[int, Set[OccupancySubscription]] = {}
+
+    def subscribe(self, group_ids: Iterable[int]) -> OccupancySubscription:
+        """Call on the event loop that will consume the subscription"""
+        subscription = OccupancySubscription(asyncio.get_running_loop(), set(group_ids))
+        with self._lock:
+            for group_id in subscription.group_ids:
+                self._subscriptions.setdefault(group_id, set()).add(subscription)
+        return subscription
+
+    def unsubscribe(self, subscription: OccupancySubscription) -> None:
+        with self._lock:
+            for group_id in subscription.group_ids:
+                watchers = self._subscriptions.get(group_id)
+                if watchers is not None:
+                    watchers.discard(subscription)
+                    if not watchers:
+                        del self._subscriptions[group_id]
+
+    def watched(self, group_ids: Iterable[int]) -> List[int]:
+        with self._lock:
+            return [group_id for group_id in set(group_ids) if group_id in self._subscriptions]
+
+    def publish(self, db: Session, *, group_ids: Iterable[int]) -> None:
+        """Push the current occupancy of the groups to their subscribers; call after the commit"""
+        watched = self.watched(group_ids)
+        if not watched:
+            return
+        for occupancy in group.get_occupancy(db, ids=watched):
+            with self._lock:
+                subscriptions = list(self._subscriptions.get(occupancy["group_id"], ()))
+            for subscription in subscriptions:
+                try:
+                    # Writers run in the threadpool; asyncio.Event is only safe on its loop
+                    subscription.loop.call_soon_threadsafe(subscription.offer, occupancy)
+                except RuntimeError:
+                    # The loop is closed: the stream is gone without unsubscribing
+                    self.unsubscribe(subscription)
+
+    def subscriber_count(self) -> int:
+        with self._lock:
+            return len({s for watchers in self._subscriptions.values() for s in watchers})
+
+
+occupancy_hub = OccupancyHub()
@@ -0,0 +1,2 @@
+
+# Initialize the scheduling package
@@ -0,0 +1,147 @@
+
+from datetime import date, datetime, time, timedelta
+from typing import Dict, Iterable, List, NamedTuple, Optional, Set, Tuple
+
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.crud.crud_week_hours import week_start_of
+from app.models.instructor_schedule import InstructorSchedule
+from app.models.instructor_week_hours import InstructorWeekHours
+from app.models.user import User, UserRole
+from app.scheduling.interval_index import InstructorIntervalIndex, interval_index
+from app.scheduling.preference_mask import PreferenceMaskCache, preference_masks
+from app.scheduling.sweep import Interval, ShiftCoverage, classify_slots, merge
+
+class InstructorFit(NamedTuple):
+    instructor: User
+    current_hours: float
+    is_overloaded: bool
+    matches_preferences: bool
+    # None when the instructor declared no shifts for that week
+    shift_coverage: Optional[ShiftCoverage]
+
+
+def load_shifts(
+    db: Session, *, start: datetime, end: datetime
+) -> Dict[int, List[Interval]]:
+    """Merged shifts of every instructor overlapping [start, end), in one query"""
+    shifts: Dict[int, List[Interval]] = {}
+    for instructor_id, shift_start, shift_end in db.query(
+        InstructorSchedule.instructor_id, InstructorSchedule.start_time, InstructorSchedule.end_time
+    ).filter(
+        InstructorSchedule.start_time < end,
+        InstructorSchedule.end_time > start
+    ).order_by(InstructorSchedule.instructor_id, InstructorSchedule.start_time).all():
+        shifts.setdefault(instructor_id, []).append((shift_start, shift_end))
+    return {instructor_id: merge(intervals) for instructor_id, intervals in shifts.items()}
+
+
+def declared_weeks(shifts: Dict[int, List[Interval]]) -> Set[Tuple[int, date]]:
+    """(instructor, week start) of every week an instructor has a shift in"""
+    weeks: Set[Tuple[int, date]] = set()
+    for instructor_id, intervals in shifts.items():
+        for shift_start, shift_end in intervals:
+            week_start = week_start_of(shift_start)
+            while datetime.combine(week_start, time.min) < shift_end:
+                weeks.add((instructor_id, week_start))
+                week_start += timedelta(days=7)
+    return weeks
+
+
+class AvailabilitySnapshot:
+    """
+    Instructors, their weekly hours, shifts, assigned slots and preferences,
+    read once and shared by every group slot evaluated against it.
+
+    Shift coverage of all the slots is classified up front, with one sweep
+    over each instructor's shifts, so evaluating a slot is a lookup.
+    """
+
+    def __init__(
+        self, *, slots: Iterable[Interval], instructors: List[User],
+        week_hours: Dict[Tuple[int, date], float], shifts: Dict[int, List[Interval]],
+        busy: InstructorIntervalIndex, preferences: PreferenceMaskCache
+    ) -> None:
+        self.instructors = instructors
+        self.week_hours = week_hours
+        self.shifts = shifts
+        self.busy = busy
+        self.preferences = preferences
+        self.shift_weeks = declared_weeks(shifts)
+        ordered = sorted(set(slots))
+        self.coverage: Dict[int, Dict[Interval, ShiftCoverage]] = {
+            instructor_id: dict(zip(ordered, classify_slots(intervals, ordered)))
+            for instructor_id, intervals in shifts.items()
+        }
+
+    @classmethod
+    def load(cls, db: Session, *, slots: Iterable[Interval]) -> "AvailabilitySnapshot":
+        slots = list(slots)
+        interval_index.ensure_loaded(db)
+        preference_masks.ensure_loaded(db)
+        instructors = db.query(User).filter(
+            User.role == UserRole.INSTRUCTOR,
+            User.is_active == True
+        ).all()
+        weeks = {week_start_of(start) for start, _ in slots}
+        week_hours: Dict[Tuple[int, date], float] = {}
+        shifts: Dict[int, List[Interval]] = {}
+        if weeks:
+            week_hours = {
+                (instructor_id, week_start): hours
+                for instructor_id, week_start, hours in db.query(
+                    InstructorWeekHours.instructor_id, InstructorWeekHours.week_start,
+                    InstructorWeekHours.hours
+                ).filter(InstructorWeekHours.week_start.in_(weeks)).all()
+            }
+            shifts = load_shifts(
+                db, start=datetime.combine(min(weeks), time.min),
+                end=datetime.combine(max(weeks), time.min) + timedelta(days=7)
+            )
+        return cls(
+            slots=slots, instructors=instructors, week_hours=week_hours, shifts=shifts,
+            busy=interval_index, preferences=preference_masks
+        )
+
+    def evaluate(
+        self, *, group_start: datetime, group_end: datetime, group_id: Optional[int] = None
+    ) -> List[InstructorFit]:
+        """
+        Instructors free and on shift for the slot, which must be one of the
+        snapshot's slots, who would stay within the weekly hour limits
+        """
+        week_start = week_start_of(group_start)
+        group_hours = (group_end - group_start).total_seconds() / 3600
+        preferring = self.preferences.preferring(group_start, group_end)
+
+        results = []
+        for instructor in self.instructors:
+            # Read the mapped attribute once, it is the hot path of the batch endpoint
+            instructor_id = instructor.id
+            # Check for time conflicts with existing groups
+            if self.busy.has_conflict(
+                instructor_id=instructor_id, start=group_start, end=group_end,
+                exclude_group_id=group_id
+            ):
+                continue
+
+            # Instructors who declared shifts for the week are only offered slots inside them
+            shift_coverage = None
+            if (instructor_id, week_start) in self.shift_weeks:
+                shift_coverage = self.coverage[instructor_id][(group_start, group_end)]
+                if shift_coverage == ShiftCoverage.OFF_SHIFT:
+                    continue
+
+            current_hours = self.week_hours.get((instructor_id, week_start), 0.0)
+            total_hours = current_hours + group_hours
+            is_overloaded = (
+                total_hours > settings.INSTRUCTOR_MAX_HOURS_PER_WEEK or
+                total_hours < settings.INSTRUCTOR_MIN_HOURS_PER_WEEK
+            )
+            if not is_overloaded:
+                results.append(InstructorFit(
+                    instructor, current_hours, is_overloaded, instructor_id in preferring,
+                    shift_coverage
+                ))
+        return results
@@ -0,0 +1,147 @@
+
+import threading
+from bisect import bisect_left, bisect_right
+from datetime import datetime, timedelta
+from typing import Dict, List, Optional, Tuple
+
+from sqlalchemy.orm import Session
+
+from app.models.group import Group
+
+Slot = Tuple[datetime, datetime, int]
+
+
+class InstructorIntervalIndex:
+    """
+    In-memory index of the group time slots assigned to each instructor.
+
+    Slots are kept per instructor in a list sorted by start time together with
+    the longest slot duration seen for that instructor. Any slot overlapping
+    [start, end) must start inside (start - longest, end), so an overlap query
+    is two bisections plus a scan over the (usually empty) candidate range.
+    """
+
+    def __init__(self) -> None:
+        self._lock = threading.RLock()
+        self._starts: Dict[int, List[datetime]] = {}
+        self._slots: Dict[int, List[Slot]] = {}
+        self._longest: Dict[int, timedelta] = {}
+        self._groups: Dict[int, Tuple[int, datetime, datetime]] = {}
+        self.loaded = False
+
+    def load(self, db: Session) -> None:
+        """Rebuild the index from every group that has an instructor"""
+        rows = db.query(
+            Group.id, Group.instructor_id, Group.start_time, Group.end_time
+        ).filter(
+            Group.instructor_id.isnot(None)
+        ).order_by(Group.instructor_id, Group.start_time).all()
+
+        starts: Dict[int, List[datetime]] = {}
+        slots: Dict[int, List[Slot]] = {}
+        longest: Dict[int, timedelta] = {}
+        groups: Dict[int, Tuple[int, datetime, datetime]] = {}
+        for group_id, instructor_id, start, end in rows:
+            starts.setdefault(instructor_id, []).append(start)
+            slots.setdefault(instructor_id, []).append((start, end, group_id))
+            longest[instructor_id] = max(longest.get(instructor_id, timedelta(0)), end - start)
+            groups[group_id] = (instructor_id, start, end)
+
+        with self._lock:
+            self._starts = starts
+            self._slots = slots
+            self._longest = longest
+            self._groups = groups
+            self.loaded = True
+
+    def ensure_loaded(self, db: Session) -> None:
+        if not self.loaded:
+            with self._lock:
+                if not self.loaded:
+                    self.load(db)
+
+    def invalidate(self) -> None:
+        """Drop the cached slots; the next `ensure_loaded` reloads them"""
+        with self._lock:
+            self.loaded = False
+
+    def add(self, *, group_id: int, instructor_id: int, start: datetime, end: datetime) -> None:
+        with self._lock:
+            self._discard(group_id)
+            slot = (start, end, group_id)
+            slots = self._slots.setdefault(instructor_id, [])
+            position = bisect_right(slots, slot)
+            slots.insert(position, slot)
+            self._starts.setdefault(instructor_id, []).insert(position, start)
+            self._longest[instructor_id] = max(
+                self._longest.get(instructor_id, timedelta(0)), end - start
+            )
+            self._groups[group_id] = (instructor_id, start, end)
+
+    def discard(self, group_id: int) -> None:
+        with self._lock:
+            self._discard(group_id)
+
+    def sync_group(self, group: Group) -> None:
+        """Bring the index in line with the current state of `group`"""
+        if group.instructor_id is None:
+            self.discard(group.id)
+        else:
+            self.add(
+                group_id=group.id, instructor_id=group.instructor_id,
+                start=group.start_time, end=group.end_time
+            )
+
+    def find_conflicts(
+        self, *, instructor_id: int, start: datetime, end: datetime,
+        exclude_group_id: Optional[int] = None
+    ) -> List[int]:
+        """Ids of the instructor's groups overlapping [start, end)"""
+        with self._lock:
+            starts = self._starts.get(instructor_id)
+            if not starts:
+                return []
+            slots = self._slots[instructor_id]
+            lo = bisect_right(starts, start - self._longest[instructor_id])
+            hi = bisect_left(starts, end)
+            return [
+                group_id for slot_start, slot_end, group_id in slots[lo:hi]
+                if slot_end > start and group_id != exclude_group_id
+            ]
+
+    def slots_between(
+        self, *, instructor_id: int, start: datetime, end: datetime
+    ) -> List[Tuple[datetime, datetime]]:
+        """(start, end) of the instructor's groups overlapping [start, end), in start order"""
+        with self._lock:
+            starts = self._starts.get(instructor_id)
+            if not starts:
+                return []
+            lo = bisect_right(starts, start - self._longest[instructor_id])
+            hi = bisect_left(starts, end)
+            return [
+                (slot_start, slot_end) for slot_start, slot_end, _ in self._slots[instructor_id][lo:hi]
+                if slot_end > start
+            ]
+
+    def has_conflict(
+        self, *, instructor_id: int, start: datetime, end: datetime,
+        exclude_group_id: Optional[int] = None
+    ) -> bool:
+        return bool(self.find_conflicts(
+            instructor_id=instructor_id, start=start, end=end,
+            exclude_group_id=exclude_group_id
+        ))
+
+    def _discard(self, group_id: int) -> None:
+        entry = self._groups.pop(group_id, None)
+        if entry is None:
+            return
+        instructor_id, start, end = entry
+        slots = self._slots[instructor_id]
+        position = bisect_left(slots, (start, end, group_id))
+        del slots[position]
+        del self._starts[instructor_id][position]
+
+
+interval_index = InstructorIntervalIndex()
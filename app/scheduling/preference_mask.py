@@ -0,0 +1,182 @@
+
+import threading
+from datetime import datetime, time
+from typing import Dict, Iterable, List, Set, Tuple
+
+from sqlalchemy.orm import Session
+
+from app.models.instructor_preference import InstructorPreference, DayOfWeek
+
+SLOT_MINUTES = 15
+SLOTS_PER_DAY = 24 * 60 // SLOT_MINUTES
+WEEKDAYS = list(DayOfWeek)
+
+PreferenceRow = Tuple[int, DayOfWeek, time, time]
+Window = Tuple[time, time]
+
+def _minutes(moment: time) -> int:
+    return moment.hour * 60 + moment.minute + (1 if moment.second or moment.microsecond else 0)
+
+def _mask(first_slot: int, last_slot: int) -> int:
+    """Bits first_slot..last_slot - 1 set"""
+    if last_slot <= first_slot:
+        return 0
+    return ((1 << (last_slot - first_slot)) - 1) << first_slot
+
+def preference_mask(start: time, end: time) -> int:
+    """Slots lying entirely inside a preferred [start, end) window"""
+    return _mask(-(-_minutes(start) // SLOT_MINUTES), _minutes(end) // SLOT_MINUTES)
+
+def on_slot_boundary(moment: time) -> bool:
+    return moment.minute % SLOT_MINUTES == 0 and not moment.second and not moment.microsecond
+
+def _within(windows: List[Window], start: datetime, end: datetime) -> bool:
+    """Whether one window contains the group, compared exactly as before the masks"""
+    return start.date() == end.date() and any(
+        window_start <= start.time() and end.time() <= window_end for window_start, window_end in windows
+    )
+
+def group_mask(start: datetime, end: datetime) -> Tuple[int, int]:
+    """(weekday, slots touched by a group) - a group running past midnight is cut at the end of its day"""
+    last_slot = SLOTS_PER_DAY
+    if end.date() == start.date():
+        last_slot = -(-_minutes(end.time()) // SLOT_MINUTES)
+    return start.weekday(), _mask(_minutes(start.time()) // SLOT_MINUTES, last_slot)
+
+
+class PreferenceMaskCache:
+    """
+    Instructor preferences compiled into 15-minute slot bitmasks.
+
+    Every instructor gets one integer per weekday with a bit set for each slot
+    their preferences fully cover. The same data is also kept transposed: for
+    each weekday and slot, a bitset of the instructors (by position) who prefer
+    that slot. "Does this group match the instructor" is then a single mask AND,
+    and "which instructors prefer this group" is an AND over the group's slots
+    that evaluates every instructor at once.
+
+    Preferences are rounded inward to whole slots and groups outward, so a
+    preference off the slot grid (09:10-10:10) would no longer match a group
+    with exactly its times. Such windows are also kept as they are and
+    compared exactly when the masks do not match.
+    """
+
+    def __init__(self) -> None:
+        self._lock = threading.RLock()
+        self._masks: Dict[int, List[int]] = {}
+        # Windows off the slot grid, by instructor and weekday
+        self._unaligned: Dict[int, List[List[Window]]] = {}
+        self._positions: Dict[int, int] = {}
+        self._instructor_ids: List[int] = []
+        self._members: List[List[int]] = self._empty_members()
+        self.loaded = False
+
+    def load(self, db: Session) -> None:
+        """Compile the preferences of every instructor"""
+        rows = db.query(
+            InstructorPreference.instructor_id, InstructorPreference.day_of_week,
+            InstructorPreference.start_time, InstructorPreference.end_time
+        ).all()
+        self.load_rows(rows)
+
+    def load_rows(self, rows: Iterable[PreferenceRow]) -> None:
+        masks: Dict[int, List[int]] = {}
+        unaligned: Dict[int, List[List[Window]]] = {}
+        for instructor_id, day_of_week, start, end in rows:
+            days = masks.setdefault(instructor_id, [0] * 7)
+            weekday = WEEKDAYS.index(DayOfWeek(day_of_week))
+            days[weekday] |= preference_mask(start, end)
+            if not (on_slot_boundary(start) and on_slot_boundary(end)):
+                unaligned.setdefault(instructor_id, [[] for _ in range(7)])[weekday].append((start, end))
+        with self._lock:
+            self._masks = {}
+            self._unaligned = unaligned
+            self._positions = {}
+            self._instructor_ids = []
+            self._members = self._empty_members()
+            for instructor_id, days in masks.items():
+                self._store(instructor_id, days)
+            self.loaded = True
+
+    def ensure_loaded(self, db: Session) -> None:
+        if not self.loaded:
+            with self._lock:
+                if not self.loaded:
+                    self.load(db)
+
+    def invalidate(self) -> None:
+        with self._lock:
+            self.loaded = False
+
+    def rebuild_instructor(self, db: Session, *, instructor_id: int) -> None:
+        """Recompile one instructor after their preferences changed"""
+        if not self.loaded:
+            return
+        days = [0] * 7
+        unaligned: List[List[Window]] = [[] for _ in range(7)]
+        for day_of_week, start, end in db.query(
+            InstructorPreference.day_of_week, InstructorPreference.start_time,
+            InstructorPreference.end_time
+        ).filter(InstructorPreference.instructor_id == instructor_id).all():
+            weekday = WEEKDAYS.index(DayOfWeek(day_of_week))
+            days[weekday] |= preference_mask(start, end)
+            if not (on_slot_boundary(start) and on_slot_boundary(end)):
+                unaligned[weekday].append((start, end))
+        with self._lock:
+            self._store(instructor_id, days)
+            if any(unaligned):
+                self._unaligned[instructor_id] = unaligned
+            else:
+                self._unaligned.pop(instructor_id, None)
+
+    def matches(self, instructor_id: int, start: datetime, end: datetime) -> bool:
+        weekday, mask = group_mask(start, end)
+        days = self._masks.get(instructor_id)
+        if days and days[weekday] & mask == mask:
+            return True
+        unaligned = self._unaligned.get(instructor_id)
+        return unaligned is not None and _within(unaligned[weekday], start, end)
+
+    def preferring(self, start: datetime, end: datetime) -> Set[int]:
+        """Ids of all instructors whose preferences cover the slot"""
+        weekday, mask = group_mask(start, end)
+        with self._lock:
+            members = self._members[weekday]
+            candidates = (1 << len(self._instructor_ids)) - 1 if mask else 0
+            for slot in range((mask & -mask).bit_length() - 1, mask.bit_length()):
+                candidates &= members[slot]
+                if not candidates:
+                    break
+            result = set()
+            while candidates:
+                lowest = candidates & -candidates
+                result.add(self._instructor_ids[lowest.bit_length() - 1])
+                candidates ^= lowest
+            for instructor_id, unaligned in self._unaligned.items():
+                if instructor_id not in result and _within(unaligned[weekday], start, end):
+                    result.add(instructor_id)
+            return result
+
+    def _store(self, instructor_id: int, days: List[int]) -> None:
+        position = self._positions.get(instructor_id)
+        if position is None:
+            position = self._positions[instructor_id] = len(self._instructor_ids)
+            self._instructor_ids.append(instructor_id)
+        bit = 1 << position
+        previous = self._masks.get(instructor_id, [0] * 7)
+        for weekday in range(7):
+            changed = previous[weekday] ^ days[weekday]
+            slot = 0
+            while changed:
+                if changed & 1:
+                    self._members[weekday][slot] ^= bit
+                changed >>= 1
+                slot += 1
+        self._masks[instructor_id] = days
+
+    @staticmethod
+    def _empty_members() -> List[List[int]]:
+        return [[0] * SLOTS_PER_DAY for _ in range(7)]
+
+
+preference_masks = PreferenceMaskCache()
@@ -0,0 +1,84 @@
+
+from datetime import datetime, timedelta
+from typing import Dict, Iterable, Iterator, List, NamedTuple, Optional
+
+from app.models.group import Group
+from app.models.group_series import GroupSeries, GroupSeriesException
+
+# Upper bound on the length of one occurrence, so window queries can be bounded
+MAX_DURATION = timedelta(days=1)
+
+class Occurrence(NamedTuple):
+    series_id: int
+    name: str
+    # Start as generated by the rule; identifies the occurrence even when moved
+    occurrence_start: datetime
+    start_time: datetime
+    end_time: datetime
+    # Set once the occurrence has been materialized into a Group row
+    group_id: Optional[int] = None
+    instructor_id: Optional[int] = None
+
+
+def period_of(series: GroupSeries) -> timedelta:
+    return timedelta(weeks=series.interval_weeks)
+
+def duration_of(series: GroupSeries) -> timedelta:
+    return timedelta(minutes=series.duration_minutes)
+
+def is_rule_start(series: GroupSeries, moment: datetime) -> bool:
+    """Whether the rule generates an occurrence starting at `moment`"""
+    if moment < series.first_start or (series.until is not None and moment > series.until):
+        return False
+    return (moment - series.first_start) % period_of(series) == timedelta(0)
+
+def rule_starts(series: GroupSeries, start: datetime, end: datetime) -> Iterator[datetime]:
+    """
+    Starts of the occurrences the rule generates overlapping [start, end).
+    The first one is computed directly, so the cost depends on the window
+    rather than on how long ago the series began.
+    """
+    period = period_of(series)
+    index = max(0, (start - duration_of(series) - series.first_start) // period + 1)
+    moment = series.first_start + index * period
+    while moment < end and (series.until is None or moment <= series.until):
+        yield moment
+        moment += period
+
+def expand(
+    series: GroupSeries, start: datetime, end: datetime, *,
+    exceptions: Iterable[GroupSeriesException] = (),
+    groups: Iterable[Group] = ()
+) -> List[Occurrence]:
+    """
+    Occurrences of one series overlapping [start, end), after applying its
+    exceptions. Materialized occurrences are described by their Group row,
+    which takes precedence over the rule and the exceptions.
+    `groups` must include every group of the series whose occurrence_start
+    lies in (start - duration, end) or whose slot overlaps the window.
+    """
+    duration = duration_of(series)
+    replaced: Dict[datetime, Optional[Occurrence]] = {}
+    for exception in exceptions:
+        replaced[exception.occurrence_start] = None
+        if not exception.is_cancelled and exception.start_time < end and exception.end_time > start:
+            replaced[exception.occurrence_start] = Occurrence(
+                series.id, series.name, exception.occurrence_start,
+                exception.start_time, exception.end_time
+            )
+    for group in groups:
+        replaced[group.occurrence_start] = None
+        if group.start_time < end and group.end_time > start:
+            replaced[group.occurrence_start] = Occurrence(
+                series.id, group.name, group.occurrence_start, group.start_time, group.end_time,
+                group.id, group.instructor_id
+            )
+
+    occurrences = [
+        Occurrence(series.id, series.name, moment, moment, moment + duration)
+        for moment in rule_starts(series, start, end)
+        if moment not in replaced
+    ]
+    occurrences.extend(occurrence for occurrence in replaced.values() if occurrence is not None)
+    occurrences.sort(key=lambda occurrence: (occurrence.start_time, occurrence.series_id))
+    return occurrences
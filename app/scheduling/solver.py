@@ -0,0 +1,265 @@
+
+import time as timer
+from datetime import date, datetime, time, timedelta
+from typing import Dict, List, NamedTuple, Optional, Set, Tuple
+
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.crud.crud_week_hours import week_start_of
+from app.models.group import Group
+from app.models.instructor_week_hours import InstructorWeekHours
+from app.models.user import User, UserRole
+from app.scheduling.availability import declared_weeks, load_shifts
+from app.scheduling.interval_index import InstructorIntervalIndex
+from app.scheduling.preference_mask import PreferenceMaskCache, preference_masks
+from app.scheduling.sweep import Interval, ShiftCoverage, classify_slots
+
+class SolverGroup(NamedTuple):
+    id: int
+    start: datetime
+    end: datetime
+    hours: float
+    week_start: date
+
+
+class AssignmentProblem:
+    """
+    Everything the solver needs, loaded once: the unassigned groups of a date
+    range, the active instructors, their existing assignments around that range,
+    their weekly hours, their shifts and their preferred working hours.
+
+    As on the available-instructors endpoints, an instructor who declared
+    shifts for a week can only take groups of that week that overlap them.
+    """
+
+    def __init__(
+        self, *, groups: List[SolverGroup], instructor_ids: List[int],
+        busy: InstructorIntervalIndex, week_hours: Dict[Tuple[int, date], float],
+        preferences: PreferenceMaskCache,
+        shifts: Optional[Dict[int, List[Interval]]] = None,
+        min_hours: float = settings.INSTRUCTOR_MIN_HOURS_PER_WEEK,
+        max_hours: float = settings.INSTRUCTOR_MAX_HOURS_PER_WEEK,
+    ) -> None:
+        self.groups = groups
+        self.instructor_ids = instructor_ids
+        self.busy = busy
+        self.week_hours = week_hours
+        self.preferences = preferences
+        self.min_hours = min_hours
+        self.max_hours = max_hours
+        # (instructor, group) pairs ruled out by the instructor's shifts
+        self.off_shift: Set[Tuple[int, int]] = set()
+        if shifts:
+            weeks = declared_weeks(shifts)
+            slots = [(group.start, group.end) for group in groups]
+            for instructor_id, intervals in shifts.items():
+                for group, coverage in zip(groups, classify_slots(intervals, slots)):
+                    if coverage == ShiftCoverage.OFF_SHIFT and (instructor_id, group.week_start) in weeks:
+                        self.off_shift.add((instructor_id, group.id))
+
+    @classmethod
+    def load(cls, db: Session, *, start: datetime, end: datetime) -> "AssignmentProblem":
+        rows = db.query(Group.id, Group.start_time, Group.end_time).filter(
+            Group.instructor_id.is_(None),
+            Group.start_time >= start,
+            Group.start_time < end
+        ).order_by(Group.start_time).all()
+        groups = [
+            SolverGroup(
+                id=group_id, start=group_start, end=group_end,
+                hours=(group_end - group_start).total_seconds() / 3600,
+                week_start=week_start_of(group_start)
+            )
+            for group_id, group_start, group_end in rows
+        ]
+
+        instructor_ids = [row[0] for row in db.query(User.id).filter(
+            User.role == UserRole.INSTRUCTOR,
+            User.is_active == True
+        ).order_by(User.id).all()]
+
+        # Existing assignments that can overlap a group of the range
+        busy = InstructorIntervalIndex()
+        if groups:
+            horizon = max(group.end for group in groups)
+            for group_id, instructor_id, busy_start, busy_end in db.query(
+                Group.id, Group.instructor_id, Group.start_time, Group.end_time
+            ).filter(
+                Group.instructor_id.isnot(None),
+                Group.start_time < horizon,
+                Group.end_time > start
+            ).all():
+                busy.add(group_id=group_id, instructor_id=instructor_id, start=busy_start, end=busy_end)
+
+        weeks = {group.week_start for group in groups}
+        week_hours = {
+            (instructor_id, week_start): hours
+            for instructor_id, week_start, hours in db.query(
+                InstructorWeekHours.instructor_id, InstructorWeekHours.week_start,
+                InstructorWeekHours.hours
+            ).filter(InstructorWeekHours.week_start.in_(weeks)).all()
+        } if weeks else {}
+        shifts = load_shifts(
+            db, start=datetime.combine(min(weeks), time.min),
+            end=datetime.combine(max(weeks), time.min) + timedelta(days=7)
+        ) if weeks else {}
+
+        preference_masks.ensure_loaded(db)
+
+        return cls(
+            groups=groups, instructor_ids=instructor_ids, busy=busy,
+            week_hours=week_hours, preferences=preference_masks, shifts=shifts
+        )
+
+    def preferring(self, group: SolverGroup) -> Set[int]:
+        """Instructors whose preferences cover the group"""
+        return self.preferences.preferring(group.start, group.end)
+
+
+class AssignmentSolver:
+    """
+    Greedy construction followed by local search.
+
+    The objective (lower is better) charges a large penalty for every group
+    left unassigned, rewards preference matches, charges for every hour an
+    instructor stays below the weekly minimum and adds a small convex load
+    term that spreads work evenly. Weekly maximum hours, non-overlapping
+    assignments and declared shifts are hard constraints.
+    """
+
+    UNASSIGNED_PENALTY = 1000.0
+    PREFERENCE_WEIGHT = 10.0
+    DEFICIT_WEIGHT = 2.0
+    BALANCE_WEIGHT = 1.0
+
+    def __init__(
+        self, problem: AssignmentProblem, *, max_rounds: int = 25, time_budget: float = 5.0
+    ) -> None:
+        self.problem = problem
+        self.max_rounds = max_rounds
+        self.time_budget = time_budget
+        self.hours = dict(problem.week_hours)
+        self.assignment: Dict[int, int] = {}
+        self._groups = {group.id: group for group in problem.groups}
+        self._preferred: Dict[int, Set[int]] = {
+            group.id: problem.preferring(group) for group in problem.groups
+        }
+
+    def solve(self) -> Dict[int, int]:
+        """Returns the chosen instructor for every group it could assign"""
+        deadline = timer.perf_counter() + self.time_budget
+        self._construct()
+        for _ in range(self.max_rounds):
+            if timer.perf_counter() > deadline or not self._improve(deadline):
+                break
+        return dict(self.assignment)
+
+    def matches_preferences(self, group_id: int, instructor_id: int) -> bool:
+        return instructor_id in self._preferred[group_id]
+
+    def _construct(self) -> None:
+        # Most constrained groups first
+        options = {
+            group.id: sum(1 for instructor_id in self.problem.instructor_ids if self._feasible(instructor_id, group))
+            for group in self.problem.groups
+        }
+        for group in sorted(self.problem.groups, key=lambda g: (options[g.id], g.start)):
+            best = self._best_instructor(group)
+            if best is not None:
+                self._assign(group, best[1])
+
+    def _improve(self, deadline: float) -> bool:
+        improved = False
+        for group in self.problem.groups:
+            if timer.perf_counter() > deadline:
+                break
+            current = self.assignment.get(group.id)
+            if current is None:
+                if self._assign_with_ejection(group):
+                    improved = True
+                continue
+            self._unassign(group)
+            stay = self._add_cost(current, group)
+            best = self._best_instructor(group)
+            if best is not None and best[0] < stay - 1e-9:
+                self._assign(group, best[1])
+                improved = True
+            else:
+                self._assign(group, current)
+        return improved
+
+    def _assign_with_ejection(self, group: SolverGroup) -> bool:
+        """Free an instructor for `group` by moving one of our own assignments elsewhere"""
+        best = self._best_instructor(group)
+        if best is not None:
+            self._assign(group, best[1])
+            return True
+        for instructor_id in self.problem.instructor_ids:
+            blockers = self._busy_conflicts(instructor_id, group)
+            if len(blockers) != 1 or blockers[0] not in self.assignment:
+                continue
+            blocker = self._groups[blockers[0]]
+            self._unassign(blocker)
+            if not self._feasible(instructor_id, group):
+                self._assign(blocker, instructor_id)
+                continue
+            self._assign(group, instructor_id)
+            moved = self._best_instructor(blocker)
+            if moved is not None:
+                self._assign(blocker, moved[1])
+                return True
+            self._unassign(group)
+            self._assign(blocker, instructor_id)
+        return False
+
+    def _busy_conflicts(self, instructor_id: int, group: SolverGroup) -> List[int]:
+        return self.problem.busy.find_conflicts(
+            instructor_id=instructor_id, start=group.start, end=group.end, exclude_group_id=group.id
+        )
+
+    def _best_instructor(self, group: SolverGroup) -> Optional[Tuple[float, int]]:
+        best = None
+        for instructor_id in self.problem.instructor_ids:
+            if not self._feasible(instructor_id, group):
+                continue
+            cost = self._add_cost(instructor_id, group)
+            if best is None or cost < best[0]:
+                best = (cost, instructor_id)
+        return best
+
+    def _feasible(self, instructor_id: int, group: SolverGroup) -> bool:
+        if (instructor_id, group.id) in self.problem.off_shift:
+            return False
+        hours = self.hours.get((instructor_id, group.week_start), 0.0)
+        if hours + group.hours > self.problem.max_hours:
+            return False
+        return not self.problem.busy.has_conflict(
+            instructor_id=instructor_id, start=group.start, end=group.end, exclude_group_id=group.id
+        )
+
+    def _add_cost(self, instructor_id: int, group: SolverGroup) -> float:
+        """Change of the objective when `group` goes from unassigned to `instructor_id`"""
+        hours = self.hours.get((instructor_id, group.week_start), 0.0)
+        after = hours + group.hours
+        minimum, maximum = self.problem.min_hours, self.problem.max_hours
+        cost = -self.UNASSIGNED_PENALTY
+        if instructor_id in self._preferred[group.id]:
+            cost -= self.PREFERENCE_WEIGHT
+        cost += self.DEFICIT_WEIGHT * (max(0.0, minimum - after) - max(0.0, minimum - hours))
+        cost += self.BALANCE_WEIGHT * (after * after - hours * hours) / (maximum * maximum)
+        return cost
+
+    def _assign(self, group: SolverGroup, instructor_id: int) -> None:
+        self.assignment[group.id] = instructor_id
+        key = (instructor_id, group.week_start)
+        self.hours[key] = self.hours.get(key, 0.0) + group.hours
+        self.problem.busy.add(
+            group_id=group.id, instructor_id=instructor_id, start=group.start, end=group.end
+        )
+
+    def _unassign(self, group: SolverGroup) -> None:
+        instructor_id = self.assignment.pop(group.id)
+        key = (instructor_id, group.week_start)
+        self.hours[key] -= group.hours
+        self.problem.busy.discard(group.id)
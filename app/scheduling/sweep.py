@@ -0,0 +1,94 @@
+
+import enum
+from bisect import bisect_right
+from datetime import datetime, timedelta
+from typing import Iterable, List, Tuple
+
+Interval = Tuple[datetime, datetime]
+
+class ShiftCoverage(str, enum.Enum):
+    FULL = "full"
+    PARTIAL = "partial"
+    OFF_SHIFT = "off_shift"
+
+def merge(intervals: Iterable[Interval]) -> List[Interval]:
+    """Sorted, disjoint union of the intervals (touching intervals are joined)"""
+    merged: List[Interval] = []
+    for start, end in sorted(intervals):
+        if merged and start <= merged[-1][1]:
+            if end > merged[-1][1]:
+                merged[-1] = (merged[-1][0], end)
+        else:
+            merged.append((start, end))
+    return merged
+
+def _classify(covered: timedelta, length: timedelta) -> ShiftCoverage:
+    if covered >= length:
+        return ShiftCoverage.FULL
+    if covered > timedelta(0):
+        return ShiftCoverage.PARTIAL
+    return ShiftCoverage.OFF_SHIFT
+
+def coverage_of(shifts: List[Interval], start: datetime, end: datetime) -> ShiftCoverage:
+    """How much of [start, end) the merged `shifts` cover"""
+    position = max(bisect_right(shifts, (start, datetime.max)) - 1, 0)
+    covered = timedelta(0)
+    while position < len(shifts) and shifts[position][0] < end:
+        shift_start, shift_end = shifts[position]
+        if shift_end > start:
+            covered += min(end, shift_end) - max(start, shift_start)
+        position += 1
+    return _classify(covered, end - start)
+
+def classify_slots(shifts: List[Interval], slots: List[Interval]) -> List[ShiftCoverage]:
+    """
+    Coverage of every slot by the merged `shifts`, in one sweep.
+
+    Slots are visited in start order while a single cursor walks the shifts,
+    so the cost is O(slots log slots + shifts) rather than a search per slot.
+    """
+    result = [ShiftCoverage.OFF_SHIFT] * len(slots)
+    cursor = 0
+    for index in sorted(range(len(slots)), key=lambda k: slots[k][0]):
+        start, end = slots[index]
+        # Merged shifts are disjoint, so their ends are sorted as well
+        while cursor < len(shifts) and shifts[cursor][1] <= start:
+            cursor += 1
+        covered = timedelta(0)
+        position = cursor
+        while position < len(shifts) and shifts[position][0] < end:
+            covered += min(end, shifts[position][1]) - max(start, shifts[position][0])
+            position += 1
+        result[index] = _classify(covered, end - start)
+    return result
+
+def free_windows(
+    shifts: List[Interval], busy: List[Interval], start: datetime, end: datetime
+) -> List[Interval]:
+    """
+    Parts of [start, end) covered by the merged `shifts` and not by `busy`
+    (sorted by start), found by sweeping both lists together.
+    """
+    windows: List[Interval] = []
+    busy = merge(busy)
+    cursor = 0
+    position = max(bisect_right(shifts, (start, datetime.max)) - 1, 0)
+    while position < len(shifts) and shifts[position][0] < end:
+        free_start = max(start, shifts[position][0])
+        shift_end = min(end, shifts[position][1])
+        position += 1
+        while cursor < len(busy) and busy[cursor][1] <= free_start:
+            cursor += 1
+        while free_start < shift_end:
+            if cursor < len(busy) and busy[cursor][0] < shift_end:
+                if busy[cursor][0] > free_start:
+                    windows.append((free_start, busy[cursor][0]))
+                free_start = max(free_start, busy[cursor][1])
+                if busy[cursor][1] <= shift_end:
+                    cursor += 1
+                else:
+                    break
+            else:
+                windows.append((free_start, shift_end))
+                break
+    return windows
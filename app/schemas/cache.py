@@ -0,0 +1,10 @@
+
+from pydantic import BaseModel
+
+# Counters of one read-through cache since the process started
+class CacheStats(BaseModel):
+    name: str
+    entries: int
+    hits: int
+    misses: int
+    invalidations: int
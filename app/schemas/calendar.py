@@ -0,0 +1,35 @@
+
+from typing import List, Optional
+from pydantic import BaseModel
+from datetime import date, datetime
+
+# One group as drawn in the week view
+class WeekGridGroup(BaseModel):
+    id: int
+    name: str
+    start_time: datetime
+    end_time: datetime
+    capacity: int
+    participants: int
+    # Gender breakdown, only shown to admins and instructors
+    male_participants: Optional[int] = None
+    female_participants: Optional[int] = None
+    # Places still open to the requesting user's gender
+    spots_left: int
+    is_full: bool
+    instructor_id: Optional[int] = None
+    instructor_name: Optional[str] = None
+    series_id: Optional[int] = None
+
+# Groups running during one hour of one day (day 0 is Monday)
+class WeekGridCell(BaseModel):
+    day: int
+    hour: int
+    group_ids: List[int]
+
+class WeekGrid(BaseModel):
+    week_start: date
+    groups: List[WeekGridGroup]
+    cells: List[WeekGridCell]
+    # Groups of this week the current user is registered for
+    my_group_ids: List[int]
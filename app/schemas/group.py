@@ -1,7 +1,7 @@
 
 from typing import Optional, List
-from pydantic import BaseModel, validator
-from datetime import datetime
+from pydantic import BaseModel, ConfigDict, field_validator, model_validator
+from datetime import date, datetime
 
 # Shared properties
 class GroupBase(BaseModel):
@@ -12,47 +12,47 @@ class GroupBase(BaseModel):
     max_female: int
     start_time: datetime
     end_time: datetime
-    
-    @validator('end_time')
-    def end_time_must_be_after_start_time(cls, v, values):
-        if 'start_time' in values and v <= values['start_time']:
-            raise ValueError('end_time must be after start_time')
-        return v
-    
-    @validator('max_male', 'max_female')
-    def gender_limits_must_be_positive(cls, v):
+
+# Checks for client input only, so serializing trusted ORM rows does not re-run them
+class GroupInputBase(GroupBase):
+    @field_validator('max_male', 'max_female')
+    @classmethod
+    def gender_limits_must_be_positive(cls, v: int) -> int:
         if v < 0:
             raise ValueError('Gender limits must be positive')
         return v
     
-    @validator('capacity')
-    def capacity_must_be_positive(cls, v, values):
+    @field_validator('capacity')
+    @classmethod
+    def capacity_must_be_positive(cls, v: int) -> int:
         if v < 1:
             raise ValueError('Capacity must be at least 1')
-        
+        return v
+    
+    @model_validator(mode='after')
+    def check_times_and_limits(self) -> 'GroupInputBase':
+        if self.end_time <= self.start_time:
+            raise ValueError('end_time must be after start_time')
         # Ensure capacity is at least the sum of gender limits
-        max_male = values.get('max_male', 0)
-        max_female = values.get('max_female', 0)
-        if max_male and max_female and v < (max_male + max_female):
+        if self.max_male and self.max_female and self.capacity < (self.max_male + self.max_female):
             raise ValueError('Capacity must be at least the sum of gender limits')
-        return v
+        return self
 
 # Properties to receive via API on creation
-class GroupCreate(GroupBase):
+class GroupCreate(GroupInputBase):
     instructor_id: Optional[int] = None
 
 # Properties to receive via API on update
-class GroupUpdate(GroupBase):
+class GroupUpdate(GroupInputBase):
     instructor_id: Optional[int] = None
 
 class GroupInDBBase(GroupBase):
+    model_config = ConfigDict(from_attributes=True)
+    
     id: int
     instructor_id: Optional[int]
     created_at: datetime
     updated_at: datetime
-    
-    class Config:
-        orm_mode = True
 
 # Additional properties to return via API
 class Group(GroupInDBBase):
@@ -65,6 +65,8 @@ class Group(GroupInDBBase):
 
 # Simplified group representation for lists
 class GroupList(BaseModel):
+    model_config = ConfigDict(from_attributes=True)
+    
     id: int
     name: str
     start_time: datetime
@@ -73,6 +75,19 @@ class GroupList(BaseModel):
     current_participants: int
     instructor_id: Optional[int]
     is_full: bool
-    
-    class Config:
-        orm_mode = True
+
+# Copy a week's groups into another week
+class CloneWeekRequest(BaseModel):
+    # Any day of the week to copy from / to
+    source_week: date
+    target_week: date
+    keep_instructors: bool = True
+
+class CloneWeekConflict(BaseModel):
+    group_id: int
+    instructor_id: int
+    reason: str
+
+class CloneWeekResult(BaseModel):
+    created: int
+    conflicts: List[CloneWeekConflict]
@@ -1,6 +1,6 @@
 
 from typing import List, Optional
-from pydantic import BaseModel
+from pydantic import BaseModel, ConfigDict
 from datetime import datetime, time
 from app.models.instructor_preference import DayOfWeek
 
@@ -16,13 +16,12 @@ class InstructorScheduleUpdate(InstructorScheduleBase):
     pass
 
 class InstructorScheduleInDB(InstructorScheduleBase):
+    model_config = ConfigDict(from_attributes=True)
+    
     id: int
     instructor_id: int
     created_at: datetime
     updated_at: datetime
-    
-    class Config:
-        orm_mode = True
 
 class InstructorSchedule(InstructorScheduleInDB):
     pass
@@ -40,19 +39,20 @@ class InstructorPreferenceUpdate(InstructorPreferenceBase):
     pass
 
 class InstructorPreferenceInDB(InstructorPreferenceBase):
+    model_config = ConfigDict(from_attributes=True)
+    
     id: int
     instructor_id: int
     created_at: datetime
     updated_at: datetime
-    
-    class Config:
-        orm_mode = True
 
 class InstructorPreference(InstructorPreferenceInDB):
     pass
 
 # Instructor availability info for admin
 class InstructorAvailability(BaseModel):
+    model_config = ConfigDict(from_attributes=True)
+    
     instructor_id: int
     full_name: str
     email: str
@@ -61,6 +61,39 @@ class InstructorAvailability(BaseModel):
     max_hours_allowed: int
     is_overloaded: bool
     matches_preferences: bool
-    
-    class Config:
-        orm_mode = True
+    # 'full', 'partial' or None when the instructor declared no shifts for the week
+    shift_coverage: Optional[str] = None
+
+# Free time of an instructor: declared shifts minus assigned groups
+class TimeWindow(BaseModel):
+    start: datetime
+    end: datetime
+
+class InstructorFreeWindows(BaseModel):
+    instructor_id: int
+    full_name: Optional[str] = None
+    free: List[TimeWindow]
+
+class InstructorAvailabilityBatchRequest(BaseModel):
+    group_ids: List[int]
+
+class GroupInstructorAvailability(BaseModel):
+    group_id: int
+    instructors: List[InstructorAvailability]
+
+# Batch instructor assignment
+class AutoAssignRequest(BaseModel):
+    start: datetime
+    end: datetime
+    dry_run: bool = True
+
+class AutoAssignment(BaseModel):
+    group_id: int
+    instructor_id: int
+    matches_preferences: bool
+
+class AutoAssignResult(BaseModel):
+    dry_run: bool
+    assignments: List[AutoAssignment]
+    unassigned_group_ids: List[int]
+    preference_matches: int
@@ -0,0 +1,34 @@
+
+from typing import Any, Dict, Optional
+from pydantic import BaseModel, ConfigDict, Field
+from datetime import datetime
+
+from app.models.job import JobStatus
+
+# Enqueue a job
+class JobCreate(BaseModel):
+    kind: str
+    payload: Dict[str, Any] = {}
+    priority: int = 0
+    max_attempts: int = Field(3, ge=1, le=10)
+
+class JobUpdate(BaseModel):
+    priority: Optional[int] = None
+
+# Job as polled by clients
+class Job(BaseModel):
+    model_config = ConfigDict(from_attributes=True)
+    
+    id: int
+    kind: str
+    payload: Dict[str, Any]
+    status: JobStatus
+    priority: int
+    run_at: datetime
+    attempts: int
+    max_attempts: int
+    result: Optional[Any] = None
+    error: Optional[str] = None
+    created_at: Optional[datetime] = None
+    finished_at: Optional[datetime] = None
+    created_by_id: Optional[int] = None
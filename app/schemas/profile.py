@@ -0,0 +1,29 @@
+
+from datetime import datetime
+from typing import List, Optional
+
+from pydantic import BaseModel
+
+# One profiled request, as listed
+class ProfileSummary(BaseModel):
+    id: str
+    method: str
+    path: str
+    route: Optional[str] = None
+    status: Optional[int] = None
+    started_at: datetime
+    duration_seconds: float
+    db_seconds: float
+    python_seconds: float
+    statement_count: int
+
+# A SQL statement executed by the request
+class ProfileStatement(BaseModel):
+    statement: str
+    parameters: str
+    seconds: float
+
+# Full profile: the statements and the cProfile report of the endpoint
+class Profile(ProfileSummary):
+    statements: List[ProfileStatement]
+    stats: str
@@ -1,6 +1,6 @@
 
 from typing import Optional
-from pydantic import BaseModel
+from pydantic import BaseModel, ConfigDict
 from datetime import datetime
 
 # Shared properties
@@ -17,13 +17,12 @@ class RegistrationUpdate(BaseModel):
     attended: Optional[bool] = None
 
 class RegistrationInDBBase(RegistrationBase):
+    model_config = ConfigDict(from_attributes=True)
+    
     id: int
     visitor_id: int
     created_at: datetime
     updated_at: datetime
-    
-    class Config:
-        orm_mode = True
 
 # Additional properties to return via API
 class Registration(RegistrationInDBBase):
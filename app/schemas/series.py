@@ -0,0 +1,123 @@
+
+from typing import Optional
+from pydantic import BaseModel, ConfigDict, field_validator, model_validator
+from datetime import datetime
+
+# Longest allowed occurrence, in minutes (see app.scheduling.recurrence.MAX_DURATION)
+MAX_DURATION_MINUTES = 24 * 60
+
+# Shared properties
+class GroupSeriesBase(BaseModel):
+    name: str
+    description: Optional[str] = None
+    capacity: int
+    max_male: int
+    max_female: int
+    first_start: datetime
+    duration_minutes: int
+    interval_weeks: int = 1
+    until: Optional[datetime] = None
+
+# Checks for client input only
+class GroupSeriesInputBase(GroupSeriesBase):
+    @field_validator('max_male', 'max_female')
+    @classmethod
+    def gender_limits_must_be_positive(cls, v: int) -> int:
+        if v < 0:
+            raise ValueError('Gender limits must be positive')
+        return v
+    
+    @field_validator('capacity')
+    @classmethod
+    def capacity_must_be_positive(cls, v: int) -> int:
+        if v < 1:
+            raise ValueError('Capacity must be at least 1')
+        return v
+    
+    @field_validator('duration_minutes')
+    @classmethod
+    def duration_must_fit_in_a_day(cls, v: int) -> int:
+        if v < 1 or v > MAX_DURATION_MINUTES:
+            raise ValueError(f'duration_minutes must be between 1 and {MAX_DURATION_MINUTES}')
+        return v
+    
+    @field_validator('interval_weeks')
+    @classmethod
+    def interval_must_be_positive(cls, v: int) -> int:
+        if v < 1:
+            raise ValueError('interval_weeks must be at least 1')
+        return v
+    
+    @model_validator(mode='after')
+    def until_must_not_precede_first_start(self) -> 'GroupSeriesInputBase':
+        if self.until is not None and self.until < self.first_start:
+            raise ValueError('until must not be before first_start')
+        return self
+    
+    @model_validator(mode='after')
+    def capacity_must_cover_gender_limits(self) -> 'GroupSeriesInputBase':
+        # Same rule as GroupInputBase: the occurrences become groups
+        if self.max_male and self.max_female and self.capacity < (self.max_male + self.max_female):
+            raise ValueError('Capacity must be at least the sum of gender limits')
+        return self
+
+# Properties to receive via API on creation
+class GroupSeriesCreate(GroupSeriesInputBase):
+    pass
+
+# Properties to receive via API on update
+class GroupSeriesUpdate(GroupSeriesInputBase):
+    pass
+
+class GroupSeriesInDBBase(GroupSeriesBase):
+    model_config = ConfigDict(from_attributes=True)
+    
+    id: int
+    created_at: datetime
+    updated_at: datetime
+
+# Additional properties to return via API
+class GroupSeries(GroupSeriesInDBBase):
+    pass
+
+class GroupSeriesExceptionBase(BaseModel):
+    occurrence_start: datetime
+    is_cancelled: bool = False
+    start_time: Optional[datetime] = None
+    end_time: Optional[datetime] = None
+
+# Cancel an occurrence, or move it to other times
+class GroupSeriesExceptionCreate(GroupSeriesExceptionBase):
+    @model_validator(mode='after')
+    def moved_occurrence_needs_times(self) -> 'GroupSeriesExceptionCreate':
+        if self.is_cancelled:
+            return self
+        if self.start_time is None or self.end_time is None:
+            raise ValueError('start_time and end_time are required unless is_cancelled is set')
+        if self.end_time <= self.start_time:
+            raise ValueError('end_time must be after start_time')
+        if (self.end_time - self.start_time).total_seconds() > MAX_DURATION_MINUTES * 60:
+            raise ValueError('An occurrence cannot last longer than a day')
+        return self
+
+class GroupSeriesException(GroupSeriesExceptionBase):
+    model_config = ConfigDict(from_attributes=True)
+    
+    id: int
+    series_id: int
+
+# One occurrence of a series, expanded from the rule or backed by a group
+class Occurrence(BaseModel):
+    series_id: int
+    name: str
+    occurrence_start: datetime
+    start_time: datetime
+    end_time: datetime
+    group_id: Optional[int] = None
+    instructor_id: Optional[int] = None
+
+class OccurrenceRef(BaseModel):
+    occurrence_start: datetime
+
+class OccurrenceInstructor(OccurrenceRef):
+    instructor_id: int
@@ -0,0 +1,17 @@
+
+from datetime import datetime
+from typing import Optional
+
+from pydantic import BaseModel
+
+# A statement that exceeded SLOW_QUERY_SECONDS, with its plan once captured
+class SlowQuery(BaseModel):
+    id: int
+    at: datetime
+    seconds: float
+    statement: str
+    parameters: str
+    route: Optional[str] = None
+    source: Optional[str] = None
+    plan: Optional[str] = None
+    plan_error: Optional[str] = None
@@ -1,6 +1,6 @@
 
 from typing import Optional, List
-from pydantic import BaseModel, EmailStr, validator
+from pydantic import BaseModel, ConfigDict, EmailStr, field_validator
 from app.models.user import UserRole, Gender
 from datetime import datetime
 
@@ -16,8 +16,9 @@ class UserBase(BaseModel):
 class UserCreate(UserBase):
     password: str
     
-    @validator('password')
-    def password_min_length(cls, v):
+    @field_validator('password')
+    @classmethod
+    def password_min_length(cls, v: str) -> str:
         if len(v) < 8:
             raise ValueError('Password must be at least 8 characters long')
         return v
@@ -27,12 +28,11 @@ class UserUpdate(UserBase):
     password: Optional[str] = None
 
 class UserInDBBase(UserBase):
+    model_config = ConfigDict(from_attributes=True)
+    
     id: int
     created_at: datetime
     updated_at: datetime
-    
-    class Config:
-        orm_mode = True
 
 # Additional properties to return via API
 class User(UserInDBBase):
@@ -0,0 +1,102 @@
+#!/usr/bin/env python3
+"""
+Micro-benchmark of instructor conflict detection: the in-memory interval
+index against the SQL range query it replaces.
+
+Usage:
+  python -m scripts.bench_interval_index [--instructors 80] [--groups-per-instructor 500]
+
+Runs against a throwaway SQLite database unless --database-url is given.
+"""
+import argparse
+import random
+import sys
+import time
+from datetime import datetime, timedelta
+from pathlib import Path
+
+# Add parent directory to path to allow module imports
+sys.path.append(str(Path(__file__).parent.parent))
+
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+from app.db.base import Base
+from app.models.user import User, UserRole
+from app.models.group import Group
+from app.crud.crud_instructor import instructor
+from app.scheduling.interval_index import interval_index
+
+def populate(db, *, instructors: int, groups_per_instructor: int, rng: random.Random):
+    users = [
+        {"id": i, "email": f"bench{i}@example.com", "hashed_password": "-", "role": UserRole.INSTRUCTOR}
+        for i in range(1, instructors + 1)
+    ]
+    db.execute(User.__table__.insert(), users)
+
+    groups = []
+    epoch = datetime(2030, 1, 7, 8, 0)
+    for instructor_id in range(1, instructors + 1):
+        slot = epoch
+        for _ in range(groups_per_instructor):
+            slot += timedelta(hours=rng.choice([1, 2, 3]))
+            duration = timedelta(hours=rng.choice([1, 2]))
+            groups.append({
+                "name": "bench", "capacity": 10, "max_male": 5, "max_female": 5,
+                "start_time": slot, "end_time": slot + duration, "instructor_id": instructor_id,
+            })
+            slot += duration
+    db.execute(Group.__table__.insert(), groups)
+    db.commit()
+    return epoch, slot
+
+def run(label: str, fn, probes) -> float:
+    started = time.perf_counter()
+    for instructor_id, start, end in probes:
+        fn(instructor_id=instructor_id, start=start, end=end)
+    elapsed = time.perf_counter() - started
+    print(f"{label:<12} {len(probes)} probes in {elapsed:.3f}s ({elapsed / len(probes) * 1e6:.1f} us/probe)")
+    return elapsed
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--database-url", default="sqlite://")
+    parser.add_argument("--instructors", type=int, default=80)
+    parser.add_argument("--groups-per-instructor", type=int, default=500)
+    parser.add_argument("--probes", type=int, default=5000)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    engine = create_engine(args.database_url)
+    Base.metadata.create_all(bind=engine)
+    db = sessionmaker(bind=engine)()
+
+    first, last = populate(
+        db, instructors=args.instructors, groups_per_instructor=args.groups_per_instructor, rng=rng
+    )
+    span = int((last - first).total_seconds())
+    probes = []
+    for _ in range(args.probes):
+        start = first + timedelta(seconds=rng.randrange(span))
+        probes.append((rng.randint(1, args.instructors), start, start + timedelta(hours=1)))
+
+    started = time.perf_counter()
+    interval_index.load(db)
+    print(f"index load   {args.instructors * args.groups_per_instructor} groups in {time.perf_counter() - started:.3f}s")
+
+    sql = run("sql", lambda **kw: instructor.get_conflicting_group_ids_sql(db, **kw), probes)
+    index = run("index", lambda **kw: instructor.get_conflicting_group_ids(db, **kw), probes)
+    print(f"speedup      {sql / index:.0f}x")
+
+    # Both paths must agree
+    for instructor_id, start, end in probes[:200]:
+        assert sorted(instructor.get_conflicting_group_ids_sql(
+            db, instructor_id=instructor_id, start=start, end=end
+        )) == sorted(instructor.get_conflicting_group_ids(
+            db, instructor_id=instructor_id, start=start, end=end
+        ))
+    db.close()
+
+if __name__ == "__main__":
+    main()
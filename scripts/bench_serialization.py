@@ -0,0 +1,91 @@
+#!/usr/bin/env python3
+"""
+Benchmark of list response serialization: FastAPI's default response_model
+path (validate, convert to Python, json.dumps) against the same path with
+ORJSONResponse and against trusted_response (orjson without validation), for
+ORM objects and for the dict rows of the ?fields= projections.
+
+Usage:
+  python -m scripts.bench_serialization [--rows 10000] [--repeat 5]
+
+Works on transient ORM objects; no database is needed.
+"""
+import argparse
+import asyncio
+import sys
+import time
+from datetime import datetime, timedelta
+from pathlib import Path
+from typing import List
+
+# Add parent directory to path to allow module imports
+sys.path.append(str(Path(__file__).parent.parent))
+
+from fastapi.responses import JSONResponse, ORJSONResponse
+from fastapi.routing import serialize_response
+from fastapi.utils import create_response_field
+
+from app.api.responses import dump_json
+from app.db import base  # noqa: F401 - configures all mappers
+from app.models.group import Group
+from app.models.registration import Registration
+from app.schemas.group import GroupList
+from app.schemas.registration import Registration as RegistrationSchema
+
+def build(rows: int):
+    epoch = datetime(2030, 1, 7, 8, 0)
+    groups = [
+        Group(
+            id=i, name=f"Group {i}", capacity=12, max_male=6, max_female=6,
+            start_time=epoch + timedelta(hours=i), end_time=epoch + timedelta(hours=i + 1),
+            instructor_id=i % 80 or None, registrations=[],
+        )
+        for i in range(1, rows + 1)
+    ]
+    registrations = [
+        Registration(
+            id=i, visitor_id=i % 500 + 1, group_id=i, attended=bool(i % 2),
+            created_at=epoch, updated_at=epoch,
+        )
+        for i in range(1, rows + 1)
+    ]
+    return groups, registrations
+
+def fastapi_path(schema, response_class):
+    field = create_response_field(name="bench", type_=schema)
+
+    def render(objs) -> bytes:
+        content = asyncio.run(serialize_response(field=field, response_content=objs))
+        return response_class(content).body
+    return render
+
+def measure(label: str, render, objs, repeat: int) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        started = time.perf_counter()
+        render(objs)
+        best = min(best, time.perf_counter() - started)
+    print(f"  {label:<22} {best * 1000:8.1f} ms")
+    return best
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=10000)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    groups, registrations = build(args.rows)
+    for label, schema, objs in (
+        ("GroupList", GroupList, groups),
+        ("Registration", RegistrationSchema, registrations),
+    ):
+        rows = [{name: getattr(obj, name) for name in schema.model_fields} for obj in objs]
+        print(f"{args.rows} x {label}")
+        default = measure("response_model + json", fastapi_path(List[schema], JSONResponse), objs, args.repeat)
+        measure("response_model + orjson", fastapi_path(List[schema], ORJSONResponse), objs, args.repeat)
+        trusted = measure("trusted_response", lambda o: dump_json(schema, o), objs, args.repeat)
+        projected = measure("trusted_response rows", lambda o: dump_json(schema, o), rows, args.repeat)
+        print(f"  speedup                {default / trusted:8.1f}x, {default / projected:.1f}x for rows")
+
+if __name__ == "__main__":
+    main()
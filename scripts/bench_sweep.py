@@ -0,0 +1,110 @@
+#!/usr/bin/env python3
+"""
+Benchmark of shift coverage in AvailabilitySnapshot.evaluate, which the
+available-instructors endpoints run: the snapshot classifies every slot with
+one sweep per instructor, against searching the shifts for every instructor
+and slot pair.
+
+Usage:
+  python -m scripts.bench_sweep [--instructors 80] [--days 31]
+
+Works on generated data only; no database is needed.
+"""
+import argparse
+import random
+import sys
+import time
+from datetime import datetime, timedelta
+from pathlib import Path
+
+# Add parent directory to path to allow module imports
+sys.path.append(str(Path(__file__).parent.parent))
+
+from app.core.config import settings
+from app.db.base import Base  # noqa: F401 (maps every model, User needs them)
+from app.models.user import User, UserRole
+from app.scheduling.availability import AvailabilitySnapshot
+from app.scheduling.interval_index import InstructorIntervalIndex
+from app.scheduling.preference_mask import PreferenceMaskCache
+from app.scheduling.sweep import coverage_of, free_windows, merge
+
+EPOCH = datetime(2030, 1, 7)
+
+def generate_shifts(*, days: int, rng: random.Random):
+    """One instructor's merged shifts over `days` days"""
+    shifts = []
+    for day in range(days):
+        morning = EPOCH + timedelta(days=day, hours=rng.choice([7, 8, 9]))
+        shifts.append((morning, morning + timedelta(hours=rng.choice([3, 4, 5]))))
+        evening = EPOCH + timedelta(days=day, hours=rng.choice([14, 15, 16]))
+        shifts.append((evening, evening + timedelta(hours=rng.choice([2, 3, 4]))))
+    return merge(shifts)
+
+def generate_slots(*, days: int, rng: random.Random):
+    """Candidate group slots, 20 a day"""
+    slots = []
+    for day in range(days):
+        for _ in range(20):
+            start = EPOCH + timedelta(days=day, minutes=rng.randrange(6 * 60, 20 * 60, 15))
+            slots.append((start, start + timedelta(hours=rng.choice([1, 2]))))
+    return slots
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--instructors", type=int, default=80)
+    parser.add_argument("--days", type=int, default=31)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    instructors = [
+        User(id=n, email=f"instructor{n}@example.com", role=UserRole.INSTRUCTOR)
+        for n in range(1, args.instructors + 1)
+    ]
+    shifts = {instructor.id: generate_shifts(days=args.days, rng=rng) for instructor in instructors}
+    slots = generate_slots(days=args.days, rng=rng)
+    pairs = len(instructors) * len(slots)
+    # Hour limits are left out, so every on-shift instructor is offered
+    settings.INSTRUCTOR_MIN_HOURS_PER_WEEK = 0
+
+    # What evaluate did before the sweep: a search over the week, then over the slot
+    started = time.perf_counter()
+    naive = []
+    for start, end in slots:
+        week_begin = EPOCH + timedelta(days=(start - EPOCH).days // 7 * 7)
+        naive.append([
+            (instructor_id, coverage_of(intervals, start, end))
+            for instructor_id, intervals in shifts.items()
+            if coverage_of(intervals, week_begin, week_begin + timedelta(days=7)) != "off_shift"
+        ])
+    per_pair = time.perf_counter() - started
+    print(f"per-pair search    {pairs} pairs in {per_pair:.3f}s")
+
+    started = time.perf_counter()
+    snapshot = AvailabilitySnapshot(
+        slots=slots, instructors=instructors, week_hours={}, shifts=shifts,
+        busy=InstructorIntervalIndex(), preferences=PreferenceMaskCache()
+    )
+    swept = time.perf_counter() - started
+    print(f"snapshot sweep     {pairs} pairs in {swept:.3f}s ({per_pair / swept:.1f}x)")
+
+    # The whole per-slot path of the endpoints: conflicts, coverage lookup, hours
+    started = time.perf_counter()
+    fits = [snapshot.evaluate(group_start=start, group_end=end) for start, end in slots]
+    print(f"snapshot evaluate  {pairs} pairs in {time.perf_counter() - started:.3f}s")
+    assert [
+        [(fit.instructor.id, fit.shift_coverage) for fit in slot_fits] for slot_fits in fits
+    ] == [
+        [(instructor_id, coverage) for instructor_id, coverage in slot_naive if coverage != "off_shift"]
+        for slot_naive in naive
+    ]
+
+    started = time.perf_counter()
+    windows = sum(
+        len(free_windows(intervals, slots[::4], EPOCH, EPOCH + timedelta(days=args.days)))
+        for intervals in shifts.values()
+    )
+    print(f"free windows       {windows} windows in {time.perf_counter() - started:.3f}s")
+
+if __name__ == "__main__":
+    main()
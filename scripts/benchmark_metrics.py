@@ -0,0 +1,79 @@
+#!/usr/bin/env python3
+"""
+Measure what the metrics middleware adds to a request: a bare ASGI app is
+called directly, with and without MetricsMiddleware around it, so the
+difference is the middleware alone (no HTTP parsing, no routing). Also times
+the per-statement cost of the SQL timing hooks on an in-memory SQLite engine.
+
+Usage:
+  python -m scripts.benchmark_metrics [--requests 200000] [--queries 50000] [--repeat 5]
+"""
+import argparse
+import asyncio
+import time
+
+from sqlalchemy import create_engine, text
+
+from app.metrics.middleware import MetricsMiddleware, QueryUsage, _query_usage
+
+class Route:
+    path = "/api/v1/groups/{group_id}"
+
+ROUTE = Route()
+
+async def bare_app(scope, receive, send) -> None:
+    # What the router does on a match, then the smallest possible response
+    scope["route"] = ROUTE
+    await send({"type": "http.response.start", "status": 200, "headers": []})
+    await send({"type": "http.response.body", "body": b""})
+
+async def receive():
+    return {"type": "http.request", "body": b"", "more_body": False}
+
+async def send(message) -> None:
+    pass
+
+async def time_requests(app, count: int) -> float:
+    started = time.perf_counter()
+    for _ in range(count):
+        await app({"type": "http", "method": "GET", "path": "/api/v1/groups/1"}, receive, send)
+    return (time.perf_counter() - started) / count
+
+def time_queries(count: int, tracked: bool) -> float:
+    engine = create_engine("sqlite://")
+    token = _query_usage.set(QueryUsage() if tracked else None)
+    try:
+        with engine.connect() as connection:
+            statement = text("SELECT 1")
+            started = time.perf_counter()
+            for _ in range(count):
+                connection.execute(statement)
+            return (time.perf_counter() - started) / count
+    finally:
+        _query_usage.reset(token)
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Benchmark the overhead of request metrics")
+    parser.add_argument("--requests", type=int, default=200000)
+    parser.add_argument("--queries", type=int, default=50000)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    wrapped = MetricsMiddleware(bare_app)
+    bare, measured = [], []
+    for _ in range(args.repeat):
+        bare.append(asyncio.run(time_requests(bare_app, args.requests)))
+        measured.append(asyncio.run(time_requests(wrapped, args.requests)))
+    print(f"Request without middleware  {min(bare) * 1e6:7.2f} us")
+    print(f"Request with middleware     {min(measured) * 1e6:7.2f} us")
+    print(f"Middleware overhead         {(min(measured) - min(bare)) * 1e6:7.2f} us/request")
+
+    untracked, tracked = [], []
+    for _ in range(args.repeat):
+        untracked.append(time_queries(args.queries, False))
+        tracked.append(time_queries(args.queries, True))
+    untracked, tracked = min(untracked), min(tracked)
+    print(f"SQL timing overhead         {(tracked - untracked) * 1e6:7.2f} us/statement")
+
+if __name__ == "__main__":
+    main()
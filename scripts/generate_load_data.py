@@ -0,0 +1,291 @@
+#!/usr/bin/env python3
+"""
+Generate a large, realistic data set for load and performance testing:
+visitors, instructors with preferences, groups spread over whole weeks and
+registrations filling them, all deterministic from a seed.
+
+Rows are generated as plain tuples and bulk-loaded (COPY on PostgreSQL,
+executemany batches elsewhere) with explicit ids, in one transaction. Every
+account shares one precomputed password hash. The instructor_week_hours
+rollup is rebuilt and the ETag versions of groups and registrations bumped at
+the end.
+
+Usage:
+  python -m scripts.generate_load_data [--visitors 100000] [--instructors 300]
+      [--groups-per-day 200] [--weeks 26] [--fill 0.8] [--male-share 0.5]
+      [--unassigned 0.1] [--preference-days 3] [--seed 0] [--reset]
+
+The defaults give about 36k groups and half a million registrations; raise
+--weeks or --groups-per-day for millions. The tables must be empty, or pass
+--reset to empty them first (this deletes ALL data). Accounts are
+admin@load.example.com, instructor<N>@load.example.com and
+visitor<N>@load.example.com, all with the --password (default "password").
+"""
+import argparse
+import csv
+import io
+import random
+import sys
+import time
+from datetime import date, datetime, time as dtime, timedelta
+from itertools import islice
+from pathlib import Path
+from typing import Dict, Iterable, Iterator, List, Sequence, Tuple
+
+# Add parent directory to path to allow module imports
+sys.path.append(str(Path(__file__).parent.parent))
+
+from sqlalchemy import Table, func, select, text
+from sqlalchemy.engine import Connection
+
+from app.core.config import settings
+from app.core.security import get_password_hash
+from app.crud.crud_week_hours import instructor_week_hours, week_start_of
+from app.db.base import Base
+from app.db.changes import table_versions
+from app.db.session import SessionLocal, engine
+from app.models.group import Group
+from app.models.instructor_preference import DayOfWeek, InstructorPreference
+from app.models.registration import Registration
+from app.models.table_version import TableVersion
+from app.models.user import Gender, User, UserRole
+
+Row = Tuple
+
+# Sessions start on the hour between these, and last one or two hours
+FIRST_HOUR = 6
+LAST_HOUR = 21
+PREFERENCE_WINDOWS = [(dtime(6), dtime(12)), (dtime(12), dtime(18)), (dtime(16), dtime(22))]
+
+def next_monday() -> date:
+    today = date.today()
+    return today + timedelta(days=7 - today.weekday())
+
+def generate_users(
+    *, visitors: int, instructors: int, male_share: float, password_hash: str, rng: random.Random
+) -> Tuple[List[Row], List[int], List[int], List[int]]:
+    """User rows, then the ids of the instructors, male visitors and female visitors"""
+    rows: List[Row] = [(1, "admin@load.example.com", password_hash, "Load Admin", UserRole.ADMIN.name, Gender.MALE.name, True)]
+    instructor_ids, males, females = [], [], []
+    for n in range(1, instructors + 1):
+        user_id = len(rows) + 1
+        gender = Gender.MALE if rng.random() < 0.5 else Gender.FEMALE
+        rows.append((
+            user_id, f"instructor{n}@load.example.com", password_hash, f"Instructor {n}",
+            UserRole.INSTRUCTOR.name, gender.name, True
+        ))
+        instructor_ids.append(user_id)
+    for n in range(1, visitors + 1):
+        user_id = len(rows) + 1
+        gender = Gender.MALE if rng.random() < male_share else Gender.FEMALE
+        rows.append((
+            user_id, f"visitor{n}@load.example.com", password_hash, f"Visitor {n}",
+            UserRole.VISITOR.name, gender.name, True
+        ))
+        (males if gender == Gender.MALE else females).append(user_id)
+    return rows, instructor_ids, males, females
+
+def generate_preferences(
+    instructor_ids: Sequence[int], *, days: float, rng: random.Random
+) -> Iterator[Row]:
+    preference_id = 0
+    for instructor_id in instructor_ids:
+        count = max(0, min(7, round(rng.gauss(days, 1))))
+        for day in rng.sample(list(DayOfWeek), count):
+            start, end = rng.choice(PREFERENCE_WINDOWS)
+            preference_id += 1
+            yield preference_id, instructor_id, day.name, start, end
+
+def generate_groups(
+    *, start: date, weeks: int, per_day: int, instructor_ids: Sequence[int], unassigned: float,
+    rng: random.Random
+) -> Iterator[Row]:
+    """
+    Groups over `weeks` weeks from `start`, about `unassigned` of them without
+    an instructor. Instructors are only given groups that fit their day and
+    stay within INSTRUCTOR_MAX_HOURS_PER_WEEK, so the data passes the overlap
+    constraint and the hour limits.
+    """
+    group_id = 0
+    week_hours: Dict[Tuple[int, date], int] = {}
+    for day_number in range(weeks * 7):
+        day = datetime.combine(start + timedelta(days=day_number), dtime.min)
+        week = week_start_of(day)
+        # Hours each instructor is busy on this day
+        busy: Dict[int, set] = {}
+        for _ in range(per_day):
+            begin = day + timedelta(hours=rng.randint(FIRST_HOUR, LAST_HOUR - 1))
+            hours = rng.choice([1, 1, 2])
+            slot = set(range(begin.hour, begin.hour + hours))
+            capacity = rng.randint(10, 20)
+            max_male = rng.randint(capacity // 3, capacity - capacity // 3)
+            instructor_id = None
+            candidates = [] if rng.random() < unassigned else rng.sample(instructor_ids, min(5, len(instructor_ids)))
+            for candidate in candidates:
+                if (
+                    not busy.get(candidate, set()) & slot
+                    and week_hours.get((candidate, week), 0) + hours <= settings.INSTRUCTOR_MAX_HOURS_PER_WEEK
+                ):
+                    instructor_id = candidate
+                    busy.setdefault(candidate, set()).update(slot)
+                    week_hours[(candidate, week)] = week_hours.get((candidate, week), 0) + hours
+                    break
+            group_id += 1
+            yield (
+                group_id, f"Load Group {group_id}", None, capacity, max_male, capacity - max_male,
+                begin, begin + timedelta(hours=hours), instructor_id
+            )
+
+def generate_registrations(
+    groups: Iterable[Row], *, males: Sequence[int], females: Sequence[int], fill: float,
+    attended_share: float, now: datetime, rng: random.Random
+) -> Iterator[Row]:
+    registration_id = 0
+    for group_id, _, _, capacity, max_male, max_female, begin, _, _ in groups:
+        # Fill around the target ratio, within the gender limits
+        target = min(capacity, max(0, round(capacity * rng.uniform(fill - 0.2, fill + 0.2))))
+        male_count = min(max_male, len(males), round(target * len(males) / max(1, len(males) + len(females))))
+        female_count = min(max_female, len(females), target - male_count)
+        past = begin < now
+        for visitor_id in rng.sample(males, male_count) + rng.sample(females, female_count):
+            registration_id += 1
+            yield registration_id, visitor_id, group_id, past and rng.random() < attended_share
+
+def copy_rows(connection: Connection, table: Table, columns: Sequence[str], rows: Iterable[Row], batch: int) -> int:
+    """COPY ... FROM STDIN in CSV chunks of `batch` rows"""
+    cursor = connection.connection.dbapi_connection.cursor()
+    statement = f"COPY {table.name} ({', '.join(columns)}) FROM STDIN WITH (FORMAT csv)"
+    total = 0
+    rows = iter(rows)
+    while True:
+        chunk = list(islice(rows, batch))
+        if not chunk:
+            return total
+        buffer = io.StringIO()
+        # None is written as an unquoted empty field, which CSV COPY reads as NULL
+        csv.writer(buffer).writerows(chunk)
+        buffer.seek(0)
+        cursor.copy_expert(statement, buffer)
+        total += len(chunk)
+
+def insert_rows(connection: Connection, table: Table, columns: Sequence[str], rows: Iterable[Row], batch: int) -> int:
+    """executemany INSERTs of `batch` rows"""
+    statement = table.insert()
+    total = 0
+    rows = iter(rows)
+    while True:
+        chunk = list(islice(rows, batch))
+        if not chunk:
+            return total
+        connection.execute(statement, [dict(zip(columns, row)) for row in chunk])
+        total += len(chunk)
+
+def load(connection: Connection, table: Table, columns: Sequence[str], rows: Iterable[Row], batch: int) -> int:
+    started = time.perf_counter()
+    if connection.dialect.name == "postgresql":
+        count = copy_rows(connection, table, columns, rows, batch)
+    else:
+        count = insert_rows(connection, table, columns, rows, batch)
+    seconds = time.perf_counter() - started
+    print(f"  {table.name:<24} {count:>10,} rows in {seconds:6.1f}s ({count / max(seconds, 1e-9):,.0f} rows/s)")
+    return count
+
+def reset(connection: Connection) -> None:
+    # Versions keep counting up, so ETags taken before the reset cannot match the new data
+    tables = [
+        table.name for table in reversed(Base.metadata.sorted_tables)
+        if table.name != TableVersion.__tablename__
+    ]
+    if connection.dialect.name == "postgresql":
+        connection.execute(text(f"TRUNCATE {', '.join(tables)} RESTART IDENTITY CASCADE"))
+    else:
+        for name in tables:
+            connection.execute(text(f"DELETE FROM {name}"))
+
+def sync_sequences(connection: Connection, tables: Sequence[Table]) -> None:
+    """Move the id sequences past the explicit ids, so later inserts do not collide"""
+    if connection.dialect.name != "postgresql":
+        return
+    for table in tables:
+        connection.execute(text(
+            f"SELECT setval(pg_get_serial_sequence('{table.name}', 'id'), "
+            f"COALESCE((SELECT MAX(id) FROM {table.name}), 0) + 1, false)"
+        ))
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Generate a large deterministic data set for load testing")
+    parser.add_argument("--visitors", type=int, default=100000)
+    parser.add_argument("--instructors", type=int, default=300)
+    parser.add_argument("--groups-per-day", type=int, default=200)
+    parser.add_argument("--weeks", type=int, default=26)
+    parser.add_argument("--start", type=date.fromisoformat, help="First day (default: the Monday half the weeks ago)")
+    parser.add_argument("--fill", type=float, default=0.8, help="Average share of each group's capacity taken")
+    parser.add_argument("--male-share", type=float, default=0.5, help="Share of male visitors")
+    parser.add_argument("--unassigned", type=float, default=0.1, help="Share of groups left without an instructor")
+    parser.add_argument("--preference-days", type=float, default=3, help="Average preferred days per instructor")
+    parser.add_argument("--attended", type=float, default=0.85, help="Attendance rate of past sessions")
+    parser.add_argument("--password", default="password")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--batch", type=int, default=50000, help="Rows per COPY chunk or executemany")
+    parser.add_argument("--reset", action="store_true", help="Delete ALL existing data first")
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    start = args.start or next_monday() - timedelta(weeks=args.weeks // 2)
+    # Fixed relative to the data, so the same seed gives the same attendance any day
+    now = datetime.combine(start + timedelta(weeks=args.weeks // 2), dtime.min)
+    started = time.perf_counter()
+
+    Base.metadata.create_all(bind=engine)
+    with engine.begin() as connection:
+        if args.reset:
+            reset(connection)
+        elif connection.execute(select(func.count()).select_from(User.__table__)).scalar():
+            sys.exit("The users table is not empty; pass --reset to delete all data first")
+
+        users, instructor_ids, males, females = generate_users(
+            visitors=args.visitors, instructors=args.instructors, male_share=args.male_share,
+            password_hash=get_password_hash(args.password), rng=rng
+        )
+        print(f"Loading into {connection.dialect.name}:")
+        load(connection, User.__table__, [
+            "id", "email", "hashed_password", "full_name", "role", "gender", "is_active"
+        ], users, args.batch)
+        load(connection, InstructorPreference.__table__, [
+            "id", "instructor_id", "day_of_week", "start_time", "end_time"
+        ], generate_preferences(instructor_ids, days=args.preference_days, rng=rng), args.batch)
+
+        # Groups are kept (a few columns each) to draw their registrations
+        groups = list(generate_groups(
+            start=start, weeks=args.weeks, per_day=args.groups_per_day,
+            instructor_ids=instructor_ids, unassigned=args.unassigned, rng=rng
+        ))
+        load(connection, Group.__table__, [
+            "id", "name", "description", "capacity", "max_male", "max_female",
+            "start_time", "end_time", "instructor_id"
+        ], groups, args.batch)
+        load(connection, Registration.__table__, [
+            "id", "visitor_id", "group_id", "attended"
+        ], generate_registrations(
+            groups, males=males, females=females, fill=args.fill,
+            attended_share=args.attended, now=now, rng=rng
+        ), args.batch)
+        sync_sequences(connection, [
+            User.__table__, InstructorPreference.__table__, Group.__table__, Registration.__table__
+        ])
+        table_versions.bump(connection, [Group.__tablename__, Registration.__tablename__])
+
+    db = SessionLocal()
+    try:
+        rows = instructor_week_hours.rebuild(db)
+        print(f"  instructor_week_hours    {rows:>10,} rows rebuilt")
+    finally:
+        db.close()
+    if engine.dialect.name == "postgresql":
+        with engine.connect().execution_options(isolation_level="AUTOCOMMIT") as connection:
+            # Fresh statistics, so the planner sees the new sizes
+            connection.execute(text("ANALYZE"))
+    print(f"Done in {time.perf_counter() - started:.1f}s")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,44 @@
+#!/usr/bin/env python3
+"""
+Add the instructor no-overlap guard to a groups table created before it existed:
+the (instructor_id, start_time) index, plus the tsrange column and exclusion
+constraint on PostgreSQL or the triggers on SQLite. Fails if the table already
+holds double-booked instructors; those have to be resolved first.
+
+Usage:
+  python -m scripts.install_overlap_guard
+"""
+import sys
+from pathlib import Path
+
+# Add parent directory to path to allow module imports
+sys.path.append(str(Path(__file__).parent.parent))
+
+from sqlalchemy import inspect, text
+
+from app.db.session import engine
+from app.models.group import Group, POSTGRES_OVERLAP_GUARD, SQLITE_OVERLAP_GUARD
+
+def install_overlap_guard():
+    with engine.begin() as connection:
+        for index in Group.__table__.indexes:
+            index.create(connection, checkfirst=True)
+
+        if connection.dialect.name == "postgresql":
+            columns = {column["name"] for column in inspect(connection).get_columns("groups")}
+            if "slot" in columns:
+                print("Overlap guard already installed")
+                return
+            statements = POSTGRES_OVERLAP_GUARD
+        elif connection.dialect.name == "sqlite":
+            statements = SQLITE_OVERLAP_GUARD
+        else:
+            print(f"No overlap guard for {connection.dialect.name}")
+            return
+
+        for statement in statements:
+            connection.execute(text(statement))
+    print("Installed instructor overlap guard")
+
+if __name__ == "__main__":
+    install_overlap_guard()
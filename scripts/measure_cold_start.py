@@ -0,0 +1,128 @@
+#!/usr/bin/env python3
+"""
+Measure how quickly a fresh worker gets to full speed: the time to import
+app.main, and, for a uvicorn worker started from scratch, the time until the
+first successful request and the latency of the first requests against the
+steady state.
+
+Usage:
+  python -m scripts.measure_cold_start [--runs 3] [--port 8765] [--path /openapi.json]
+                                       [--login admin@example.com:admin123]
+
+The server part needs the configured database, as the startup warm-up reads it.
+"""
+import argparse
+import json
+import os
+import socket
+import statistics
+import subprocess
+import sys
+import time
+import urllib.error
+import urllib.parse
+import urllib.request
+from pathlib import Path
+from typing import List, Optional, Tuple
+
+ROOT = Path(__file__).parent.parent
+
+IMPORT_PROBE = (
+    "import time; started = time.perf_counter(); import app.main; "
+    "print(time.perf_counter() - started)"
+)
+
+def measure_import() -> Tuple[float, float]:
+    """(seconds spent importing app.main, wall time of the whole interpreter run)"""
+    started = time.perf_counter()
+    output = subprocess.run(
+        [sys.executable, "-c", IMPORT_PROBE], cwd=ROOT, check=True, capture_output=True, text=True
+    ).stdout
+    return float(output.strip().splitlines()[-1]), time.perf_counter() - started
+
+def request(url: str, data: Optional[bytes] = None) -> float:
+    started = time.perf_counter()
+    with urllib.request.urlopen(url, data=data, timeout=10) as response:
+        response.read()
+    return time.perf_counter() - started
+
+def wait_for_port(port: int, deadline: float) -> None:
+    while time.perf_counter() < deadline:
+        try:
+            with socket.create_connection(("127.0.0.1", port), timeout=0.05):
+                return
+        except OSError:
+            time.sleep(0.005)
+    raise TimeoutError(f"Nothing listening on port {port}")
+
+def measure_server(port: int, path: str, login: Optional[str], requests: int) -> dict:
+    base = f"http://127.0.0.1:{port}"
+    started = time.perf_counter()
+    server = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "app.main:app", "--port", str(port), "--log-level", "warning"],
+        cwd=ROOT, env={**os.environ, "PYTHONUNBUFFERED": "1"}
+    )
+    try:
+        # uvicorn binds only after the startup hooks ran
+        wait_for_port(port, started + 60)
+        while True:
+            try:
+                first = request(base + path)
+                break
+            except (urllib.error.URLError, ConnectionError):
+                time.sleep(0.005)
+        ready = time.perf_counter() - started
+        latencies = [first] + [request(base + path) for _ in range(requests - 1)]
+        result = {
+            "first_success_s": ready,
+            "first_request_ms": first * 1000,
+            "steady_request_ms": statistics.median(latencies[len(latencies) // 2:]) * 1000,
+        }
+        if login:
+            username, password = login.split(":", 1)
+            form = urllib.parse.urlencode({"username": username, "password": password}).encode()
+            url = f"{base}/api/v1/login/access-token"
+            result["first_login_ms"] = request(url, form) * 1000
+            result["second_login_ms"] = request(url, form) * 1000
+        return result
+    finally:
+        server.terminate()
+        server.wait(timeout=10)
+
+def summarize(name: str, values: List[float], unit: str) -> None:
+    print(f"  {name:<20} median {statistics.median(values):8.3f}{unit}  "
+          f"min {min(values):8.3f}{unit}  max {max(values):8.3f}{unit}")
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Measure import time and time to first request")
+    parser.add_argument("--runs", type=int, default=3)
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--path", default="/openapi.json")
+    parser.add_argument("--requests", type=int, default=20, help="Requests per server run")
+    parser.add_argument("--login", help="email:password to also time the first logins")
+    parser.add_argument("--import-only", action="store_true", help="Skip the server runs")
+    parser.add_argument("--json", action="store_true", help="Print raw results as JSON")
+    args = parser.parse_args()
+
+    imports = [measure_import() for _ in range(args.runs)]
+    servers = [] if args.import_only else [
+        measure_server(args.port, args.path, args.login, args.requests) for _ in range(args.runs)
+    ]
+
+    if args.json:
+        print(json.dumps({"imports": imports, "servers": servers}, indent=2))
+        return
+    print(f"Import of app.main ({args.runs} runs)")
+    summarize("import", [run[0] for run in imports], "s")
+    summarize("interpreter total", [run[1] for run in imports], "s")
+    if servers:
+        print(f"Fresh uvicorn worker, GET {args.path}")
+        for key, unit in (
+            ("first_success_s", "s"), ("first_request_ms", "ms"), ("steady_request_ms", "ms"),
+            ("first_login_ms", "ms"), ("second_login_ms", "ms"),
+        ):
+            if key in servers[0]:
+                summarize(key, [run[key] for run in servers], unit)
+
+if __name__ == "__main__":
+    main()
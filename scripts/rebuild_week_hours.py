@@ -0,0 +1,26 @@
+#!/usr/bin/env python3
+"""
+Recompute the instructor_week_hours rollup from the groups table.
+
+Usage:
+  python -m scripts.rebuild_week_hours
+"""
+import sys
+from pathlib import Path
+
+# Add parent directory to path to allow module imports
+sys.path.append(str(Path(__file__).parent.parent))
+
+from app.db.session import SessionLocal
+from app.crud.crud_week_hours import instructor_week_hours
+
+def rebuild_week_hours():
+    db = SessionLocal()
+    try:
+        rows = instructor_week_hours.rebuild(db)
+        print(f"Rebuilt instructor_week_hours: {rows} instructor-weeks")
+    finally:
+        db.close()
+
+if __name__ == "__main__":
+    rebuild_week_hours()
@@ -18,6 +18,7 @@ from app.models.user import User, UserRole, Gender
 from app.models.group import Group
 from app.models.instructor_preference import InstructorPreference, DayOfWeek
 from app.models.registration import Registration
+from app.crud.crud_week_hours import instructor_week_hours
 
 def seed_data():
     """Seed the database with initial data for testing"""
@@ -88,6 +89,7 @@ def seed_data():
         
         # Create groups
         groups = []
+        booked = set()
         start_date = datetime.now()
         for i in range(1, 16):
             # Randomize start date within next 30 days
@@ -109,8 +111,12 @@ def seed_data():
             )
             group_end = group_start + timedelta(hours=duration_hours)
             
-            # Randomly assign an instructor or leave empty
+            # Randomly assign an instructor or leave empty; slots start on even hours
+            # and last at most two, so only an identical start can double-book
             instructor_id = random.choice([None] + [i.id for i in instructors])
+            if (instructor_id, group_start) in booked:
+                instructor_id = None
+            booked.add((instructor_id, group_start))
             
             # Random capacity limits
             total_capacity = random.randint(10, 20)
@@ -162,6 +168,7 @@ def seed_data():
                     db.add(registration)
         
         db.commit()
+        instructor_week_hours.rebuild(db)
         print("Database seeded successfully!")
         
     except Exception as e:
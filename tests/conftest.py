@@ -6,6 +6,7 @@ from fastapi.testclient import TestClient
 from sqlalchemy import create_engine
 from sqlalchemy.orm import sessionmaker
 
+from app.cache.core import caches
 from app.core.config import settings
 from app.db.base import Base
 from app.db.session import get_db
@@ -90,6 +91,8 @@ def db() -> Generator:
         
         # Drop the tables after the test is done
         Base.metadata.drop_all(bind=engine)
+        for cache in caches.values():
+            cache.clear()
 
 @pytest.fixture(scope="function")
 def client(db) -> Generator:
@@ -0,0 +1,58 @@
+
+from fastapi.testclient import TestClient
+from datetime import datetime, timedelta
+from app.core.config import settings
+from app.models.group import Group
+from app.models.instructor_schedule import InstructorSchedule
+
+def test_auto_assign_dry_run_and_commit(client: TestClient, db, admin_token):
+    week = datetime(2031, 3, 3, 9, 0)
+    for offset in (0, 1):
+        db.add(Group(
+            name=f"Unassigned {offset}", capacity=10, max_male=5, max_female=5,
+            start_time=week + timedelta(hours=offset),
+            end_time=week + timedelta(hours=offset + 1),
+        ))
+    db.commit()
+    request = {
+        "start": week.isoformat(),
+        "end": (week + timedelta(days=7)).isoformat(),
+    }
+
+    response = client.post(f"{settings.API_V1_STR}/groups/auto-assign", headers=admin_token, json=request)
+    assert response.status_code == 200
+    data = response.json()
+    assert data["dry_run"] is True
+    assert len(data["assignments"]) == 2
+    assert {a["instructor_id"] for a in data["assignments"]} == {2}
+    assert db.query(Group).filter(Group.instructor_id.is_(None)).count() == 2
+
+    request["dry_run"] = False
+    response = client.post(f"{settings.API_V1_STR}/groups/auto-assign", headers=admin_token, json=request)
+    assert response.status_code == 200
+    assert response.json()["unassigned_group_ids"] == []
+    assert db.query(Group).filter(Group.instructor_id.is_(None)).count() == 0
+
+def test_auto_assign_honors_shifts(client: TestClient, db, admin_token):
+    week = datetime(2031, 3, 3, 9, 0)
+    inside = Group(
+        name="Inside", capacity=10, max_male=5, max_female=5,
+        start_time=week, end_time=week + timedelta(hours=1),
+    )
+    outside = Group(
+        name="Outside", capacity=10, max_male=5, max_female=5,
+        start_time=week + timedelta(hours=5), end_time=week + timedelta(hours=6),
+    )
+    db.add_all([inside, outside, InstructorSchedule(
+        instructor_id=2, start_time=week - timedelta(hours=1), end_time=week + timedelta(hours=3)
+    )])
+    db.commit()
+
+    response = client.post(f"{settings.API_V1_STR}/groups/auto-assign", headers=admin_token, json={
+        "start": week.isoformat(),
+        "end": (week + timedelta(days=7)).isoformat(),
+    })
+    assert response.status_code == 200
+    data = response.json()
+    assert [(a["group_id"], a["instructor_id"]) for a in data["assignments"]] == [(inside.id, 2)]
+    assert data["unassigned_group_ids"] == [outside.id]
@@ -0,0 +1,35 @@
+
+from fastapi.testclient import TestClient
+from datetime import timedelta
+from app.core.config import settings
+from app.models.group import Group
+
+def test_available_instructors_batch(client: TestClient, db, admin_token, monkeypatch):
+    monkeypatch.setattr(settings, "INSTRUCTOR_MIN_HOURS_PER_WEEK", 0)
+    fixture_group = db.query(Group).filter(Group.id == 1).first()
+    overlapping = Group(
+        name="Overlapping", capacity=10, max_male=5, max_female=5,
+        start_time=fixture_group.start_time + timedelta(hours=1),
+        end_time=fixture_group.end_time + timedelta(hours=1),
+    )
+    db.add(overlapping)
+    db.commit()
+
+    response = client.post(
+        f"{settings.API_V1_STR}/groups/available-instructors:batch",
+        headers=admin_token,
+        json={"group_ids": [1, overlapping.id]}
+    )
+    assert response.status_code == 200
+    data = {entry["group_id"]: entry["instructors"] for entry in response.json()}
+    # Instructor 2 teaches group 1, so is free for it but not for the overlapping group
+    assert [i["instructor_id"] for i in data[1]] == [2]
+    assert data[1][0]["current_hours_scheduled"] == 2
+    assert data[overlapping.id] == []
+
+    response = client.post(
+        f"{settings.API_V1_STR}/groups/available-instructors:batch",
+        headers=admin_token,
+        json={"group_ids": [1, 999]}
+    )
+    assert response.status_code == 404
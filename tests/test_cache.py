@@ -0,0 +1,51 @@
+
+import time
+from fastapi.testclient import TestClient
+from app.cache.backends import MISSING, MemoryBackend
+from app.cache.core import caches
+from app.core.config import settings
+
+def test_memory_backend_lru_ttl_and_tags(monkeypatch):
+    backend = MemoryBackend(max_entries=2)
+    backend.set("a", 1, tags=["group:1"], ttl=None)
+    backend.set("b", 2, tags=["group:2", "users"], ttl=None)
+    assert backend.get("a") == 1
+    backend.set("c", 3, tags=["users"], ttl=10)
+    # "b" was least recently used
+    assert backend.get("b") is MISSING
+    assert backend.invalidate(["users"]) == 1
+    assert backend.get("c") is MISSING and backend.get("a") == 1
+
+    backend.set("d", None, tags=[], ttl=10)
+    assert backend.get("d") is None
+    now = time.monotonic()
+    monkeypatch.setattr(time, "monotonic", lambda: now + 11)
+    assert backend.get("d") is MISSING
+    assert len(backend) == 1
+
+def test_preferences_cached_until_written(client: TestClient, instructor_token, admin_token):
+    url = f"{settings.API_V1_STR}/instructors/me/preferences"
+    stats = caches["instructor_preferences"]
+    assert client.get(url, headers=instructor_token).json() == []
+    hits = stats.hits
+    assert client.get(url, headers=instructor_token).json() == []
+    assert stats.hits == hits + 1
+
+    response = client.post(url, headers=instructor_token, json={
+        "day_of_week": "monday", "start_time": "08:00:00", "end_time": "12:00:00"
+    })
+    assert response.status_code == 200
+    assert [p["start_time"] for p in client.get(url, headers=instructor_token).json()] == ["08:00:00"]
+
+    response = client.get(f"{settings.API_V1_STR}/cache/stats", headers=admin_token)
+    assert response.status_code == 200
+    assert {"name": "instructor_preferences", "entries": 1, "hits": hits + 1,
+            "misses": 2, "invalidations": 1} in response.json()
+
+def test_group_details_invalidated_by_registration(client: TestClient, visitor_token):
+    url = f"{settings.API_V1_STR}/groups/1"
+    assert client.get(url, headers=visitor_token).json()["current_participants"] == 0
+    client.post(f"{settings.API_V1_STR}/registrations/", headers=visitor_token, json={"group_id": 1})
+    assert client.get(url, headers=visitor_token).json()["current_participants"] == 1
+    client.delete(f"{settings.API_V1_STR}/registrations/1", headers=visitor_token)
+    assert client.get(url, headers=visitor_token).json()["current_participants"] == 0
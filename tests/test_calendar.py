@@ -0,0 +1,45 @@
+
+from fastapi.testclient import TestClient
+from app.core import icalendar
+from app.core.config import settings
+
+def test_icalendar_escaping_and_folding():
+    assert icalendar.escape_text("Laps; lanes 1,2\nbring fins") == "Laps\\; lanes 1\\,2\\nbring fins"
+    folded = icalendar.fold("DESCRIPTION:" + "é" * 60)
+    lines = folded.split("\r\n")
+    assert all(len(line.encode()) <= icalendar.MAX_LINE_OCTETS for line in lines)
+    assert "".join(line[1:] if i else line for i, line in enumerate(lines)) == "DESCRIPTION:" + "é" * 60
+
+def test_calendar_feed_conditional_get(client: TestClient, visitor_token):
+    response = client.get(f"{settings.API_V1_STR}/calendar/token", headers=visitor_token)
+    assert response.status_code == 200
+    url = response.json()["url"]
+
+    response = client.get(url)
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/calendar")
+    assert "BEGIN:VEVENT" not in response.text
+    empty_etag = response.headers["etag"]
+
+    response = client.post(f"{settings.API_V1_STR}/registrations/", headers=visitor_token, json={"group_id": 1})
+    assert response.status_code == 200
+
+    response = client.get(url, headers={"If-None-Match": empty_etag})
+    assert response.status_code == 200
+    assert "UID:group-1@pool-scheduler\r\n" in response.text
+    assert "SUMMARY:Test Group\r\n" in response.text
+    assert response.text.endswith("END:VCALENDAR\r\n")
+
+    response = client.get(url, headers={"If-None-Match": response.headers["etag"]})
+    assert response.status_code == 304
+    assert response.content == b""
+    assert "last-modified" not in response.headers
+
+    # Cancelling leaves the latest update time alone, so a date cannot validate the feed
+    response = client.delete(f"{settings.API_V1_STR}/registrations/1", headers=visitor_token)
+    assert response.status_code == 200
+    response = client.get(url, headers={"If-Modified-Since": "Fri, 01 Jan 2100 00:00:00 GMT"})
+    assert response.status_code == 200
+    assert "BEGIN:VEVENT" not in response.text
+
+    assert client.get(url.replace(".ics", "0.ics")).status_code == 404
@@ -0,0 +1,54 @@
+
+from fastapi.testclient import TestClient
+from datetime import datetime, timedelta
+from app.core.config import settings
+from app.crud.crud_group import group
+from app.crud.crud_instructor import instructor
+from app.crud.crud_week_hours import instructor_week_hours
+from app.models.group import Group
+from app.schemas.group import GroupCreate
+
+MONDAY = datetime(2031, 3, 3, 9, 0)
+NEXT_MONDAY = MONDAY + timedelta(weeks=1)
+
+def _create(db, name, start, hours, instructor_id=None):
+    return group.create_with_instructor(db, obj_in=GroupCreate(
+        name=name, capacity=10, max_male=5, max_female=5,
+        start_time=start, end_time=start + timedelta(hours=hours)
+    ), instructor_id=instructor_id)
+
+def test_clone_week_keeps_instructors_without_conflicts(client: TestClient, db, admin_token, monkeypatch):
+    monkeypatch.setattr(settings, "INSTRUCTOR_MAX_HOURS_PER_WEEK", 4)
+    _create(db, "Kept", MONDAY, 2, instructor_id=2)
+    clashing = _create(db, "Clashing", MONDAY + timedelta(days=1), 1, instructor_id=2)
+    too_long = _create(db, "Too long", MONDAY + timedelta(days=2), 2, instructor_id=2)
+    _create(db, "Open", MONDAY + timedelta(days=3, microseconds=1500), 1)
+    # Already in the target week
+    _create(db, "Existing", NEXT_MONDAY + timedelta(days=1), 1, instructor_id=2)
+
+    response = client.post(f"{settings.API_V1_STR}/groups/clone-week", headers=admin_token, json={
+        "source_week": (MONDAY + timedelta(days=4)).date().isoformat(),
+        "target_week": NEXT_MONDAY.date().isoformat(),
+    })
+    assert response.status_code == 200
+    data = response.json()
+    assert data["created"] == 4
+    assert data["conflicts"] == [
+        {"group_id": clashing.id, "instructor_id": 2, "reason": "overlap"},
+        {"group_id": too_long.id, "instructor_id": 2, "reason": "max_hours"},
+    ]
+
+    copies = db.query(Group).filter(
+        Group.start_time >= NEXT_MONDAY, Group.name != "Existing"
+    ).order_by(Group.start_time).all()
+    assert [(g.name, g.start_time, g.instructor_id) for g in copies] == [
+        ("Kept", NEXT_MONDAY, 2),
+        ("Clashing", NEXT_MONDAY + timedelta(days=1), None),
+        ("Too long", NEXT_MONDAY + timedelta(days=2), None),
+        ("Open", NEXT_MONDAY + timedelta(days=3, microseconds=1500), None),
+    ]
+    assert instructor_week_hours.get_hours(db, instructor_id=2, week_start=NEXT_MONDAY.date()) == 3
+    # The index knows about the copies
+    assert instructor.get_conflicting_group_ids(
+        db, instructor_id=2, start=NEXT_MONDAY, end=NEXT_MONDAY + timedelta(hours=1)
+    ) == [copies[0].id]
@@ -0,0 +1,45 @@
+
+from fastapi.testclient import TestClient
+from app.core.config import settings
+from app.db.changes import table_versions
+
+def test_group_list_conditional_get(client: TestClient, visitor_token):
+    url = f"{settings.API_V1_STR}/groups/"
+    response = client.get(url, headers=visitor_token)
+    assert response.status_code == 200
+    etag = response.headers["etag"]
+    assert response.headers["cache-control"] == "private, no-cache"
+
+    response = client.get(url, headers={**visitor_token, "If-None-Match": etag})
+    assert response.status_code == 304
+    assert response.content == b""
+
+    # Query parameters are part of the tag
+    response = client.get(f"{url}?fields=id,name", headers={**visitor_token, "If-None-Match": etag})
+    assert response.status_code == 200
+
+    # A registration changes the participant counts
+    response = client.post(f"{settings.API_V1_STR}/registrations/", headers=visitor_token, json={"group_id": 1})
+    assert response.status_code == 200
+    response = client.get(url, headers={**visitor_token, "If-None-Match": etag})
+    assert response.status_code == 200
+    assert response.json()[0]["current_participants"] == 1
+
+def test_registration_list_conditional_get(client: TestClient, admin_token, visitor_token):
+    url = f"{settings.API_V1_STR}/registrations/"
+    visitor_etag = client.get(url, headers=visitor_token).headers["etag"]
+    admin_etag = client.get(url, headers=admin_token).headers["etag"]
+    assert visitor_etag != admin_etag
+    assert client.get(url, headers={**admin_token, "If-None-Match": admin_etag}).status_code == 304
+
+    client.post(url, headers=visitor_token, json={"group_id": 1})
+    response = client.get(url, headers={**visitor_token, "If-None-Match": visitor_etag})
+    assert response.status_code == 200
+    assert [r["group_id"] for r in response.json()] == [1]
+
+def test_writes_of_other_processes_change_the_tag(client: TestClient, db, visitor_token):
+    url = f"{settings.API_V1_STR}/groups/"
+    etag = client.get(url, headers=visitor_token).headers["etag"]
+    # Another worker's commit bumps the shared version row, with no change feed here
+    table_versions.bump(db.get_bind(), ["groups"])
+    assert client.get(url, headers={**visitor_token, "If-None-Match": etag}).status_code == 200
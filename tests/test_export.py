@@ -0,0 +1,35 @@
+
+import pytest
+from fastapi.testclient import TestClient
+from app.core.config import settings
+from app.models.group import Group
+
+pa = pytest.importorskip("pyarrow")
+import pyarrow.parquet as pq
+
+def test_export_registrations_arrow_and_parquet(client: TestClient, db, admin_token, visitor_token):
+    client.post(f"{settings.API_V1_STR}/registrations/", headers=visitor_token, json={"group_id": 1})
+    start = db.query(Group).filter(Group.id == 1).first().start_time.date()
+    query = f"start={start}&end={start.replace(year=start.year + 1)}"
+
+    response = client.get(f"{settings.API_V1_STR}/exports/registrations?{query}&format=arrow", headers=admin_token)
+    assert response.status_code == 200
+    table = pa.ipc.open_stream(response.content).read_all()
+    assert table.column_names == [
+        "id", "group_id", "visitor_id", "gender", "attended", "created_at", "group_start_time"
+    ]
+    assert table.column("group_id").to_pylist() == [1]
+    assert table.column("attended").to_pylist() == [False]
+
+    response = client.get(f"{settings.API_V1_STR}/exports/groups?{query}", headers=admin_token)
+    assert response.status_code == 200
+    table = pq.read_table(pa.BufferReader(response.content))
+    row = table.to_pylist()[0]
+    assert (row["id"], row["participants"], row["attended"]) == (1, 1, 0)
+
+def test_export_validation(client: TestClient, admin_token, visitor_token):
+    url = f"{settings.API_V1_STR}/exports"
+    assert client.get(f"{url}/groups?start=2024-01-01&end=2025-01-01", headers=visitor_token).status_code == 403
+    assert client.get(f"{url}/users?start=2024-01-01&end=2025-01-01", headers=admin_token).status_code == 400
+    assert client.get(f"{url}/groups?start=2025-01-01&end=2024-01-01", headers=admin_token).status_code == 400
+    assert client.get(f"{url}/groups?start=2024-01-01&end=2025-01-01&format=csv", headers=admin_token).status_code == 422
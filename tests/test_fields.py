@@ -0,0 +1,36 @@
+
+from fastapi.testclient import TestClient
+from app.core.config import settings
+
+def test_sparse_fieldsets(client: TestClient, admin_token, visitor_token):
+    response = client.post(f"{settings.API_V1_STR}/registrations/", headers=visitor_token, json={"group_id": 1})
+    assert response.status_code == 200
+
+    response = client.get(
+        f"{settings.API_V1_STR}/groups/", headers=admin_token,
+        params={"fields": "id,name,start_time,is_full"}
+    )
+    assert response.status_code == 200
+    assert response.json() == [{
+        "id": 1, "name": "Test Group", "start_time": response.json()[0]["start_time"], "is_full": False
+    }]
+
+    response = client.get(
+        f"{settings.API_V1_STR}/groups/1", headers=admin_token,
+        params={"fields": "current_male_participants,is_male_full,id"}
+    )
+    assert response.json() == {"id": 1, "current_male_participants": 1, "is_male_full": False}
+
+    response = client.get(f"{settings.API_V1_STR}/groups/upcoming", headers=admin_token)
+    full = response.json()[0]
+    assert full["current_participants"] == 1 and set(full) == {
+        "id", "name", "start_time", "end_time", "capacity", "current_participants", "instructor_id", "is_full"
+    }
+
+    response = client.get(
+        f"{settings.API_V1_STR}/registrations/", headers=visitor_token, params={"fields": "group_id"}
+    )
+    assert response.json() == [{"group_id": 1}]
+
+    response = client.get(f"{settings.API_V1_STR}/groups/", headers=admin_token, params={"fields": "id,secret"})
+    assert response.status_code == 400
@@ -0,0 +1,55 @@
+
+from fastapi.testclient import TestClient
+from datetime import datetime, timedelta
+from app.core.config import settings
+from app.models.group import Group
+from app.scheduling.interval_index import InstructorIntervalIndex
+
+def test_interval_index_overlaps():
+    index = InstructorIntervalIndex()
+    base = datetime(2030, 1, 7, 8, 0)
+    index.add(group_id=1, instructor_id=2, start=base, end=base + timedelta(hours=1))
+    index.add(group_id=2, instructor_id=2, start=base + timedelta(hours=2), end=base + timedelta(hours=6))
+    index.add(group_id=3, instructor_id=5, start=base, end=base + timedelta(hours=1))
+
+    # Touching slots do not overlap
+    assert index.find_conflicts(
+        instructor_id=2, start=base + timedelta(hours=1), end=base + timedelta(hours=2)
+    ) == []
+    # The long slot is found even though it starts well before the query
+    assert index.find_conflicts(
+        instructor_id=2, start=base + timedelta(hours=5), end=base + timedelta(hours=7)
+    ) == [2]
+    assert index.find_conflicts(
+        instructor_id=2, start=base, end=base + timedelta(hours=3), exclude_group_id=1
+    ) == [2]
+
+    # Reassigning a group moves it between instructors
+    index.add(group_id=1, instructor_id=5, start=base + timedelta(hours=1), end=base + timedelta(hours=2))
+    assert index.find_conflicts(instructor_id=2, start=base, end=base + timedelta(hours=1)) == []
+    assert index.find_conflicts(instructor_id=5, start=base, end=base + timedelta(hours=2)) == [3, 1]
+
+    index.discard(3)
+    assert index.find_conflicts(instructor_id=5, start=base, end=base + timedelta(hours=2)) == [1]
+
+def test_create_group_with_conflicting_instructor(client: TestClient, db, admin_token):
+    # The fixture group runs for two hours with instructor 2
+    existing_start = db.query(Group).filter(Group.id == 1).first().start_time
+    group_data = {
+        "name": "Overlapping Group",
+        "capacity": 10,
+        "max_male": 5,
+        "max_female": 5,
+        "start_time": (existing_start + timedelta(hours=1)).isoformat(),
+        "end_time": (existing_start + timedelta(hours=3)).isoformat(),
+        "instructor_id": 2
+    }
+
+    response = client.post(
+        f"{settings.API_V1_STR}/groups/",
+        headers=admin_token,
+        json=group_data
+    )
+
+    assert response.status_code == 400
+    assert "conflicting group" in response.json()["detail"]
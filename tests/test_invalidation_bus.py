@@ -0,0 +1,104 @@
+
+import asyncio
+import json
+import time
+from datetime import timedelta
+from sqlalchemy.orm import Session
+from app.cache import bus
+from app.cache.bus import (
+    MemoryBroker, MemoryBusBackend, UnixSocketBusBackend, encode, invalidation_bus
+)
+from app.cache.core import caches
+from app.crud.crud_registration import registration
+from app.models.group import Group
+from app.realtime.occupancy import occupancy_hub
+from app.schemas.registration import RegistrationCreate
+from app.scheduling.interval_index import interval_index
+
+def test_memory_bus_applies_remote_and_publishes_local_writes(db, monkeypatch):
+    # "Another worker" writes to the same database
+    monkeypatch.setattr(bus, "SessionLocal", lambda: Session(bind=db.get_bind()))
+    broker = MemoryBroker()
+    remote = MemoryBusBackend(broker)
+    received = []
+    remote.start(received.append)
+    invalidation_bus.start(MemoryBusBackend(broker))
+    try:
+        cache = caches["groups"]
+        cache.get_or_load("remote-test", lambda: "stale", tags=["group:1"])
+        interval_index.ensure_loaded(db)
+
+        moved = db.get(Group, 1)
+        moved.start_time += timedelta(days=30)
+        moved.end_time += timedelta(days=30)
+        db.flush()
+        remote.publish(encode(tables=["groups"], tags=["group:1"], origin="other-worker"))
+        assert cache.get_or_load("remote-test", lambda: "fresh", tags=["group:1"]) == "fresh"
+        # Only the written group is resynced
+        assert interval_index.loaded
+        assert interval_index.find_conflicts(
+            instructor_id=moved.instructor_id, start=moved.start_time, end=moved.end_time
+        ) == [1]
+        # Applying a remote write does not echo it back
+        assert received == []
+
+        remote.publish(encode(tables=["groups"], tags=[], bulk_tables=["groups"], origin="other-worker"))
+        assert not interval_index.loaded
+
+        registration.create_with_visitor(db, obj_in=RegistrationCreate(group_id=1), visitor_id=3)
+        # One message per commit, with both its tables and its tags
+        [message] = [json.loads(message) for message in received]
+        assert "registrations" in message["tables"] and "group:1" in message["tags"]
+    finally:
+        invalidation_bus.stop()
+        remote.stop()
+
+def test_remote_registration_pushes_occupancy(db, monkeypatch):
+    monkeypatch.setattr(bus, "SessionLocal", lambda: Session(bind=db.get_bind()))
+    broker = MemoryBroker()
+    remote = MemoryBusBackend(broker)
+    received = []
+    remote.start(received.append)
+    invalidation_bus.start(MemoryBusBackend(broker))
+    try:
+        registration.create_with_visitor(db, obj_in=RegistrationCreate(group_id=1), visitor_id=3)
+        # Replay this commit's message as if another worker had written it
+        [message] = [json.loads(message) for message in received]
+        message["origin"] = "other-worker"
+
+        async def watch():
+            subscription = occupancy_hub.subscribe([1])
+            loop = asyncio.get_running_loop()
+            try:
+                await loop.run_in_executor(None, lambda: remote.publish(json.dumps(message).encode()))
+                return await subscription.next(timeout=5)
+            finally:
+                occupancy_hub.unsubscribe(subscription)
+
+        assert asyncio.run(watch()) == [{"group_id": 1, "total": 1, "male": 1, "female": 0, "is_full": False}]
+    finally:
+        invalidation_bus.stop()
+        remote.stop()
+
+def test_oversized_message_falls_back_to_everything():
+    message = json.loads(encode(tables=[], tags=[f"group:{i}" for i in range(2000)]))
+    assert message["all"] and message["tags"] == []
+
+def test_unix_socket_backends_exchange_messages(tmp_path):
+    first, second = UnixSocketBusBackend(str(tmp_path)), UnixSocketBusBackend(str(tmp_path))
+    second.path = str(tmp_path / "second.sock")
+    received = []
+    first.start(lambda message: None)
+    second.start(received.append)
+    # A socket left behind by a dead worker
+    (tmp_path / "dead.sock").touch()
+    try:
+        first.publish(b"hello")
+        deadline = time.monotonic() + 5
+        while not received and time.monotonic() < deadline:
+            time.sleep(0.01)
+        assert received == [b"hello"]
+        assert not (tmp_path / "dead.sock").exists()
+    finally:
+        first.stop()
+        second.stop()
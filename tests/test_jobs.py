@@ -0,0 +1,70 @@
+
+from datetime import datetime
+from fastapi.testclient import TestClient
+from sqlalchemy.orm import Session
+from app.api import deps
+from app.core.config import settings
+from app.crud.crud_job import job as crud_job
+from app.jobs import handlers
+from app.jobs.runner import run_pending
+from app.models.job import JobStatus
+
+def test_job_enqueue_run_and_poll(client: TestClient, db, admin_token, visitor_token):
+    url = f"{settings.API_V1_STR}/jobs/"
+    assert client.post(url, headers=visitor_token, json={"kind": "rebuild_week_hours"}).status_code == 403
+    assert client.post(url, headers=admin_token, json={"kind": "nope"}).status_code == 400
+
+    response = client.post(url, headers=admin_token, json={"kind": "rebuild_week_hours"})
+    assert response.status_code == 202
+    job_id = response.json()["id"]
+    assert response.json()["status"] == "queued"
+
+    assert run_pending(db, worker_id="test") == 1
+    response = client.get(f"{url}{job_id}", headers=admin_token)
+    assert response.json()["status"] == "succeeded"
+    assert response.json()["result"] == {"rows": 1}
+    assert response.json()["attempts"] == 1
+
+def test_job_priority_and_retries(db, monkeypatch):
+    ran = []
+
+    def flaky(db, payload):
+        ran.append(payload["name"])
+        if payload["name"] == "flaky":
+            raise RuntimeError("try again")
+        if payload["name"] == "invalid":
+            raise ValueError("bad payload")
+        return payload["name"]
+
+    monkeypatch.setitem(handlers.HANDLERS, "test", flaky)
+    # The test session runs inside an outer transaction that a real rollback would discard
+    monkeypatch.setattr(db, "rollback", lambda: None)
+    low = crud_job.enqueue(db, kind="test", payload={"name": "low"})
+    flaky_job = crud_job.enqueue(db, kind="test", payload={"name": "flaky"}, priority=5, max_attempts=2)
+    invalid = crud_job.enqueue(db, kind="test", payload={"name": "invalid"}, priority=1)
+
+    assert run_pending(db, worker_id="test") == 3
+    assert ran == ["flaky", "invalid", "low"]
+    for job in (low, flaky_job, invalid):
+        db.refresh(job)
+    assert low.status == JobStatus.SUCCEEDED and low.result == "low"
+    # Permanent failure without retry
+    assert invalid.status == JobStatus.FAILED and invalid.attempts == 1
+    # Retried later
+    assert flaky_job.status == JobStatus.QUEUED and flaky_job.run_at > datetime.now()
+    assert "try again" in flaky_job.error
+
+    flaky_job.run_at = datetime.now()
+    db.commit()
+    assert run_pending(db, worker_id="test") == 1
+    db.refresh(flaky_job)
+    assert flaky_job.status == JobStatus.FAILED and flaky_job.attempts == 2
+
+def test_job_runs_inline(client: TestClient, db, admin_token, monkeypatch):
+    monkeypatch.setattr(settings, "JOBS_RUN_INLINE", True)
+    # The job gets a session of its own, here on the test's connection and transaction
+    monkeypatch.setattr(deps, "SessionLocal", lambda: Session(bind=db.get_bind()))
+    response = client.post(f"{settings.API_V1_STR}/jobs/", headers=admin_token, json={"kind": "rebuild_week_hours"})
+    assert response.status_code == 202
+    response = client.get(f"{settings.API_V1_STR}/jobs/{response.json()['id']}", headers=admin_token)
+    assert response.json()["status"] == "succeeded"
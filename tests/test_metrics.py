@@ -0,0 +1,48 @@
+
+from fastapi.testclient import TestClient
+from app.core.config import settings
+from app.metrics.registry import Registry
+
+def scrape(client: TestClient) -> dict:
+    response = client.get("/metrics")
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/plain; version=0.0.4")
+    return dict(
+        line.rsplit(" ", 1) for line in response.text.splitlines() if not line.startswith("#")
+    )
+
+def test_metrics_per_route(client: TestClient, visitor_token):
+    route = 'method="GET",route="/api/v1/groups/{group_id}"'
+    unmatched = 'http_requests_total{method="GET",route="<unmatched>",status="404"}'
+    counted = [
+        f'http_requests_total{{{route},status="200"}}',
+        f'http_requests_total{{{route},status="404"}}',
+        unmatched,
+    ]
+    before = scrape(client)
+    assert client.get(f"{settings.API_V1_STR}/groups/1", headers=visitor_token).status_code == 200
+    assert client.get(f"{settings.API_V1_STR}/groups/999", headers=visitor_token).status_code == 404
+    client.get("/no/such/page")
+
+    after = scrape(client)
+    for name in counted:
+        assert float(after[name]) == float(before.get(name, 0)) + 1
+    assert float(after[f"http_db_queries_total{{{route}}}"]) > float(
+        before.get(f"http_db_queries_total{{{route}}}", 0)
+    )
+    assert 'threadpool_threads{state="limit"}' in after
+    assert 'cache_hits_total{cache="groups"}' in after
+
+def test_histogram_rendering():
+    registry = Registry()
+    histogram = registry.histogram("latency_seconds", "Latency", ("route",), buckets=(0.1, 1.0))
+    histogram.observe(("/a",), 0.1)
+    histogram.observe(("/a",), 0.5)
+    histogram.observe(("/a",), 3.0)
+    assert registry.render().splitlines()[2:] == [
+        'latency_seconds_bucket{route="/a",le="0.1"} 1.0',
+        'latency_seconds_bucket{route="/a",le="1.0"} 2.0',
+        'latency_seconds_bucket{route="/a",le="+Inf"} 3.0',
+        'latency_seconds_sum{route="/a"} 3.6',
+        'latency_seconds_count{route="/a"} 3.0',
+    ]
@@ -0,0 +1,39 @@
+
+import asyncio
+from fastapi.testclient import TestClient
+from app.core.config import settings
+from app.crud.crud_registration import registration
+from app.realtime.occupancy import occupancy_hub
+from app.schemas.registration import RegistrationCreate
+
+def test_occupancy_published_on_registration_changes(db):
+    async def watch():
+        subscription = occupancy_hub.subscribe([1])
+        loop = asyncio.get_running_loop()
+        try:
+            # Writers publish from the threadpool
+            await loop.run_in_executor(None, lambda: registration.create_with_visitor(
+                db, obj_in=RegistrationCreate(group_id=1), visitor_id=3
+            ))
+            registered = await subscription.next(timeout=5)
+            await loop.run_in_executor(None, lambda: registration.cancel_registration(
+                db, visitor_id=3, group_id=1
+            ))
+            cancelled = await subscription.next(timeout=5)
+            idle = await subscription.next(timeout=0.01)
+        finally:
+            occupancy_hub.unsubscribe(subscription)
+        return registered, cancelled, idle
+
+    registered, cancelled, idle = asyncio.run(watch())
+    assert registered == [{"group_id": 1, "total": 1, "male": 1, "female": 0, "is_full": False}]
+    assert cancelled == [{"group_id": 1, "total": 0, "male": 0, "female": 0, "is_full": False}]
+    assert idle == []
+    assert occupancy_hub.subscriber_count() == 0
+
+def test_occupancy_stream_validation(client: TestClient, visitor_token):
+    url = f"{settings.API_V1_STR}/groups/occupancy/stream"
+    assert client.get(f"{url}?group_ids=1,x", headers=visitor_token).status_code == 400
+    assert client.get(f"{url}?group_ids=", headers=visitor_token).status_code == 400
+    assert client.get(f"{url}?group_ids=1,999", headers=visitor_token).status_code == 404
+    assert occupancy_hub.subscriber_count() == 0
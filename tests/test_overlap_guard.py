@@ -0,0 +1,47 @@
+
+import pytest
+from fastapi.testclient import TestClient
+from datetime import datetime, timedelta
+from sqlalchemy.exc import IntegrityError
+from app.core.config import settings
+from app.crud.crud_instructor import instructor
+from app.models.group import Group
+
+def test_database_rejects_double_booking(db):
+    base = datetime(2031, 3, 3, 9, 0)
+    db.add(Group(name="First", capacity=10, max_male=5, max_female=5,
+                 start_time=base, end_time=base + timedelta(hours=2), instructor_id=2))
+    db.commit()
+
+    # Touching slots and unassigned groups are fine
+    later = Group(name="Later", capacity=10, max_male=5, max_female=5,
+                  start_time=base + timedelta(hours=2), end_time=base + timedelta(hours=3), instructor_id=2)
+    db.add_all([later, Group(name="Open", capacity=10, max_male=5, max_female=5,
+                             start_time=base, end_time=base + timedelta(hours=2))])
+    db.commit()
+    assert instructor.get_conflicting_group_ids_sql(
+        db, instructor_id=2, start=base + timedelta(hours=1), end=base + timedelta(hours=3)
+    ) != []
+
+    later.start_time = base + timedelta(hours=1)
+    with pytest.raises(IntegrityError, match="groups_instructor_no_overlap"):
+        db.commit()
+    db.rollback()
+
+def test_lost_race_is_reported(client: TestClient, db, admin_token, monkeypatch):
+    fixture_group = db.query(Group).filter(Group.id == 1).first()
+    # Simulate a concurrent request that booked the slot after the conflict check ran
+    monkeypatch.setattr(instructor, "get_conflicting_group_ids", lambda *args, **kwargs: [])
+    response = client.post(
+        f"{settings.API_V1_STR}/groups/",
+        headers=admin_token,
+        json={
+            "name": "Clash", "capacity": 10, "max_male": 5, "max_female": 5,
+            "start_time": fixture_group.start_time.isoformat(),
+            "end_time": fixture_group.end_time.isoformat(),
+            "instructor_id": 2,
+        },
+    )
+    assert response.status_code == 400
+    assert response.json()["detail"] == "Instructor has a conflicting group at this time"
+    assert db.query(Group).filter(Group.name == "Clash").count() == 0
@@ -0,0 +1,58 @@
+
+from datetime import datetime, time
+from app.crud.crud_instructor import instructor_preference
+from app.models.instructor_preference import DayOfWeek
+from app.scheduling.preference_mask import PreferenceMaskCache, preference_masks
+from app.schemas.instructor import InstructorPreferenceCreate, InstructorPreferenceUpdate
+
+MONDAY = datetime(2031, 3, 3)
+
+def test_preference_masks_match_slots():
+    masks = PreferenceMaskCache()
+    masks.load_rows([
+        (2, DayOfWeek.MONDAY, time(8, 0), time(12, 0)),
+        (2, DayOfWeek.MONDAY, time(12, 0), time(14, 10)),
+        (5, DayOfWeek.MONDAY, time(9, 0), time(10, 0)),
+        (5, DayOfWeek.TUESDAY, time(8, 0), time(12, 0)),
+    ])
+
+    assert masks.matches(2, MONDAY.replace(hour=11), MONDAY.replace(hour=13))
+    # 14:10 only covers whole slots up to 14:00, but the window contains the group exactly
+    assert masks.matches(2, MONDAY.replace(hour=13), MONDAY.replace(hour=14, minute=10))
+    assert not masks.matches(2, MONDAY.replace(hour=13), MONDAY.replace(hour=14, minute=15))
+    assert not masks.matches(5, MONDAY.replace(hour=9, minute=30), MONDAY.replace(hour=10, minute=30))
+    assert masks.preferring(MONDAY.replace(hour=9), MONDAY.replace(hour=10)) == {2, 5}
+    assert masks.preferring(MONDAY.replace(hour=9), MONDAY.replace(hour=11)) == {2}
+    assert masks.preferring(MONDAY.replace(hour=20), MONDAY.replace(hour=21)) == set()
+
+def test_preferences_off_the_slot_grid_match_exactly():
+    masks = PreferenceMaskCache()
+    masks.load_rows([(2, DayOfWeek.MONDAY, time(9, 10), time(10, 10))])
+    group = (MONDAY.replace(hour=9, minute=10), MONDAY.replace(hour=10, minute=10))
+    # No whole slot of the group lies inside the preference, yet the times are the same
+    assert masks.matches(2, *group)
+    assert masks.preferring(*group) == {2}
+    assert masks.matches(2, MONDAY.replace(hour=9, minute=15), MONDAY.replace(hour=10))
+    assert not masks.matches(2, MONDAY.replace(hour=9), MONDAY.replace(hour=10))
+    assert masks.preferring(MONDAY.replace(hour=9, minute=5), MONDAY.replace(hour=10)) == set()
+
+def test_preference_masks_follow_crud_writes(db):
+    preference_masks.load(db)
+    slot = (MONDAY.replace(hour=9), MONDAY.replace(hour=10))
+    assert preference_masks.preferring(*slot) == set()
+
+    preference = instructor_preference.create_for_instructor(
+        db, obj_in=InstructorPreferenceCreate(
+            day_of_week=DayOfWeek.MONDAY, start_time=time(8, 0), end_time=time(12, 0)
+        ), instructor_id=2
+    )
+    assert preference_masks.preferring(*slot) == {2}
+
+    instructor_preference.update(db, db_obj=preference, obj_in=InstructorPreferenceUpdate(
+        day_of_week=DayOfWeek.MONDAY, start_time=time(16, 0), end_time=time(20, 0)
+    ))
+    assert preference_masks.preferring(*slot) == set()
+    assert preference_masks.matches(2, MONDAY.replace(hour=17), MONDAY.replace(hour=18))
+
+    instructor_preference.remove(db, id=preference.id)
+    assert not preference_masks.matches(2, MONDAY.replace(hour=17), MONDAY.replace(hour=18))
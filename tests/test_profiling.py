@@ -0,0 +1,34 @@
+
+import marshal
+from fastapi.testclient import TestClient
+from app.core.config import settings
+
+def test_admin_profiles_a_request(client: TestClient, admin_token):
+    url = f"{settings.API_V1_STR}/groups/1/available-instructors"
+    response = client.get(url, headers={**admin_token, "X-Profile": "1"})
+    assert response.status_code == 200
+    profile_id = response.headers["X-Profile-Id"]
+    # Unprofiled requests carry no id
+    assert "X-Profile-Id" not in client.get(url, headers=admin_token).headers
+
+    listed = client.get(f"{settings.API_V1_STR}/profiles/", headers=admin_token).json()
+    assert listed[0]["id"] == profile_id
+    assert listed[0]["route"] == "/api/v1/groups/{group_id}/available-instructors"
+
+    profile = client.get(f"{settings.API_V1_STR}/profiles/{profile_id}", headers=admin_token).json()
+    assert profile["status"] == 200
+    assert profile["statement_count"] == len(profile["statements"]) > 0
+    assert profile["db_seconds"] <= profile["duration_seconds"]
+    assert "read_available_instructors" in profile["stats"]
+
+    response = client.get(f"{settings.API_V1_STR}/profiles/{profile_id}/pstats", headers=admin_token)
+    assert response.status_code == 200
+    assert isinstance(marshal.loads(response.content), dict)
+
+def test_only_admins_profile(client: TestClient, visitor_token, admin_token):
+    response = client.get(
+        f"{settings.API_V1_STR}/groups/1", headers={**visitor_token, "X-Profile": "1"}
+    )
+    assert response.status_code == 403
+    assert client.get(f"{settings.API_V1_STR}/profiles/", headers=visitor_token).status_code == 403
+    assert client.get(f"{settings.API_V1_STR}/profiles/nope", headers=admin_token).status_code == 404
@@ -0,0 +1,113 @@
+
+from fastapi.testclient import TestClient
+from datetime import datetime, timedelta
+from app.core.config import settings
+from app.crud.crud_series import group_series
+from app.models.group import Group
+from app.models.group_series import GroupSeries, GroupSeriesException
+from app.scheduling.recurrence import expand
+
+MONDAY = datetime(2031, 3, 3, 9, 0)
+
+def test_expand_applies_exceptions_and_groups():
+    series = GroupSeries(
+        id=1, name="Weekly", first_start=MONDAY, duration_minutes=60, interval_weeks=2,
+        until=MONDAY + timedelta(weeks=100)
+    )
+    # Far into the series, only the window is walked
+    window = (MONDAY + timedelta(weeks=50), MONDAY + timedelta(weeks=56))
+    assert [o.start_time for o in expand(series, *window)] == [
+        MONDAY + timedelta(weeks=weeks) for weeks in (50, 52, 54)
+    ]
+
+    moved_to = MONDAY + timedelta(weeks=52, days=1)
+    occurrences = expand(series, *window, exceptions=[
+        GroupSeriesException(occurrence_start=MONDAY + timedelta(weeks=50), is_cancelled=True),
+        GroupSeriesException(occurrence_start=MONDAY + timedelta(weeks=52), is_cancelled=False,
+                             start_time=moved_to, end_time=moved_to + timedelta(hours=1)),
+    ], groups=[
+        Group(id=7, name="Weekly", series_id=1, occurrence_start=MONDAY + timedelta(weeks=54),
+              start_time=MONDAY + timedelta(weeks=54), end_time=MONDAY + timedelta(weeks=54, hours=1),
+              instructor_id=2),
+    ])
+    assert [(o.start_time, o.group_id) for o in occurrences] == [
+        (moved_to, None), (MONDAY + timedelta(weeks=54), 7)
+    ]
+    # The rule stops at `until`
+    assert expand(series, MONDAY + timedelta(weeks=101), MONDAY + timedelta(weeks=110)) == []
+
+def test_series_occurrences_materialize_on_demand(client: TestClient, db, admin_token, visitor_token, monkeypatch):
+    monkeypatch.setattr(settings, "INSTRUCTOR_MIN_HOURS_PER_WEEK", 0)
+    response = client.post(f"{settings.API_V1_STR}/series/", headers=admin_token, json={
+        "name": "Morning laps", "capacity": 10, "max_male": 5, "max_female": 5,
+        "first_start": MONDAY.isoformat(), "duration_minutes": 60,
+    })
+    assert response.status_code == 200
+    series_id = response.json()["id"]
+    response = client.post(f"{settings.API_V1_STR}/series/", headers=admin_token, json={
+        "name": "Overbooked", "capacity": 8, "max_male": 5, "max_female": 5,
+        "first_start": MONDAY.isoformat(), "duration_minutes": 60,
+    })
+    assert response.status_code == 422
+    window = {"start": MONDAY.isoformat(), "end": (MONDAY + timedelta(weeks=4)).isoformat()}
+    url = f"{settings.API_V1_STR}/series/{series_id}"
+
+    response = client.get(f"{url}/occurrences", headers=admin_token, params=window)
+    assert len(response.json()) == 4
+    assert db.query(Group).filter(Group.series_id == series_id).count() == 0
+
+    response = client.post(f"{url}/exceptions", headers=admin_token, json={
+        "occurrence_start": (MONDAY + timedelta(weeks=1)).isoformat(), "is_cancelled": True
+    })
+    assert response.status_code == 200
+
+    response = client.put(f"{url}/occurrences/instructor", headers=admin_token, json={
+        "occurrence_start": (MONDAY + timedelta(weeks=2)).isoformat(), "instructor_id": 2
+    })
+    assert response.status_code == 200
+    assert response.json()["instructor_id"] == 2
+
+    response = client.post(f"{url}/occurrences/register", headers=visitor_token, json={
+        "occurrence_start": (MONDAY + timedelta(weeks=3)).isoformat()
+    })
+    assert response.status_code == 200
+
+    response = client.get(f"{settings.API_V1_STR}/series/occurrences", headers=admin_token, params=window)
+    occurrences = response.json()
+    assert [o["start_time"] for o in occurrences] == [
+        (MONDAY + timedelta(weeks=weeks)).isoformat() for weeks in (0, 2, 3)
+    ]
+    assert [o["instructor_id"] for o in occurrences] == [None, 2, None]
+    assert all(o["group_id"] for o in occurrences[1:])
+
+    # Cancelled occurrences cannot be materialized, and the rule is frozen once used
+    response = client.post(f"{url}/occurrences/register", headers=visitor_token, json={
+        "occurrence_start": (MONDAY + timedelta(weeks=1)).isoformat()
+    })
+    assert response.status_code == 400
+    response = client.put(url, headers=admin_token, json={
+        "name": "Morning laps", "capacity": 10, "max_male": 5, "max_female": 5,
+        "first_start": MONDAY.isoformat(), "duration_minutes": 90,
+    })
+    assert response.status_code == 400
+
+def test_occurrence_moved_into_window_from_outside_the_rule(db):
+    series = GroupSeries(
+        name="Short", capacity=10, max_male=5, max_female=5, first_start=MONDAY,
+        duration_minutes=60, interval_weeks=1,
+        until=MONDAY + timedelta(weeks=2)
+    )
+    db.add(series)
+    db.flush()
+    # The last occurrence moves a month past the end of the rule
+    moved_to = MONDAY + timedelta(weeks=6)
+    db.add(GroupSeriesException(
+        series_id=series.id, occurrence_start=MONDAY + timedelta(weeks=1), is_cancelled=False,
+        start_time=moved_to, end_time=moved_to + timedelta(hours=1)
+    ))
+    db.commit()
+
+    occurrences = group_series.get_occurrences(
+        db, start=MONDAY + timedelta(weeks=5), end=MONDAY + timedelta(weeks=7)
+    )
+    assert [(o.series_id, o.start_time) for o in occurrences] == [(series.id, moved_to)]
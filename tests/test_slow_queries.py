@@ -0,0 +1,30 @@
+
+from fastapi.testclient import TestClient
+from app.core.config import settings
+from app.metrics.slow_queries import slow_query_log
+
+def test_slow_queries_logged_with_route_source_and_plan(client: TestClient, admin_token, monkeypatch):
+    slow_query_log.clear()
+    # Every statement counts as slow
+    monkeypatch.setattr(settings, "SLOW_QUERY_SECONDS", 1e-9)
+    assert client.get(f"{settings.API_V1_STR}/groups/1", headers=admin_token).status_code == 200
+    monkeypatch.setattr(settings, "SLOW_QUERY_SECONDS", 0)
+    slow_query_log.flush(timeout=10)
+
+    response = client.get(f"{settings.API_V1_STR}/slow-queries/", headers=admin_token)
+    assert response.status_code == 200
+    entries = [e for e in response.json() if e["route"] == "GET /api/v1/groups/{group_id}"]
+    group_query = next(e for e in entries if "FROM groups" in e["statement"])
+    assert group_query["source"].startswith("app.crud.")
+    assert group_query["plan"] and group_query["plan_error"] is None
+
+def test_slow_queries_admin_only(client: TestClient, visitor_token):
+    assert client.get(f"{settings.API_V1_STR}/slow-queries/", headers=visitor_token).status_code == 403
+
+def test_slow_query_logging_never_fails_the_query(client: TestClient, admin_token, monkeypatch):
+    def broken(*args, **kwargs):
+        raise RuntimeError("logger is broken")
+
+    monkeypatch.setattr(settings, "SLOW_QUERY_SECONDS", 1e-9)
+    monkeypatch.setattr(slow_query_log, "record", broken)
+    assert client.get(f"{settings.API_V1_STR}/groups/1", headers=admin_token).status_code == 200
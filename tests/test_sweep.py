@@ -0,0 +1,64 @@
+
+from datetime import datetime, timedelta
+from fastapi.testclient import TestClient
+from app.core.config import settings
+from app.crud.crud_group import group
+from app.models.group import Group
+from app.models.instructor_schedule import InstructorSchedule
+from app.schemas.group import GroupCreate
+from app.scheduling.sweep import ShiftCoverage, classify_slots, coverage_of, free_windows, merge
+
+MONDAY = datetime(2031, 3, 3)
+
+def at(hour: int, minute: int = 0) -> datetime:
+    return MONDAY.replace(hour=hour, minute=minute)
+
+def test_shift_coverage_and_free_windows():
+    shifts = merge([(at(8), at(10)), (at(10), at(12)), (at(14), at(18))])
+    assert shifts == [(at(8), at(12)), (at(14), at(18))]
+
+    slots = [(at(15), at(16)), (at(11), at(13)), (at(12), at(14)), (at(9), at(10))]
+    expected = [ShiftCoverage.FULL, ShiftCoverage.PARTIAL, ShiftCoverage.OFF_SHIFT, ShiftCoverage.FULL]
+    assert classify_slots(shifts, slots) == expected
+    assert [coverage_of(shifts, start, end) for start, end in slots] == expected
+
+    busy = [(at(9), at(10)), (at(11, 30), at(14, 30)), (at(16), at(17))]
+    assert free_windows(shifts, busy, at(0), at(23)) == [
+        (at(8), at(9)), (at(10), at(11, 30)), (at(14, 30), at(16)), (at(17), at(18))
+    ]
+    assert free_windows(shifts, busy, at(9, 30), at(15)) == [(at(10), at(11, 30)), (at(14, 30), at(15))]
+
+def test_availability_honors_shifts(client: TestClient, db, admin_token, monkeypatch):
+    monkeypatch.setattr(settings, "INSTRUCTOR_MIN_HOURS_PER_WEEK", 0)
+    inside = Group(name="Inside", capacity=10, max_male=5, max_female=5, start_time=at(9), end_time=at(10))
+    outside = Group(name="Outside", capacity=10, max_male=5, max_female=5, start_time=at(13), end_time=at(14))
+    db.add_all([inside, outside, InstructorSchedule(instructor_id=2, start_time=at(8), end_time=at(12))])
+    db.commit()
+    group.create_with_instructor(db, obj_in=GroupCreate(
+        name="Taught", capacity=10, max_male=5, max_female=5, start_time=at(10), end_time=at(11)
+    ), instructor_id=2)
+
+    response = client.post(
+        f"{settings.API_V1_STR}/groups/available-instructors:batch",
+        headers=admin_token,
+        json={"group_ids": [inside.id, outside.id]}
+    )
+    assert response.status_code == 200
+    data = {entry["group_id"]: entry["instructors"] for entry in response.json()}
+    assert [(i["instructor_id"], i["shift_coverage"]) for i in data[inside.id]] == [(2, "full")]
+    assert data[outside.id] == []
+
+    response = client.get(
+        f"{settings.API_V1_STR}/instructors/availability",
+        headers=admin_token,
+        params={"start": at(0).isoformat(), "end": (MONDAY + timedelta(days=1)).isoformat()}
+    )
+    assert response.status_code == 200
+    assert response.json() == [{
+        "instructor_id": 2,
+        "full_name": "Instructor User",
+        "free": [
+            {"start": at(8).isoformat(), "end": at(10).isoformat()},
+            {"start": at(11).isoformat(), "end": at(12).isoformat()},
+        ],
+    }]
@@ -0,0 +1,73 @@
+
+import json
+from fastapi.testclient import TestClient
+from app.core.config import settings
+from app.main import app
+from app.metrics import tracing
+
+def test_spans_nest_from_route_to_sql(client: TestClient, admin_token):
+    exporter = tracing.InMemoryExporter()
+    tracing.tracer.start(exporter)
+    tracing.instrument(app)
+    trace_id = "4bf92f3577b34da6a3ce929d0e0e4736"
+    try:
+        response = client.get(
+            f"{settings.API_V1_STR}/groups/1/available-instructors",
+            headers={**admin_token, "traceparent": f"00-{trace_id}-00f067aa0ba902b7-01"},
+        )
+        assert response.status_code == 200
+        tracing.tracer.flush()
+    finally:
+        tracing.tracer.stop()
+
+    spans = [span for span in exporter.spans if span.trace_id == trace_id]
+    by_id = {span.span_id: span for span in spans}
+
+    def ancestors(span):
+        names = []
+        while span.parent_id in by_id:
+            span = by_id[span.parent_id]
+            names.append(span.name)
+        return names
+
+    root = next(span for span in spans if span.parent_id == "00f067aa0ba902b7")
+    assert root.name == "GET /api/v1/groups/{group_id}/available-instructors"
+    assert root.attributes["http.status_code"] == 200
+    names = {span.name for span in spans}
+    # Nested dependencies (get_current_user) are rebuilt from their signatures
+    # while any dependency override is set, as in these tests, so only the
+    # route's own dependency is seen here
+    assert "dependency get_current_admin" in names
+    matching = next(span for span in spans if span.name == "CRUDInstructor.get_available_instructors_for_groups")
+    assert "endpoint read_available_instructors" in ancestors(matching)
+    sql = [span for span in spans if span.kind == tracing.SpanKind.CLIENT]
+    assert sql and all(span.attributes["db.system"] == "sqlite" for span in sql)
+    assert any(matching.name in ancestors(span) for span in sql)
+    assert all(span.end_ns >= span.start_ns for span in spans)
+
+def test_unsampled_requests_are_not_traced(client: TestClient, visitor_token):
+    exporter = tracing.InMemoryExporter()
+    tracing.tracer.start(exporter)
+    try:
+        client.get(
+            f"{settings.API_V1_STR}/groups/1",
+            headers={**visitor_token, "traceparent": "00-4bf92f3577b34da6a3ce929d0e0e4736-00f067aa0ba902b7-00"},
+        )
+        tracing.tracer.flush()
+    finally:
+        tracing.tracer.stop()
+    assert exporter.spans == []
+
+def test_file_exporter_writes_otlp_json(tmp_path):
+    root = tracing.Span("GET /", trace_id="a" * 32, parent_id=None, kind=tracing.SpanKind.SERVER)
+    child = root.child("SELECT", kind=tracing.SpanKind.CLIENT, **{"db.rowcount": 3})
+    child.error = "OperationalError: locked"
+    path = tmp_path / "traces.jsonl"
+    tracing.FileExporter(str(path)).export([root, child])
+
+    document = json.loads(path.read_text().splitlines()[0])
+    spans = document["resourceSpans"][0]["scopeSpans"][0]["spans"]
+    assert spans[0]["traceId"] == "a" * 32 and "parentSpanId" not in spans[0]
+    assert spans[1]["parentSpanId"] == root.span_id
+    assert spans[1]["attributes"] == [{"key": "db.rowcount", "value": {"intValue": "3"}}]
+    assert spans[1]["status"] == {"code": 2, "message": "OperationalError: locked"}
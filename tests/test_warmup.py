@@ -0,0 +1,21 @@
+
+from fastapi.testclient import TestClient
+from app.core import warmup
+from app.core.security import pwd_context
+from app.main import app
+
+def test_openapi_schema_built_once(client: TestClient):
+    # Built during startup already
+    schema = app.openapi_schema
+    assert schema is not None
+    response = client.get("/openapi.json")
+    assert response.status_code == 200
+    assert "/api/v1/groups/" in response.json()["paths"]
+    assert app.openapi() is schema
+
+def test_warm_up_steps(db):
+    timings = warmup.run(db)
+    assert set(timings) == {"pool", "bcrypt", "caches"}
+    assert pwd_context.handler("bcrypt").has_backend()
+    # The test session is bound to a single connection, so there is no pool to fill
+    assert warmup.open_pool_connections(db.get_bind(), 5) == 0
@@ -0,0 +1,60 @@
+
+import time
+from fastapi.testclient import TestClient
+from datetime import datetime, timedelta
+from sqlalchemy import update
+from app.core.config import settings
+from app.crud import crud_calendar
+from app.crud.crud_calendar import calendar_feed
+from app.models.group import Group
+
+MONDAY = datetime(2031, 3, 3)
+
+def test_week_grid(client: TestClient, db, admin_token, visitor_token):
+    db.add_all([
+        Group(name="Morning", capacity=10, max_male=2, max_female=8,
+              start_time=MONDAY.replace(hour=9, minute=30), end_time=MONDAY.replace(hour=11), instructor_id=2),
+        Group(name="Wednesday", capacity=10, max_male=5, max_female=5,
+              start_time=MONDAY + timedelta(days=2, hours=9), end_time=MONDAY + timedelta(days=2, hours=10)),
+    ])
+    db.commit()
+    morning = db.query(Group).filter(Group.name == "Morning").first()
+    params = {"start": (MONDAY + timedelta(days=3)).date().isoformat()}
+
+    response = client.get(f"{settings.API_V1_STR}/calendar/week", headers=admin_token, params=params)
+    assert response.status_code == 200
+    data = response.json()
+    assert data["week_start"] == MONDAY.date().isoformat()
+    assert [g["name"] for g in data["groups"]] == ["Morning", "Wednesday"]
+    assert data["groups"][0]["instructor_name"] == "Instructor User"
+    assert data["groups"][0]["male_participants"] == 0
+    assert [(c["day"], c["hour"]) for c in data["cells"]] == [(0, 9), (0, 10), (2, 9)]
+
+    response = client.post(
+        f"{settings.API_V1_STR}/registrations/", headers=visitor_token, json={"group_id": morning.id}
+    )
+    assert response.status_code == 200
+
+    # The registration invalidated the cached grid
+    response = client.get(f"{settings.API_V1_STR}/calendar/week", headers=visitor_token, params=params)
+    data = response.json()
+    assert data["my_group_ids"] == [morning.id]
+    first = data["groups"][0]
+    assert (first["participants"], first["spots_left"], first["male_participants"]) == (1, 1, None)
+
+def test_week_grid_expires_without_change_feed(db, monkeypatch):
+    db.add(Group(name="Morning", capacity=10, max_male=5, max_female=5,
+                 start_time=MONDAY.replace(hour=9), end_time=MONDAY.replace(hour=10)))
+    db.commit()
+    grid = calendar_feed.get_week_grid(db, week_start=MONDAY.date(), role="admin", gender=None)
+    assert [g["name"] for g in grid["groups"]] == ["Morning"]
+
+    # A write this worker never hears about, as from another worker without a bus
+    db.connection().execute(update(Group).values(name="Renamed"))
+    grid = calendar_feed.get_week_grid(db, week_start=MONDAY.date(), role="admin", gender=None)
+    assert [g["name"] for g in grid["groups"]] == ["Morning"]
+
+    now = time.monotonic()
+    monkeypatch.setattr(crud_calendar, "monotonic", lambda: now + settings.CACHE_TTL_SECONDS + 1)
+    grid = calendar_feed.get_week_grid(db, week_start=MONDAY.date(), role="admin", gender=None)
+    assert [g["name"] for g in grid["groups"]] == ["Renamed"]
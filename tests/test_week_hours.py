@@ -0,0 +1,56 @@
+
+from fastapi.testclient import TestClient
+from datetime import datetime, timedelta
+from app.core.config import settings
+from app.crud.crud_week_hours import instructor_week_hours
+from app.models.instructor_week_hours import InstructorWeekHours
+
+def _hours(client: TestClient, headers, start: datetime) -> float:
+    response = client.get(
+        f"{settings.API_V1_STR}/instructors/2/hours",
+        headers=headers,
+        params={"start_date": start.isoformat()}
+    )
+    assert response.status_code == 200
+    return response.json()["current_hours"]
+
+def test_week_hours_follow_group_changes(client: TestClient, admin_token):
+    week = datetime(2031, 3, 5, 10, 0)
+    next_week = week + timedelta(days=7)
+    group_data = {
+        "name": "Rollup Group",
+        "capacity": 10,
+        "max_male": 5,
+        "max_female": 5,
+        "start_time": week.isoformat(),
+        "end_time": (week + timedelta(hours=3)).isoformat(),
+        "instructor_id": 2
+    }
+    response = client.post(f"{settings.API_V1_STR}/groups/", headers=admin_token, json=group_data)
+    assert response.status_code == 200
+    group_id = response.json()["id"]
+    assert _hours(client, admin_token, week) == 3
+
+    # Moving the group to the next week moves its hours with it
+    group_data["start_time"] = next_week.isoformat()
+    group_data["end_time"] = (next_week + timedelta(hours=1)).isoformat()
+    response = client.put(f"{settings.API_V1_STR}/groups/{group_id}", headers=admin_token, json=group_data)
+    assert response.status_code == 200
+    assert _hours(client, admin_token, week) == 0
+    assert _hours(client, admin_token, next_week) == 1
+
+    response = client.delete(f"{settings.API_V1_STR}/groups/{group_id}/instructor", headers=admin_token)
+    assert response.status_code == 200
+    assert _hours(client, admin_token, next_week) == 0
+
+def test_week_hours_rebuild_matches_incremental(db):
+    incremental = {
+        (row.instructor_id, row.week_start): row.hours
+        for row in db.query(InstructorWeekHours).all()
+    }
+    assert instructor_week_hours.rebuild(db) == len(incremental)
+    rebuilt = {
+        (row.instructor_id, row.week_start): row.hours
+        for row in db.query(InstructorWeekHours).all()
+    }
+    assert rebuilt == incremental
@@ -0,0 +1,28 @@
+
+import argparse
+import logging
+
+from app.cache.bus import invalidation_bus, make_backend
+from app.core.config import settings
+from app.db.session import SessionLocal
+from app.jobs.runner import Worker
+# Jobs run queries too; log the slow ones
+from app.metrics import slow_queries
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Run background jobs from the jobs table")
+    parser.add_argument("--kinds", nargs="*", help="Only run these job kinds")
+    parser.add_argument("--poll", type=float, help="Seconds between polls when idle")
+    parser.add_argument("--once", action="store_true", help="Run the jobs due now, then exit")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(levelname)s %(name)s: %(message)s")
+    # Jobs write too; the API workers must hear about it
+    invalidation_bus.start(make_backend(settings.INVALIDATION_BUS))
+    worker = Worker(SessionLocal, kinds=args.kinds, poll_seconds=args.poll)
+    if args.once:
+        while worker.run_once():
+            pass
+    else:
+        worker.run_forever()
+    invalidation_bus.stop()